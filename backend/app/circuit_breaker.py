@@ -0,0 +1,64 @@
+# app/circuit_breaker.py
+from __future__ import annotations
+
+import time
+from typing import Callable
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for an external dependency (the
+    email provider).
+
+    closed:    calls allowed; `failure_threshold` failures in a row opens it.
+    open:      calls refused until the cooldown elapses, so callers stop
+               hammering a provider that is down (and stop churning rows).
+    half_open: after the cooldown, calls are allowed again as a probe. A
+               success closes the breaker; a failure re-opens it with the
+               cooldown doubled (capped at max_cooldown_seconds).
+    """
+
+    def __init__(
+        self,
+        *,
+        failure_threshold: int = 5,
+        cooldown_seconds: float = 30.0,
+        max_cooldown_seconds: float = 600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown_seconds = cooldown_seconds
+        self.max_cooldown_seconds = max(cooldown_seconds, max_cooldown_seconds)
+        self.clock = clock
+        self.failures = 0
+        self._cooldown = cooldown_seconds
+        self._open_until: float | None = None
+
+    @property
+    def state(self) -> str:
+        if self._open_until is None:
+            return "closed"
+        return "open" if self.clock() < self._open_until else "half_open"
+
+    def allow(self) -> bool:
+        return self.state != "open"
+
+    def seconds_until_retry(self) -> float:
+        if self._open_until is None:
+            return 0.0
+        return max(0.0, self._open_until - self.clock())
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._cooldown = self.cooldown_seconds
+        self._open_until = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        state = self.state
+        if state == "half_open":
+            # probe failed: stay away longer
+            self._cooldown = min(self.max_cooldown_seconds, self._cooldown * 2)
+            self._open_until = self.clock() + self._cooldown
+        elif state == "closed" and self.failures >= self.failure_threshold:
+            self._open_until = self.clock() + self._cooldown
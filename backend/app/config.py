@@ -7,6 +7,9 @@ load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")  # recommended name
+# Optional direct Postgres connection string; enables LISTEN/NOTIFY wakeups in
+# the notification worker (requires `psycopg`). Without it the worker polls.
+DATABASE_URL = os.getenv("DATABASE_URL")
 
 # Email (Resend)
 EMAIL_FROM = os.getenv("EMAIL_FROM", "noreply@simoneliu.com")
@@ -18,6 +21,44 @@ MEDIA_BUCKET = os.getenv("MEDIA_BUCKET", "ticket-media")
 MEDIA_SIGNED_URL_TTL_SECONDS = int(
     os.getenv("MEDIA_SIGNED_URL_TTL_SECONDS", "3600")
 )
+# Cached signed URLs are re-signed this long before they expire (app/signed_urls.py)
+MEDIA_SIGNED_URL_REFRESH_MARGIN_SECONDS = int(
+    os.getenv("MEDIA_SIGNED_URL_REFRESH_MARGIN_SECONDS", "300")
+)
+# Downscaled JPEG derivative used for verification and as the UI thumbnail
+# (app/media_derive.py, needs Pillow; without it originals are verified as-is).
+MEDIA_DERIVATIVE_MAX_EDGE = int(os.getenv("MEDIA_DERIVATIVE_MAX_EDGE", "1024"))
+MEDIA_DERIVATIVE_QUALITY = int(os.getenv("MEDIA_DERIVATIVE_QUALITY", "80"))
+# "inline": /upload_media waits for verify_image. "async": the row is inserted
+# as pending and app/worker_media.py verifies it (migration 011).
+MEDIA_VERIFY_MODE = os.getenv("MEDIA_VERIFY_MODE", "inline")
+# In-process LRU in front of public.media_verdict_cache (app/media_cache.py)
+MEDIA_VERDICT_CACHE_MAX_ENTRIES = int(os.getenv("MEDIA_VERDICT_CACHE_MAX_ENTRIES", "10000"))
+# Blocking supabase calls are offloaded to a bounded thread pool (app/db.py).
+# This caps concurrent PostgREST/Storage requests per worker process.
+DB_MAX_CONCURRENCY = int(os.getenv("DB_MAX_CONCURRENCY", "32"))
+
+# GET /tickets (app/tickets_api.py): totals are cached per filter set for this long.
+# TICKET_COUNT_MODE: "exact" | "planned" | "estimated" (PostgREST count strategies)
+TICKET_COUNT_CACHE_TTL_SECONDS = float(os.getenv("TICKET_COUNT_CACHE_TTL_SECONDS", "30"))
+TICKET_COUNT_MODE = os.getenv("TICKET_COUNT_MODE", "exact")
+
+# Server-side chat sessions (app/sessions.py)
+# SESSION_BACKEND: "memory" (in-process only) or "supabase" (public.chat_sessions)
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", str(24 * 3600)))
+SESSION_MAX_ENTRIES = int(os.getenv("SESSION_MAX_ENTRIES", "10000"))
+SESSION_MAX_MESSAGES = int(os.getenv("SESSION_MAX_MESSAGES", "24"))
+
+# Rule-based LLM short-circuit for templated turns (app/fastpath.py). Opt-in.
+FASTPATH_ENABLED = os.getenv("FASTPATH_ENABLED", "0") == "1"
+
+# Write-behind for post-reply ticket/outbox writes (app/writebehind.py). Opt-in.
+WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "0") == "1"
+WRITE_BEHIND_WORKERS = int(os.getenv("WRITE_BEHIND_WORKERS", "4"))
+WRITE_BEHIND_MAX_QUEUE = int(os.getenv("WRITE_BEHIND_MAX_QUEUE", "1000"))
+WRITE_BEHIND_MAX_RETRIES = int(os.getenv("WRITE_BEHIND_MAX_RETRIES", "5"))
+
 IMAGE_VERIFICATION_MODEL = "gpt-4o-mini"
 IMAGE_VERIFIER_ID = f"openai:{IMAGE_VERIFICATION_MODEL}"
 
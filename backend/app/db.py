@@ -0,0 +1,37 @@
+# app/db.py
+from __future__ import annotations
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from .config import DB_MAX_CONCURRENCY
+
+T = TypeVar("T")
+
+# supabase-py's Client is synchronous (blocking httpx under the hood). Every
+# database/storage call made from an async handler goes through this bounded
+# pool so a slow PostgREST round-trip never stalls the event loop. The pool
+# size is the concurrency limit: extra calls queue here instead of opening
+# unbounded connections.
+_executor = ThreadPoolExecutor(
+    max_workers=DB_MAX_CONCURRENCY,
+    thread_name_prefix="supabase-io",
+)
+
+
+async def run_db(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a blocking supabase call in the bounded I/O pool and await its result.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
+
+
+async def execute(query: Any) -> Any:
+    """
+    Await a built PostgREST query, e.g.
+        await execute(supabase.table("tickets").select("id").eq("id", 1))
+    """
+    return await run_db(query.execute)
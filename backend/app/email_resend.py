@@ -1,6 +1,17 @@
 # backend/app/email_resend.py
+import asyncio
+import time
 from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Iterable, List, Mapping
+
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+
+RESEND_API_BASE = "https://api.resend.com"
+BATCH_LIMIT = 100  # max emails per /emails/batch request
 
 @dataclass(frozen=True)
 class OutboundEmail:
@@ -8,33 +19,162 @@ class OutboundEmail:
     subject: str
     text: str
     reply_to: str | None = None
+    html: str | None = None
+
+class ResendRateLimited(RuntimeError):
+    """
+    429 from Resend that we did not wait out inline; retry_after is in seconds.
+    """
+    def __init__(self, retry_after: float):
+        super().__init__(f"Resend rate limited; retry after {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+def retry_after_seconds(headers: Mapping[str, str], default: float = 1.0) -> float:
+    """
+    Parses Retry-After (delta-seconds or HTTP date), falling back to
+    ratelimit-reset, then `default`.
+    """
+    for name in ("retry-after", "ratelimit-reset"):
+        value = headers.get(name)
+        if not value:
+            continue
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            when = parsedate_to_datetime(value)
+            return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            pass
+    return default
+
+def _chunks(msgs: List[OutboundEmail], size: int) -> Iterable[List[OutboundEmail]]:
+    for i in range(0, len(msgs), size):
+        yield msgs[i:i + size]
 
-class ResendEmailClient:
-    def __init__(self, api_key: str, from_email: str):
+class _ResendBase:
+    def __init__(
+        self,
+        api_key: str,
+        from_email: str,
+        *,
+        base_url: str = RESEND_API_BASE,
+        timeout: float = 10,
+        pool_size: int = 20,
+        max_retries: int = 2,
+        max_retry_wait: float = 10,
+    ):
         if not api_key:
             raise RuntimeError("RESEND_API_KEY is missing.")
         if not from_email:
             raise RuntimeError("EMAIL_FROM is missing.")
         self.api_key = api_key
         self.from_email = from_email
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.max_retry_wait = max_retry_wait
 
-    def send(self, msg: OutboundEmail) -> None:
+    def _headers(self) -> dict:
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+
+    def _payload(self, msg: OutboundEmail) -> dict:
         payload: dict = {
             "from": self.from_email,
             "to": [msg.to],
             "subject": msg.subject,
             "text": msg.text,
         }
+        if msg.html:
+            payload["html"] = msg.html
         if msg.reply_to:
             payload["reply_to"] = msg.reply_to
+        return payload
+
+    def _rate_limit_wait(self, headers: Mapping[str, str], attempt: int) -> float:
+        """
+        Seconds to sleep before retrying a 429, or raise if we shouldn't wait inline.
+        """
+        wait = retry_after_seconds(headers)
+        if attempt >= self.max_retries or wait > self.max_retry_wait:
+            raise ResendRateLimited(wait)
+        return wait
+
+class ResendEmailClient(_ResendBase):
+    """
+    Sync client. Holds one pooled keep-alive session, so consecutive sends
+    reuse TCP/TLS connections instead of reconnecting per email.
+    """
+    def __init__(self, api_key: str, from_email: str, **kwargs):
+        super().__init__(api_key, from_email, **kwargs)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(self._headers())
 
-        r = requests.post(
-            "https://api.resend.com/emails",
-            headers={
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json",
-            },
-            json=payload,
-            timeout=10,
+    def send(self, msg: OutboundEmail) -> None:
+        self._post("/emails", self._payload(msg))
+
+    def send_batch(self, msgs: List[OutboundEmail]) -> None:
+        """
+        Sends up to BATCH_LIMIT emails per request via /emails/batch.
+        """
+        for chunk in _chunks(list(msgs), BATCH_LIMIT):
+            self._post("/emails/batch", [self._payload(m) for m in chunk])
+
+    def _post(self, path: str, body) -> requests.Response:
+        attempt = 0
+        while True:
+            r = self.session.post(self.base_url + path, json=body, timeout=self.timeout)
+            if r.status_code == 429:
+                time.sleep(self._rate_limit_wait(r.headers, attempt))
+                attempt += 1
+                continue
+            r.raise_for_status()
+            return r
+
+    def close(self) -> None:
+        self.session.close()
+
+class AsyncResendEmailClient(_ResendBase):
+    """
+    Async variant on a pooled httpx.AsyncClient (for the async worker).
+    """
+    def __init__(self, api_key: str, from_email: str, **kwargs):
+        super().__init__(api_key, from_email, **kwargs)
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=self._headers(),
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=self.pool_size,
+                max_keepalive_connections=self.pool_size,
+            ),
         )
-        r.raise_for_status()
+
+    async def send(self, msg: OutboundEmail) -> None:
+        await self._post("/emails", self._payload(msg))
+
+    async def send_batch(self, msgs: List[OutboundEmail]) -> None:
+        for chunk in _chunks(list(msgs), BATCH_LIMIT):
+            await self._post("/emails/batch", [self._payload(m) for m in chunk])
+
+    async def _post(self, path: str, body) -> httpx.Response:
+        attempt = 0
+        while True:
+            r = await self.client.post(path, json=body)
+            if r.status_code == 429:
+                await asyncio.sleep(self._rate_limit_wait(r.headers, attempt))
+                attempt += 1
+                continue
+            r.raise_for_status()
+            return r
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
@@ -1,4 +1,11 @@
 # backend/app/email_templates.py
+from __future__ import annotations
+
+import html
+from dataclasses import dataclass
+from string import Template
+from typing import Dict
+
 
 def _get(ticket: dict, *keys: str, default: str = "(n/a)") -> str:
     for k in keys:
@@ -10,33 +17,146 @@ def _get(ticket: dict, *keys: str, default: str = "(n/a)") -> str:
             return s
     return default
 
-def render_ticket_created(ticket: dict) -> tuple[str, str]:
-    tid = _get(ticket, "id", default="(unknown)")
-    urgency = _get(ticket, "urgency", default="(n/a)")
-    summary = _get(ticket, "summary", "issue_summary", default="(n/a)")
-    address = _get(ticket, "property_address", "address", default="(n/a)")
-    unit = _get(ticket, "unit", default="(n/a)")
-
-    tenant_name = _get(ticket, "tenant_name", "contact_name", "requester_name", default="(n/a)")
-    tenant_phone = _get(ticket, "tenant_phone", "contact_phone", "phone", default="(n/a)")
-    tenant_email = _get(ticket, "tenant_email", "contact_email", "email", default="(n/a)")
-
-    subject = f"[Maintenance] New ticket {tid} ({urgency})"
-
-    body = (
-        "A new maintenance ticket was created.\n\n"
-        "Tenant / Contact\n"
-        f"Name:  {tenant_name}\n"
-        f"Phone: {tenant_phone}\n"
-        f"Email: {tenant_email}\n"
-        "\n"
-        "Ticket\n"
-        f"Ticket ID: {tid}\n"
-        f"Urgency:   {urgency}\n"
-        f"Address:   {address}\n"
-        f"Unit:      {unit}\n"
-        f"Summary:   {summary}\n"
-        "\n"
-        "This is an automated message. Please do not reply.\n"
+
+class UnknownEventType(KeyError):
+    """
+    No template registered for an outbox event_type. Permanent: retrying
+    the row can never succeed.
+    """
+
+
+@dataclass(frozen=True)
+class RenderedEmail:
+    subject: str
+    text: str
+    html: str
+
+
+@dataclass(frozen=True)
+class EmailTemplate:
+    """
+    Subject / text / HTML templates, compiled once at import. Placeholders
+    are the fields from _fields(); HTML gets escaped values.
+    """
+    subject: Template
+    text: Template
+    html: Template
+
+    def render(self, fields: Dict[str, str]) -> RenderedEmail:
+        escaped = {k: html.escape(v) for k, v in fields.items()}
+        return RenderedEmail(
+            subject=self.subject.substitute(fields),
+            text=self.text.substitute(fields),
+            html=self.html.substitute(escaped),
+        )
+
+
+def _fields(ticket: dict) -> Dict[str, str]:
+    return {
+        "id": _get(ticket, "id", default="(unknown)"),
+        "urgency": _get(ticket, "urgency"),
+        "status": _get(ticket, "status"),
+        "category": _get(ticket, "category"),
+        "summary": _get(ticket, "summary", "issue_summary"),
+        "address": _get(ticket, "property_address", "address"),
+        "unit": _get(ticket, "unit"),
+        "tenant_name": _get(ticket, "tenant_name", "contact_name", "requester_name"),
+        "tenant_phone": _get(ticket, "tenant_phone", "contact_phone", "phone"),
+        "tenant_email": _get(ticket, "tenant_email", "contact_email", "email"),
+    }
+
+
+_DETAILS_TEXT = (
+    "Tenant / Contact\n"
+    "Name:  $tenant_name\n"
+    "Email: $tenant_email\n"
+    "Phone: $tenant_phone\n\n"
+    "Property\n"
+    "Address: $address\n"
+    "Unit:    $unit\n\n"
+    "Ticket\n"
+    "Summary:  $summary\n"
+    "Urgency:  $urgency\n"
+    "Category: $category\n\n"
+    "This is an automated message.\n"
+)
+
+_DETAILS_HTML = (
+    "<h3>Tenant / Contact</h3>"
+    "<p>Name: $tenant_name<br>Email: $tenant_email<br>Phone: $tenant_phone</p>"
+    "<h3>Property</h3>"
+    "<p>Address: $address<br>Unit: $unit</p>"
+    "<h3>Ticket</h3>"
+    "<p>Summary: $summary<br>Urgency: $urgency<br>Category: $category</p>"
+    "<p><small>This is an automated message.</small></p>"
+)
+
+
+def _template(subject: str, intro: str) -> EmailTemplate:
+    return EmailTemplate(
+        subject=Template(subject),
+        text=Template(intro + "\n\n" + _DETAILS_TEXT),
+        html=Template(f"<p>{intro}</p>" + _DETAILS_HTML),
+    )
+
+
+# event_type -> template; every event the orchestrator enqueues must be here
+TEMPLATES: Dict[str, EmailTemplate] = {
+    "ticket.created": _template(
+        "[PropCare] Ticket #$id ($urgency) created",
+        "A new maintenance ticket was created.",
+    ),
+    "ticket.action_required": _template(
+        "[PropCare] Ticket #$id ($urgency) needs action",
+        "A maintenance ticket needs a manager to take action.",
+    ),
+    "ticket.emergency": _template(
+        "[PropCare] EMERGENCY: ticket #$id at $address",
+        "EMERGENCY reported by a tenant. Respond immediately.",
+    ),
+}
+
+
+def render(event_type: str, payload: dict) -> RenderedEmail:
+    """
+    Renders an outbox row's payload ({"ticket": {...}}) for its event_type.
+    Raises UnknownEventType if none is registered.
+    """
+    tpl = TEMPLATES.get(event_type)
+    if tpl is None:
+        raise UnknownEventType(event_type)
+    return tpl.render(_fields((payload or {}).get("ticket") or {}))
+
+
+_DIGEST_ITEM_TEXT = Template(
+    "Ticket $id ($urgency, $status)\n"
+    "  Unit:    $unit\n"
+    "  Tenant:  $tenant_name / $tenant_phone\n"
+    "  Summary: $summary\n"
+)
+_DIGEST_ITEM_HTML = Template(
+    "<li><b>Ticket $id</b> ($urgency, $status)<br>"
+    "Unit: $unit<br>Tenant: $tenant_name / $tenant_phone<br>Summary: $summary</li>"
+)
+
+
+def render_digest_email(tickets: list[dict]) -> RenderedEmail:
+    """
+    One email for several non-emergency ticket events to the same manager
+    and property (worker digest mode). `tickets` are outbox payload tickets.
+    """
+    address = _get(tickets[0], "property_address", "address", default="(no address)")
+    intro = f"{len(tickets)} maintenance tickets at {address} need attention."
+    items = [_fields(t) for t in tickets]
+    text = "\n".join(
+        [intro + "\n"]
+        + [_DIGEST_ITEM_TEXT.substitute(f) for f in items]
+        + ["This is an automated message. Please do not reply.\n"]
+    )
+    body = "".join(_DIGEST_ITEM_HTML.substitute({k: html.escape(v) for k, v in f.items()}) for f in items)
+    return RenderedEmail(
+        subject=f"[PropCare] {len(tickets)} tickets need attention at {address}",
+        text=text,
+        html=f"<p>{html.escape(intro)}</p><ul>{body}</ul>"
+             "<p><small>This is an automated message. Please do not reply.</small></p>",
     )
-    return subject, body
@@ -0,0 +1,120 @@
+# app/fastpath.py
+from __future__ import annotations
+
+import re
+from typing import Optional
+
+from . import metrics
+from .policy import KeywordMatcher
+from .schemas import TriageState, TriageTurn
+
+# Opt-in (FASTPATH_ENABLED=1) rule-based short-circuit that answers a turn
+# without calling the LLM. Rules only fire on high-confidence patterns; any
+# doubt falls through to the model.
+
+MAX_FASTPATH_CHARS = 120
+
+FASTPATH_MATCHER = KeywordMatcher({
+    "resolved": [
+        "that fixed it", "fixed it", "it's fixed", "its fixed", "it is fixed",
+        "working now", "works now", "working again", "all good now",
+        "problem solved", "issue resolved", "it's resolved",
+        "stopped leaking", "no longer leaking",
+    ],
+    # anything that suggests the tenant isn't actually done
+    "doubt": [
+        "not", "n't", "still", "again but", "but", "except", "only", "sometimes",
+        "when", "help", "worse", "how", "what", "why", "?",
+    ],
+})
+
+# The *whole* message must be a short confirmation: confirmation phrases plus
+# filler words only ("yes" alone would match "yesterday", and "yes the smell
+# is getting stronger" is new information the model has to see).
+_CONFIRM = (
+    r"(?:yes|yep|yeah|ok(?:ay)?|i'?m outside|we'?re outside|we are outside|"
+    r"i'?m safe|we'?re safe|(?:i |we )?called(?: them)?|will do|thanks|thank you)"
+)
+_FILLER = r"(?:now|already|all|both|of us|right now|done|and)"
+CONFIRM_RE = re.compile(
+    rf"\W*{_CONFIRM}(?:\W+(?:{_CONFIRM}|{_FILLER}))*\W*",
+    re.IGNORECASE,
+)
+
+EMERGENCY_FOLLOWUP_REPLY = {
+    "gas": (
+        "Thank you. Please stay outside and away from the unit, and don't use switches, "
+        "flames or phones near the smell. If you haven't yet, call the FortisBC Emergency "
+        "Line at 1-800-663-9911 from outside. Property management has been alerted. "
+        "Are you and everyone in the unit outside now?"
+    ),
+    "fire": (
+        "Thank you. Stay out of the building and call 911 if you haven't already. "
+        "Property management has been alerted. Is everyone out of the unit safely?"
+    ),
+}
+DEFAULT_EMERGENCY_FOLLOWUP_REPLY = (
+    "Thank you. Please stay clear of the affected area and call 911 if anyone is in danger. "
+    "Property management has been alerted as an emergency. Is everyone safe right now?"
+)
+RESOLVED_REPLY = (
+    "Glad to hear it's working again. I've marked this request as resolved. "
+    "If the problem comes back, just reply here. Is there anything else I can help with?"
+)
+
+
+def fast_path_turn(
+    state: TriageState,
+    latest_text: str,
+    is_emergency: bool,
+) -> Optional[TriageTurn]:
+    """
+    Returns a TriageTurn when the reply is effectively fixed, else None.
+    Requires a previous turn so category/summary are carried over, not guessed.
+    """
+    turn = _match(state, latest_text, is_emergency)
+    metrics.incr("fastpath.hit" if turn else "fastpath.miss")
+    return turn
+
+
+def hit_ratio() -> float:
+    return metrics.ratio("fastpath.hit", "fastpath.miss")
+
+
+def _match(state: TriageState, latest_text: str, is_emergency: bool) -> Optional[TriageTurn]:
+    last = state.last_turn
+    text = (latest_text or "").strip()
+    if last is None or not text or len(text) > MAX_FASTPATH_CHARS:
+        return None
+
+    g = FASTPATH_MATCHER.scan(text)
+    if "doubt" in g:
+        return None
+
+    # Tenant confirms a safety instruction while the thread is already P0.
+    # A new hazard in this message (is_emergency) may be a different one: ask the LLM.
+    if last.urgency == "P0" and state.emergency_type and not is_emergency and CONFIRM_RE.fullmatch(text):
+        metrics.incr("fastpath.hit.emergency_followup")
+        return TriageTurn(
+            tenant_reply=EMERGENCY_FOLLOWUP_REPLY.get(state.emergency_type, DEFAULT_EMERGENCY_FOLLOWUP_REPLY),
+            category=last.category,
+            urgency="P0",
+            status="action_required",
+            # manager was already alerted on the emergency turn itself
+            should_notify_manager=False,
+            summary_for_ticket=last.summary_for_ticket,
+        )
+
+    # "Thanks, that fixed it" on a non-emergency thread.
+    if last.urgency != "P0" and not is_emergency and "resolved" in g:
+        metrics.incr("fastpath.hit.resolved")
+        return TriageTurn(
+            tenant_reply=RESOLVED_REPLY,
+            category=last.category,
+            urgency=last.urgency,
+            status="resolved",
+            should_notify_manager=False,
+            summary_for_ticket=f"{last.summary_for_ticket} (Tenant confirmed resolved.)".strip(),
+        )
+
+    return None
@@ -1,6 +1,6 @@
 # app/llm.py
 import json
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from openai import AsyncOpenAI
 
 from .schemas import TriageTurn
@@ -113,6 +113,8 @@ def tool_schema_create_ticket() -> List[Dict[str, Any]]:
         }
     ]
 
+CREATE_TICKET_TOOLS = tool_schema_create_ticket()
+
 def enforce_no_additional_properties(schema: dict) -> dict:
     """
     OpenAI strict JSON schema requires additionalProperties=false
@@ -134,40 +136,45 @@ def enforce_no_additional_properties(schema: dict) -> dict:
     walk(schema)
     return schema
 
-async def chat_turn_json(
-    client: AsyncOpenAI,
+# Built once at import: the strict schema never changes between turns.
+TRIAGE_JSON_SCHEMA: Dict[str, Any] = enforce_no_additional_properties(
+    TriageTurn.model_json_schema()
+)
+TRIAGE_TEXT_FORMAT: Dict[str, Any] = {
+    "format": {
+        "type": "json_schema",
+        "name": "triage_turn",
+        "strict": True,
+        "schema": TRIAGE_JSON_SCHEMA,
+    }
+}
+
+def _triage_request(
     messages: List[Dict[str, str]],
-    temperature: float = 0.3,
-    extra_instructions: Optional[str] = None,
-) -> TriageTurn:
+    temperature: float,
+    extra_instructions: Optional[str],
+) -> Dict[str, Any]:
     """
-    LLM returns strict JSON matching TRIAGE_OUTPUT_SCHEMA.
+    Shared Responses API arguments for a strict-JSON triage turn.
+
+    `instructions` and `text` are the module-level constants (byte-identical
+    on every call, so the provider can reuse its prompt cache). Per-turn
+    context goes last, as a developer message after the conversation.
     """
-    instructions = SYSTEM_PROMPT
+    input_items: List[Dict[str, str]] = list(messages)
     if extra_instructions:
-        instructions = instructions + "\n\n" + extra_instructions.strip()
+        input_items.append({"role": "developer", "content": extra_instructions.strip()})
 
-    schema = enforce_no_additional_properties(
-        TriageTurn.model_json_schema()
-    )
+    return {
+        "model": "gpt-4o-mini",
+        "instructions": SYSTEM_PROMPT,
+        "input": input_items,
+        "temperature": temperature,
+        "text": TRIAGE_TEXT_FORMAT,
+    }
 
-    resp = await client.responses.create(
-        model="gpt-4o-mini",
-        instructions=instructions,
-        input=messages,
-        temperature=temperature,
-        text={
-            "format": {
-                "type": "json_schema",
-                "name": "triage_turn",
-                "strict": True,
-                "schema": schema,
-            }
-        },
-    )
-
-    # Responses API: JSON text is typically in resp.output_text
-    raw = (resp.output_text or "").strip()
+def _parse_triage_json(raw: str) -> TriageTurn:
+    raw = (raw or "").strip()
     if not raw:
         raise ValueError("LLM returned empty output_text (expected JSON).")
 
@@ -179,6 +186,146 @@ async def chat_turn_json(
     return TriageTurn.model_validate(data)
 
 
+async def chat_turn_json(
+    client: AsyncOpenAI,
+    messages: List[Dict[str, str]],
+    temperature: float = 0.3,
+    extra_instructions: Optional[str] = None,
+) -> TriageTurn:
+    """
+    LLM returns strict JSON matching TRIAGE_OUTPUT_SCHEMA.
+    """
+    resp = await client.responses.create(
+        **_triage_request(messages, temperature, extra_instructions)
+    )
+
+    # Responses API: JSON text is typically in resp.output_text
+    return _parse_triage_json(resp.output_text)
+
+
+class JsonStringFieldStreamer:
+    """
+    Incremental extractor for one top-level string field of a JSON object
+    that arrives in chunks. feed() returns the newly decoded characters of
+    that field's value, so the tenant reply can be shown before the rest of
+    the JSON (category, urgency, ...) has been generated.
+    """
+
+    def __init__(self, field: str):
+        self.field = field
+        self.done = False
+        self._depth = 0
+        self._in_string = False
+        self._string_kind: Optional[str] = None  # "key" | "target" | "other"
+        self._expect_key = False
+        self._key_buf = ""
+        self._last_key: Optional[str] = None
+        self._escape: Optional[str] = None  # raw escape sequence being read
+        self._high_surrogate: Optional[str] = None
+
+    def feed(self, chunk: str) -> str:
+        out: List[str] = []
+        for ch in chunk:
+            if self._in_string:
+                self._string_char(ch, out)
+            else:
+                self._structural_char(ch)
+        return "".join(out)
+
+    def _structural_char(self, ch: str) -> None:
+        if ch in "{[":
+            self._depth += 1
+            self._expect_key = self._depth == 1 and ch == "{"
+        elif ch in "}]":
+            self._depth -= 1
+        elif self._depth != 1:
+            if ch == '"':
+                self._in_string, self._string_kind = True, "other"
+        elif ch == ":":
+            self._expect_key = False
+        elif ch == ",":
+            self._expect_key = True
+            self._last_key = None
+        elif ch == '"':
+            self._in_string = True
+            if self._expect_key:
+                self._string_kind, self._key_buf = "key", ""
+            elif self._last_key == self.field and not self.done:
+                self._string_kind = "target"
+            else:
+                self._string_kind = "other"
+
+    def _string_char(self, ch: str, out: List[str]) -> None:
+        kind = self._string_kind
+        if self._escape is not None:
+            self._escape += ch
+            if self._escape[1] == "u" and len(self._escape) < 6:
+                return
+            decoded = self._decode_escape(self._escape)
+            self._escape = None
+            self._emit(decoded, kind, out)
+        elif ch == "\\":
+            self._escape = ch
+        elif ch == '"':
+            self._in_string = False
+            if kind == "key":
+                self._last_key = self._key_buf
+            elif kind == "target":
+                self.done = True
+        else:
+            self._emit(ch, kind, out)
+
+    def _decode_escape(self, seq: str) -> str:
+        text = json.loads('"' + seq + '"')
+        if "\ud800" <= text <= "\udbff":
+            self._high_surrogate = seq
+            return ""
+        if self._high_surrogate and "\udc00" <= text <= "\udfff":
+            text = json.loads('"' + self._high_surrogate + seq + '"')
+        self._high_surrogate = None
+        return text
+
+    def _emit(self, text: str, kind: Optional[str], out: List[str]) -> None:
+        if kind == "key":
+            self._key_buf += text
+        elif kind == "target":
+            out.append(text)
+
+
+async def stream_turn_json(
+    client: AsyncOpenAI,
+    messages: List[Dict[str, str]],
+    temperature: float = 0.3,
+    extra_instructions: Optional[str] = None,
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Streaming variant of chat_turn_json. Yields ("delta", str) for each new
+    piece of tenant_reply as the model generates it, then exactly one
+    ("turn", TriageTurn) once the full JSON has arrived and validated.
+    """
+    stream = await client.responses.create(
+        stream=True,
+        **_triage_request(messages, temperature, extra_instructions),
+    )
+
+    extractor = JsonStringFieldStreamer("tenant_reply")
+    raw_parts: List[str] = []
+    final_text: Optional[str] = None
+
+    async for event in stream:
+        etype = getattr(event, "type", "")
+        if etype == "response.output_text.delta":
+            raw_parts.append(event.delta)
+            piece = extractor.feed(event.delta)
+            if piece:
+                yield "delta", piece
+        elif etype == "response.completed":
+            final_text = getattr(event.response, "output_text", None)
+        elif etype in ("response.failed", "error"):
+            raise ValueError(f"LLM stream failed: {event}")
+
+    yield "turn", _parse_triage_json(final_text or "".join(raw_parts))
+
 
 async def force_create_ticket(
     client: AsyncOpenAI,
@@ -191,13 +338,15 @@ async def force_create_ticket(
     """
     return await client.responses.create(
         model="gpt-4o-mini",
-        instructions=(
-            SYSTEM_PROMPT
-            + f"\n\nBACKEND OVERRIDE: Ticket required. Reason: {reason}. Urgency: {urgency}.\n"
-              "Call create_ticket now. Output ONLY the tool call."
-        ),
-        input=messages,
-        tools=tool_schema_create_ticket(),
+        instructions=SYSTEM_PROMPT,
+        input=list(messages) + [{
+            "role": "developer",
+            "content": (
+                f"BACKEND OVERRIDE: Ticket required. Reason: {reason}. Urgency: {urgency}.\n"
+                "Call create_ticket now. Output ONLY the tool call."
+            ),
+        }],
+        tools=CREATE_TICKET_TOOLS,
         tool_choice={"type": "function", "name": "create_ticket"},
         temperature=0.2,
     )
@@ -1,15 +1,38 @@
 # app/main.py
+import json
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from openai import AsyncOpenAI
 from supabase import create_client, Client
 
-from .config import OPENAI_API_KEY, SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY
+from .config import (
+    OPENAI_API_KEY,
+    SUPABASE_URL,
+    SUPABASE_SERVICE_ROLE_KEY,
+    SESSION_BACKEND,
+    SESSION_TTL_SECONDS,
+    SESSION_MAX_ENTRIES,
+    SESSION_MAX_MESSAGES,
+)
 from .schemas import ChatRequest, ChatResponse, Message, TriageState
-from .orchestrator import run_triage_turn
+from .orchestrator import run_triage_turn, stream_triage_turn
 from .media import router as media_router
+from .tickets_api import router as tickets_router
+from . import metrics, writebehind
+from .fastpath import hit_ratio as fastpath_hit_ratio
+from .sessions import SessionStore, SupabaseSessionBackend, new_session_id
 
-app = FastAPI(title="PropCare AI API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Flush pending write-behind jobs before the process exits
+    if writebehind.default_queue is not None:
+        await writebehind.default_queue.stop()
+
+app = FastAPI(title="PropCare AI API", lifespan=lifespan)
 
 import os
 
@@ -28,6 +51,12 @@ app.add_middleware(
 
 llm_client = AsyncOpenAI(api_key=OPENAI_API_KEY)
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+session_store = SessionStore(
+    SupabaseSessionBackend(supabase) if SESSION_BACKEND == "supabase" else None,
+    max_entries=SESSION_MAX_ENTRIES,
+    ttl_seconds=SESSION_TTL_SECONDS,
+    max_messages=SESSION_MAX_MESSAGES,
+)
 
 # Inject shared clients for routers/endpoints
 @app.middleware("http")
@@ -36,39 +65,134 @@ async def inject_clients(request: ChatRequest, call_next):
     request.state.llm_client = llm_client
     return await call_next(request)
 
-# Mount media routes (e.g., /upload_media)
+# Mount media routes (e.g., /upload_media) and the manager ticket queue
 app.include_router(media_router)
+app.include_router(tickets_router)
 
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
+@app.get("/metrics")
+def metrics_endpoint():
+    return {
+        "counters": metrics.snapshot(),
+        "fastpath_hit_ratio": fastpath_hit_ratio(),
+    }
+
+def _new_state(request: ChatRequest) -> TriageState:
+    """
+    First turn of a thread (or a legacy client that resends full history).
+    """
+    if request.messages:
+        msgs = request.messages
+    else:
+        if not request.message:
+            raise HTTPException(status_code=400, detail="Provide 'messages' or 'message'.")
+        msgs = (request.history or []) + [Message(role="user", content=request.message)]
+
+    return TriageState(
+        messages=msgs,
+        tenant_name=request.tenant_name,
+        tenant_email=request.tenant_email,
+        tenant_phone=request.tenant_phone,
+        property_address=request.property_address,
+        unit=request.unit,
+    )
+
+
+def _continue_state(state: TriageState, request: ChatRequest) -> TriageState:
+    """
+    Next turn of a stored session: only the new message travels over the wire.
+    Returns a copy so a failed turn leaves the stored session untouched.
+    """
+    if not request.message:
+        raise HTTPException(status_code=400, detail="Provide 'message' when continuing a session.")
+
+    update = {"messages": state.messages + [Message(role="user", content=request.message)]}
+    for field in ("tenant_name", "tenant_email", "tenant_phone", "property_address", "unit"):
+        value = getattr(request, field)
+        if value:
+            update[field] = value
+    return state.model_copy(update=update)
+
+
+async def _load_state(session_id: str, request: ChatRequest) -> TriageState:
+    if not request.session_id:
+        return _new_state(request)
+    stored = await session_store.get(session_id)
+    if stored is None:
+        # Don't silently start a new thread (and ticket) under the client's
+        # feet: they must drop session_id to begin again.
+        raise HTTPException(
+            status_code=404,
+            detail="Session not found or expired. Omit session_id to start a new conversation.",
+        )
+    return _continue_state(stored, request)
+
+
+def _chat_response(session_id: str, state: TriageState) -> ChatResponse:
+    # Return latest assistant message as reply
+    reply = state.messages[-1].content if state.messages else ""
+    return ChatResponse(
+        reply=reply,
+        ticket_created=state.ticket_created,
+        ticket_id=state.ticket_id,
+        session_id=session_id,
+    )
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
 @app.post("/chat", response_model=ChatResponse)
 async def chat_endpoint(request: ChatRequest):
     try:
-        if request.messages:
-            msgs = request.messages
-        else:
-            if not request.message:
-                raise HTTPException(status_code=400, detail="Provide 'messages' or 'message'.")
-            msgs = (request.history or []) + [Message(role="user", content=request.message)]
-
-        state = TriageState(
-            messages=msgs,
-            tenant_name=request.tenant_name,
-            tenant_email=request.tenant_email,
-            tenant_phone=request.tenant_phone,
-            property_address=request.property_address,
-            unit=request.unit,
-        )
-        state = await run_triage_turn(llm_client, supabase, state)
-
-        # Return latest assistant message as reply
-        reply = state.messages[-1].content if state.messages else ""
-        return ChatResponse(
-            reply=reply,
-            ticket_created=state.ticket_created,
-            ticket_id=state.ticket_id,
-        )
+        session_id = request.session_id or new_session_id()
+
+        async with session_store.lock(session_id):
+            state = await _load_state(session_id, request)
+            state = await run_triage_turn(llm_client, supabase, state)
+            await session_store.put(session_id, state)
+
+        return _chat_response(session_id, state)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """
+    Server-Sent Events variant of /chat:
+      event: delta  data: {"text": "..."}   (tenant_reply pieces, as generated)
+      event: done   data: ChatResponse      (after the ticket has been persisted)
+      event: error  data: {"detail": "..."}
+    """
+    if not request.messages and not request.message:
+        raise HTTPException(status_code=400, detail="Provide 'messages' or 'message'.")
+
+    session_id = request.session_id or new_session_id()
+
+    async def events():
+        try:
+            async with session_store.lock(session_id):
+                state = await _load_state(session_id, request)
+                async for kind, value in stream_triage_turn(llm_client, supabase, state):
+                    if kind == "delta":
+                        yield _sse("delta", {"text": value})
+                    else:
+                        state = value
+                await session_store.put(session_id, state)
+
+            yield _sse("done", _chat_response(session_id, state).model_dump())
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            yield _sse("error", {"detail": detail})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
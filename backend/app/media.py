@@ -1,18 +1,31 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import os
 import re
+import tempfile
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from fastapi import APIRouter, Request, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Request, HTTPException, UploadFile, File, Form, Query
+from starlette.concurrency import run_in_threadpool
 
-from .config import IMAGE_VERIFIER_ID, MEDIA_BUCKET, MEDIA_SIGNED_URL_TTL_SECONDS
-from .media_verify import verify_image
+from .config import IMAGE_VERIFIER_ID, MEDIA_BUCKET, MEDIA_VERIFY_MODE
+from .db import execute, run_db
+from .media_cache import verdict_cache
+from .media_derive import ImageDerivative, make_derivative
+from .media_verify import verdict_cacheable, verify_image
+from .pagination import keyset_filter, page
+from .signed_urls import signed_url_cache
+from .tools import aticket_exists
 
 router = APIRouter()
 
 MAX_BYTES = 25 * 1024 * 1024  # 25MB
+CHUNK_BYTES = 1024 * 1024  # read/spool granularity; bounds memory per upload
+VERIFY_MAX_BYTES = 5 * 1024 * 1024  # larger originals (no derivative) are verified by app/worker_media.py
+MAX_PAGE_SIZE = 100
 
 def _media_type_from_mime(mime: str) -> str:
     if mime.startswith("image/"):
@@ -22,26 +35,12 @@ def _media_type_from_mime(mime: str) -> str:
     return "unknown"
 
 
-def _signed_url(supabase, bucket: str, path: str, ttl: int) -> Optional[str]:
-    try:
-        r = supabase.storage.from_(bucket).create_signed_url(path, ttl)
-    except Exception:
-        return None
-
-    # supabase-py versions vary
-    if isinstance(r, dict):
-        return r.get("signedURL") or r.get("signed_url") or r.get("signedUrl") or r.get("url")
-    data = getattr(r, "data", None)
-    if isinstance(data, dict):
-        return data.get("signedURL") or data.get("signed_url") or data.get("signedUrl") or data.get("url")
-    return None
-
-
 @router.post("/upload_media")
 async def upload_media(
     request: Request,
     ticket_id: int = Form(...),
     issue_context: str = Form(""),
+    verify_mode: str = Form(""),  # "inline" | "async"; default MEDIA_VERIFY_MODE
     file: UploadFile = File(...),
 ):
     print("UPLOAD_MEDIA hit:", {"ticket_id": ticket_id, "filename": file.filename, "mime": file.content_type})
@@ -51,102 +50,422 @@ async def upload_media(
     if supabase is None or llm_client is None:
         raise HTTPException(500, "Server misconfigured")
 
+    mime = file.content_type or ""
+    mtype = _media_type_from_mime(mime)
+    if mtype == "unknown":
+        raise HTTPException(400, f"Unsupported content type: {mime}")
+
+    verify_mode = verify_mode or MEDIA_VERIFY_MODE
+    if verify_mode not in ("inline", "async"):
+        raise HTTPException(400, f"Unsupported verify_mode: {verify_mode}")
+
+    # Ticket lookup runs while the body is streamed to a temp file in
+    # CHUNK_BYTES pieces (never holding the whole upload); both must pass
+    # before anything is written to storage.
+    ticket_check = asyncio.ensure_future(_require_ticket(supabase, ticket_id))
+    try:
+        spool_path, byte_size, content_sha256 = await _spool_upload(file)
+    except BaseException:
+        _abandon(ticket_check)
+        raise
+    try:
+        await ticket_check
+        # Same bytes already on this ticket: no storage write, no model call
+        existing = await _find_duplicate(supabase, ticket_id, content_sha256)
+        if existing is not None:
+            return await _duplicate_response(supabase, existing)
+        return await _store_and_record(
+            supabase,
+            llm_client,
+            ticket_id=ticket_id,
+            issue_context=issue_context,
+            filename=file.filename,
+            mime=mime,
+            mtype=mtype,
+            spool_path=spool_path,
+            byte_size=byte_size,
+            content_sha256=content_sha256,
+            async_verify=verify_mode == "async",
+        )
+    finally:
+        _discard(spool_path)
+
+
+async def _require_ticket(supabase, ticket_id: int) -> None:
     # Ensure ticket exists (avoid FK failure / orphan storage)
     try:
-        t = supabase.table("tickets").select("id").eq("id", ticket_id).limit(1).execute()
-        if not t.data:
+        if not await aticket_exists(supabase, ticket_id):
             raise HTTPException(404, f"Ticket not found: {ticket_id}")
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(500, f"Ticket lookup failed: {e}")
 
-    mime = file.content_type or ""
-    mtype = _media_type_from_mime(mime)
-    if mtype == "unknown":
-        raise HTTPException(400, f"Unsupported content type: {mime}")
 
-    data = await file.read()
-    if not data:
-        raise HTTPException(400, "Empty upload")
-    if len(data) > MAX_BYTES:
-        raise HTTPException(400, f"File too large (>{MAX_BYTES} bytes)")
+def _abandon(task: asyncio.Future) -> None:
+    task.cancel()
+    # mark any exception as retrieved so asyncio doesn't log it
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
 
-    # Store in Supabase Storage (private bucket)
-    ts = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
-    safe_name = re.sub(r"[^a-zA-Z0-9._-]+", "_", file.filename or "upload")[:120]
-    path = f"tickets/{ticket_id}/{ts}_{safe_name}"
 
+async def _spool_upload(file: UploadFile) -> Tuple[str, int, str]:
+    """
+    Copies the upload to a temp file chunk by chunk, enforcing MAX_BYTES and
+    hashing as it goes. Returns (path, size, sha256 hex); the caller removes
+    the file.
+    """
+    spool = tempfile.NamedTemporaryFile(prefix="upload_", delete=False)
+    digest = hashlib.sha256()
+    size = 0
     try:
-        resp = supabase.storage.from_(MEDIA_BUCKET).upload(
+        while True:
+            chunk = await file.read(CHUNK_BYTES)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > MAX_BYTES:
+                raise HTTPException(400, f"File too large (>{MAX_BYTES} bytes)")
+            digest.update(chunk)
+            await run_in_threadpool(spool.write, chunk)
+        if size == 0:
+            raise HTTPException(400, "Empty upload")
+    except BaseException:
+        spool.close()
+        _discard(spool.name)
+        raise
+    spool.close()
+    return spool.name, size, digest.hexdigest()
+
+
+_MEDIA_COLUMNS = "id,ticket_id,media_type,storage_path,thumbnail_path,verification_status,is_valid,invalid_reason"
+
+
+async def _find_duplicate(supabase, ticket_id: int, content_sha256: str) -> Optional[Dict[str, Any]]:
+    try:
+        res = await execute(
+            supabase.table("ticket_media")
+            .select(_MEDIA_COLUMNS)
+            .eq("ticket_id", ticket_id)
+            .eq("content_sha256", content_sha256)
+            .limit(1)
+        )
+    except Exception as e:
+        # dedupe is an optimization; fall through to a normal upload
+        print(f"[media] duplicate lookup failed: {e}")
+        return None
+    return res.data[0] if res.data else None
+
+
+async def _remove_objects(supabase, paths: List[str]) -> None:
+    if not paths:
+        return
+    signed_url_cache.invalidate(MEDIA_BUCKET, paths)
+    try:
+        await run_db(supabase.storage.from_(MEDIA_BUCKET).remove, paths)
+    except Exception as e:
+        print(f"[media] could not remove orphan objects {paths}: {e}")
+
+
+async def _duplicate_response(supabase, row: Dict[str, Any]) -> Dict[str, Any]:
+    urls = await signed_url_cache.get_many(supabase, MEDIA_BUCKET, [row["storage_path"], row.get("thumbnail_path")])
+    return {
+        "ok": True,
+        "media_id": row["id"],
+        "is_valid": row.get("is_valid"),
+        "reason": row.get("invalid_reason"),
+        "verification_status": row.get("verification_status"),
+        "storage_path": row["storage_path"],
+        "signed_url": urls[row["storage_path"]],
+        "thumbnail_url": urls.get(row.get("thumbnail_path")),
+        "media_type": row.get("media_type"),
+        "duplicate": True,
+    }
+
+
+def _discard(path: str) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def _upload_file(supabase, bucket: str, path: str, spool_path: str, mime: str):
+    # storage3 hands the open file to httpx, which streams it in chunks
+    with open(spool_path, "rb") as f:
+        return supabase.storage.from_(bucket).upload(
             path,
-            data,
+            f,
             file_options={"content-type": mime, "upsert": False},
         )
-        # best-effort detect error payloads
-        if isinstance(resp, dict) and resp.get("error"):
-            raise Exception(resp["error"])
-    except Exception as e:
-        raise HTTPException(500, f"Storage upload failed: {e}")
 
-    # Verify images only (basic MVP). Videos can be "accepted" without verification for now.
-    is_valid: Optional[bool] = None
-    reason: Optional[str] = None
-    verifier = None
-    verified_at = None
 
+def _upload_bytes(supabase, bucket: str, path: str, data: bytes, mime: str):
+    return supabase.storage.from_(bucket).upload(
+        path,
+        data,
+        file_options={"content-type": mime, "upsert": False},
+    )
+
+
+def _read_for_verification(spool_path: str) -> bytes:
+    """
+    Original bytes for the verifier when no derivative could be made
+    (callers keep this under VERIFY_MAX_BYTES).
+    """
+    with open(spool_path, "rb") as f:
+        return f.read()
+
+
+def verdict_fields(verdict: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    ticket_media columns for a verify_image() result (shared with app/worker_media.py).
+    """
+    return {
+        "is_valid": bool(verdict.get("is_valid")),
+        "invalid_reason": (verdict.get("reason") or "")[:500],
+        "verifier": IMAGE_VERIFIER_ID,
+        "verified_at": datetime.now(timezone.utc).isoformat(),
+        "verification_status": "verified",
+    }
+
+
+def verification_error_fields(err: Exception) -> Dict[str, Any]:
+    return {
+        "is_valid": None,
+        "invalid_reason": f"verification_error: {str(err)[:450]}",
+        "verifier": IMAGE_VERIFIER_ID,
+        "verified_at": None,
+        "verification_status": "error",
+    }
+
+
+async def _store_and_record(
+    supabase,
+    llm_client,
+    *,
+    ticket_id: int,
+    issue_context: str,
+    filename: Optional[str],
+    mime: str,
+    mtype: str,
+    spool_path: str,
+    byte_size: int,
+    content_sha256: Optional[str] = None,
+    async_verify: bool = False,
+):
+    # Store in Supabase Storage (private bucket)
+    ts = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    safe_name = re.sub(r"[^a-zA-Z0-9._-]+", "_", filename or "upload")[:120]
+    path = f"tickets/{ticket_id}/{ts}_{safe_name}"
+    thumb = f"tickets/{ticket_id}/thumbs/{os.path.splitext(f'{ts}_{safe_name}')[0]}.jpg"
+
+    # Stage 1, concurrently: original -> storage | derivative -> (thumbnail -> storage | verification).
+    # Only objects this request actually wrote are rolled back.
+    stored: List[str] = []
+
+    # Downscaled JPEG: what the verifier sees, and the UI thumbnail
+    derive: Optional[asyncio.Future] = None
     if mtype == "image":
+        derive = asyncio.ensure_future(run_in_threadpool(make_derivative, spool_path))
+
+    async def store_original() -> None:
+        try:
+            resp = await run_db(_upload_file, supabase, MEDIA_BUCKET, path, spool_path, mime)
+            # best-effort detect error payloads
+            if isinstance(resp, dict) and resp.get("error"):
+                raise Exception(resp["error"])
+        except Exception as e:
+            raise HTTPException(500, f"Storage upload failed: {e}")
+        stored.append(path)
+
+    async def store_thumbnail() -> Optional[str]:
+        derivative: Optional[ImageDerivative] = await derive if derive else None
+        if derivative is None:
+            return None
+        try:
+            await run_db(_upload_bytes, supabase, MEDIA_BUCKET, thumb, derivative.data, derivative.mime_type)
+        except Exception as e:
+            # the thumbnail is a convenience; the upload succeeds without it
+            print(f"[media] thumbnail upload failed for {path}: {e}")
+            return None
+        stored.append(thumb)
+        return thumb
+
+    async def verify() -> Dict[str, Any]:
+        # Verify images only (basic MVP). Videos can be "accepted" without verification for now.
+        fields: Dict[str, Any] = {
+            "is_valid": None,
+            "invalid_reason": None,
+            "verifier": None,
+            "verified_at": None,
+            "verification_status": "skipped",
+        }
+        if mtype != "image":
+            return fields
+
+        if content_sha256:
+            cached = await verdict_cache.get(supabase, content_sha256, issue_context)
+            if cached is not None:
+                return verdict_fields(cached)
+
+        derivative: Optional[ImageDerivative] = await derive
+        # No derivative (Pillow can't decode it, e.g. HEIC) and too big to
+        # base64 inline: hand it to the worker rather than skip verification.
+        if async_verify or (derivative is None and byte_size > VERIFY_MAX_BYTES):
+            # the insert trigger queues a media_verify_jobs row (app/worker_media.py)
+            fields["verification_status"] = "pending"
+            return fields
+
+        if derivative is not None:
+            image_bytes, image_mime = derivative.data, derivative.mime_type
+        else:
+            image_bytes = await run_in_threadpool(_read_for_verification, spool_path)
+            image_mime = mime
         try:
             verdict = await verify_image(
                 llm_client,
                 issue_context=issue_context,
-                image_bytes=data,
-                mime_type=mime,
+                image_bytes=image_bytes,
+                mime_type=image_mime,
             )
-            is_valid = bool(verdict.get("is_valid"))
-            reason = (verdict.get("reason") or "")[:500]
-            verifier = IMAGE_VERIFIER_ID
-            verified_at = datetime.now(timezone.utc).isoformat()
         except Exception as e:
-            is_valid = None
-            reason = f"verification_error: {str(e)[:450]}"
-            verifier = IMAGE_VERIFIER_ID
-            verified_at = None
+            return verification_error_fields(e)
+        if content_sha256 and verdict_cacheable(verdict):
+            await verdict_cache.put(supabase, content_sha256, issue_context, verdict)
+        return verdict_fields(verdict)
 
-    # Insert DB row
+    stages = [asyncio.ensure_future(c) for c in (store_original(), store_thumbnail(), verify())]
+    done, _ = await asyncio.wait(stages, return_when=asyncio.FIRST_EXCEPTION)
+    failure = next((t.exception() for t in done if not t.cancelled() and t.exception()), None)
+    if failure is not None:
+        # Don't wait for (or pay for) the model call once the upload is doomed.
+        # Storage writes run in worker threads and can't be interrupted, so let
+        # them settle before rolling back whatever they wrote.
+        stages[2].cancel()
+        await asyncio.gather(*stages, return_exceptions=True)
+        await _remove_objects(supabase, stored)
+        if isinstance(failure, HTTPException):
+            raise failure
+        raise HTTPException(500, f"Upload failed: {failure}")
+    _, thumbnail_path, fields = (t.result() for t in stages)
+
+    # Stage 2, concurrently: DB row | signed URLs. Signing only needs the
+    # storage object, not the row; the URLs are dropped if the insert fails.
     row = {
         "ticket_id": ticket_id,
         "media_type": mtype,
         "storage_bucket": MEDIA_BUCKET,
         "storage_path": path,
+        "thumbnail_path": thumbnail_path,
         "mime_type": mime,
-        "byte_size": len(data),
-        "original_filename": file.filename,
-        "is_valid": is_valid,
-        "invalid_reason": reason,
-        "verifier": verifier,
-        "verified_at": verified_at,
+        "byte_size": byte_size,
+        "original_filename": filename,
+        "issue_context": issue_context or None,
+        "content_sha256": content_sha256,
+        **fields,
     }
 
-    try:
-        res = supabase.table("ticket_media").insert(row).execute()
-        media_row = res.data[0] if res.data else None
-    except Exception as e:
+    res, urls = await asyncio.gather(
+        execute(supabase.table("ticket_media").insert(row)),
+        signed_url_cache.get_many(supabase, MEDIA_BUCKET, [path, thumbnail_path]),
+        return_exceptions=True,
+    )
+    if isinstance(res, BaseException):
         # cleanup to avoid orphan storage objects
-        try:
-            supabase.storage.from_(MEDIA_BUCKET).remove([path])
-        except Exception:
-            pass
-        raise HTTPException(500, f"DB insert failed: {e}")
-
-    signed_url = _signed_url(supabase, MEDIA_BUCKET, path, MEDIA_SIGNED_URL_TTL_SECONDS)
+        await _remove_objects(supabase, stored)
+        # lost a race with an identical concurrent upload (uq_ticket_media_ticket_content)
+        if content_sha256 and ("duplicate" in str(res).lower() or "23505" in str(res)):
+            existing = await _find_duplicate(supabase, ticket_id, content_sha256)
+            if existing is not None:
+                return await _duplicate_response(supabase, existing)
+        raise HTTPException(500, f"DB insert failed: {res}")
+    media_row = res.data[0] if res.data else None
+    if isinstance(urls, BaseException):
+        urls = {}
 
     return {
         "ok": True,
         "media_id": media_row["id"] if media_row else None,
-        "is_valid": is_valid,
-        "reason": reason,
+        "is_valid": fields["is_valid"],
+        "reason": fields["invalid_reason"],
+        "verification_status": fields["verification_status"],
         "storage_path": path,
-        "signed_url": signed_url,   # ✅ frontend can now display the image
+        "signed_url": urls.get(path),   # ✅ frontend can now display the image
+        "thumbnail_url": urls.get(thumbnail_path),
         "media_type": mtype,
+        "duplicate": False,
     }
+
+
+@router.get("/media/{media_id}")
+async def get_media(request: Request, media_id: str):
+    """
+    Verification status for one upload (poll after verify_mode=async).
+    """
+    supabase = request.state.supabase
+    if supabase is None:
+        raise HTTPException(500, "Server misconfigured")
+
+    try:
+        res = await execute(
+            supabase.table("ticket_media")
+            .select("id,ticket_id,media_type,verification_status,is_valid,invalid_reason,verified_at")
+            .eq("id", media_id)
+            .limit(1)
+        )
+    except Exception as e:
+        raise HTTPException(500, f"Media lookup failed: {e}")
+    if not res.data:
+        raise HTTPException(404, f"Media not found: {media_id}")
+    return res.data[0]
+
+
+_LIST_COLUMNS = (
+    "id,created_at,media_type,mime_type,byte_size,original_filename,"
+    "storage_path,thumbnail_path,verification_status,is_valid,invalid_reason,verified_at"
+)
+
+
+@router.get("/tickets/{ticket_id}/media")
+async def list_ticket_media(
+    request: Request,
+    ticket_id: int,
+    limit: int = Query(30, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
+    """
+    Newest first, keyset-paginated on (created_at desc, id desc). Pass the
+    returned next_cursor to get the following page. URLs for every item and
+    thumbnail on the page come from one (cached) batch sign call.
+    """
+    supabase = request.state.supabase
+    if supabase is None:
+        raise HTTPException(500, "Server misconfigured")
+
+    q = (
+        supabase.table("ticket_media")
+        .select(_LIST_COLUMNS)
+        .eq("ticket_id", ticket_id)
+    )
+    if cursor:
+        q = keyset_filter(q, "created_at", cursor)
+    q = q.order("created_at", desc=True).order("id", desc=True).limit(limit + 1)
+
+    try:
+        res, _ = await asyncio.gather(execute(q), _require_ticket(supabase, ticket_id))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(500, f"Media listing failed: {e}")
+
+    items, next_cursor = page(res.data or [], limit, "created_at")
+    urls = await signed_url_cache.get_many(
+        supabase,
+        MEDIA_BUCKET,
+        [p for it in items for p in (it["storage_path"], it.get("thumbnail_path"))],
+    )
+    for it in items:
+        it["signed_url"] = urls.get(it["storage_path"])
+        it["thumbnail_url"] = urls.get(it.get("thumbnail_path"))
+
+    return {"items": items, "next_cursor": next_cursor}
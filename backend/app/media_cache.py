@@ -0,0 +1,107 @@
+# app/media_cache.py
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from supabase import Client
+
+from .config import IMAGE_VERIFIER_ID, MEDIA_VERDICT_CACHE_MAX_ENTRIES
+from .db import run_db
+
+Verdict = Dict[str, Any]  # {"is_valid": bool, "reason": str}, as returned by verify_image
+
+
+def context_digest(issue_context: str) -> str:
+    """
+    SHA-256 of the issue context with case and whitespace normalized, so
+    trivially different wordings of the same context share a verdict.
+    """
+    norm = " ".join((issue_context or "").lower().split())
+    return hashlib.sha256(norm.encode("utf-8")).hexdigest()
+
+
+class VerdictCache:
+    """
+    verify_image() results keyed by (content_sha256, context digest, verifier).
+
+    An in-process LRU sits in front of public.media_verdict_cache
+    (migrations/012_add_media_content_hash.sql), which is shared by every
+    API process and the media worker. Changing the verifier model changes
+    the key, so old verdicts are simply not reused.
+    """
+
+    def __init__(self, *, max_entries: int = 10_000, verifier: str = IMAGE_VERIFIER_ID, table: str = "media_verdict_cache"):
+        self.max_entries = max_entries
+        self.verifier = verifier
+        self.table = table
+        self._lru: "OrderedDict[Tuple[str, str], Verdict]" = OrderedDict()
+
+    async def get(self, supabase: Optional[Client], content_sha256: str, issue_context: str) -> Optional[Verdict]:
+        key = (content_sha256, context_digest(issue_context))
+        hit = self._lru.get(key)
+        if hit is not None:
+            self._lru.move_to_end(key)
+            return hit
+        if supabase is None:
+            return None
+        try:
+            verdict = await run_db(self._load, supabase, *key)
+        except Exception as e:
+            print(f"[media] verdict cache lookup failed: {e}")
+            return None
+        if verdict is not None:
+            self._remember(key, verdict)
+        return verdict
+
+    async def put(self, supabase: Optional[Client], content_sha256: str, issue_context: str, verdict: Verdict) -> None:
+        key = (content_sha256, context_digest(issue_context))
+        verdict = {"is_valid": bool(verdict.get("is_valid")), "reason": verdict.get("reason") or ""}
+        self._remember(key, verdict)
+        if supabase is None:
+            return
+        try:
+            await run_db(self._save, supabase, *key, verdict)
+        except Exception as e:
+            # best-effort: the verdict is already on the ticket_media row
+            print(f"[media] verdict cache write failed: {e}")
+
+    def clear(self) -> None:
+        self._lru.clear()
+
+    def _load(self, supabase: Client, content_sha256: str, digest: str) -> Optional[Verdict]:
+        res = (
+            supabase.table(self.table)
+            .select("is_valid,reason")
+            .eq("content_sha256", content_sha256)
+            .eq("context_digest", digest)
+            .eq("verifier", self.verifier)
+            .limit(1)
+            .execute()
+        )
+        return res.data[0] if res.data else None
+
+    def _save(self, supabase: Client, content_sha256: str, digest: str, verdict: Verdict) -> None:
+        supabase.table(self.table).upsert(
+            {
+                "content_sha256": content_sha256,
+                "context_digest": digest,
+                "verifier": self.verifier,
+                "is_valid": verdict["is_valid"],
+                "reason": verdict["reason"],
+                "created_at": datetime.now(timezone.utc).isoformat(),
+            },
+            on_conflict="content_sha256,context_digest,verifier",
+        ).execute()
+
+    def _remember(self, key: Tuple[str, str], verdict: Verdict) -> None:
+        self._lru[key] = verdict
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+
+# Process-wide cache shared by upload_media and the media worker.
+verdict_cache = VerdictCache(max_entries=MEDIA_VERDICT_CACHE_MAX_ENTRIES)
@@ -0,0 +1,58 @@
+# app/media_derive.py
+from __future__ import annotations
+
+import io
+from dataclasses import dataclass
+from typing import Optional
+
+from .config import MEDIA_DERIVATIVE_MAX_EDGE, MEDIA_DERIVATIVE_QUALITY
+
+try:
+    from PIL import Image, ImageOps  # optional dependency
+except ImportError:  # pragma: no cover - exercised only without Pillow
+    Image = ImageOps = None
+
+DERIVATIVE_MIME = "image/jpeg"
+
+
+@dataclass(frozen=True)
+class ImageDerivative:
+    data: bytes
+    width: int
+    height: int
+    mime_type: str = DERIVATIVE_MIME
+
+
+def derivatives_available() -> bool:
+    return Image is not None
+
+
+def make_derivative(
+    source,
+    *,
+    max_edge: int = MEDIA_DERIVATIVE_MAX_EDGE,
+    quality: int = MEDIA_DERIVATIVE_QUALITY,
+) -> Optional[ImageDerivative]:
+    """
+    Decodes `source` (path or binary file), applies the EXIF orientation,
+    fits it within max_edge x max_edge and re-encodes it as JPEG.
+
+    For JPEG sources draft() lets the decoder scale by 1/2..1/8 while
+    decoding, so a 12MP photo is never fully materialized. Returns None
+    when Pillow is missing or the format can't be decoded (e.g. HEIC).
+    """
+    if Image is None:
+        return None
+    try:
+        with Image.open(source) as img:
+            img.draft("RGB", (max_edge, max_edge))
+            img = ImageOps.exif_transpose(img)
+            if img.mode != "RGB":
+                img = img.convert("RGB")
+            img.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+            out = io.BytesIO()
+            img.save(out, "JPEG", quality=quality)
+            return ImageDerivative(data=out.getvalue(), width=img.width, height=img.height)
+    except Exception as e:
+        print(f"[media] derivative failed, falling back to original: {e}")
+        return None
@@ -44,7 +44,9 @@ async def verify_image(
 ) -> Dict[str, str | bool]:
     """
     MVP image relevance check.
-    Returns: {"is_valid": bool, "reason": str}
+    Returns: {"is_valid": bool, "reason": str, "parsed": bool}
+    parsed=False marks the fallback for an unparseable model reply: report
+    it, but never cache it (see verdict_cacheable).
     Compatible with older SDKs (no response_format kwarg).
     """
     data_url = _to_data_url(image_bytes, mime_type)
@@ -94,6 +96,15 @@ async def verify_image(
         return {
             "is_valid": bool(obj.get("is_valid")),
             "reason": str(obj.get("reason") or "")[:500],
+            "parsed": True,
         }
     except Exception:
-        return {"is_valid": False, "reason": "Verifier did not return valid JSON."}
+        return {"is_valid": False, "reason": "Verifier did not return valid JSON.", "parsed": False}
+
+
+def verdict_cacheable(verdict: Dict[str, str | bool]) -> bool:
+    """
+    Only real model verdicts may be reused for other uploads of the same
+    bytes; a one-off bad reply must not mark the content invalid for good.
+    """
+    return verdict.get("parsed", True) is not False
@@ -0,0 +1,35 @@
+# app/metrics.py
+from __future__ import annotations
+
+import threading
+from collections import defaultdict
+from typing import Dict
+
+# Minimal in-process counters (per worker process), exposed via GET /metrics.
+_lock = threading.Lock()
+_counters: Dict[str, int] = defaultdict(int)
+
+
+def incr(name: str, n: int = 1) -> None:
+    with _lock:
+        _counters[name] += n
+
+
+def get(name: str) -> int:
+    with _lock:
+        return _counters.get(name, 0)
+
+
+def ratio(hits: str, misses: str) -> float:
+    h, m = get(hits), get(misses)
+    return h / (h + m) if (h + m) else 0.0
+
+
+def snapshot() -> Dict[str, int]:
+    with _lock:
+        return dict(_counters)
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
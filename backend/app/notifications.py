@@ -1,31 +1,43 @@
 # app/notifications.py
 from __future__ import annotations
 
+from collections import OrderedDict
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, List, Optional
 
 from supabase import Client
 from .config import NOTIFICATION_EMAIL
+from .db import run_db
 
 
 def utc_now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
-def enqueue_notification(
-    supabase: Client,
+# Dedupe keys this process has already written (or found present). Repeat
+# events from chatty tickets skip the round trip entirely; the unique index
+# on dedupe_key stays the source of truth across processes.
+_KNOWN_KEYS_MAX = 10_000
+_known_keys: "OrderedDict[str, None]" = OrderedDict()
+
+
+def _remember_keys(keys: Iterable[str]) -> None:
+    for k in keys:
+        _known_keys[k] = None
+        _known_keys.move_to_end(k)
+    while len(_known_keys) > _KNOWN_KEYS_MAX:
+        _known_keys.popitem(last=False)
+
+
+def outbox_row(
     *,
     event_type: str,
     ticket_id: int,
     to_email: str,
     payload: Dict[str, Any],
     dedupe_key: str,
-) -> None:
-    """
-    Inserts a row into notification_outbox.
-    Assumes notification_outbox has a unique constraint on dedupe_key.
-    """
-    row = {
+) -> Dict[str, Any]:
+    return {
         "event_type": event_type,
         "ticket_id": int(ticket_id),
         "dedupe_key": dedupe_key,
@@ -36,14 +48,51 @@ def enqueue_notification(
         "next_attempt_at": utc_now_iso(),
     }
 
-    try:
-        supabase.table("notification_outbox").insert(row).execute()
-    except Exception as e:
-        msg = str(e).lower()
-        # Ignore dedupe collisions (idempotent behavior)
-        if "duplicate" in msg or "unique" in msg:
-            return
-        raise
+
+def enqueue_many(supabase: Client, rows: List[Dict[str, Any]]) -> List[str]:
+    """
+    Writes outbox rows (see outbox_row) in one INSERT ... ON CONFLICT
+    (dedupe_key) DO NOTHING. Returns the dedupe keys that were actually
+    inserted; keys that already existed are skipped without an error.
+    """
+    fresh: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        key = row["dedupe_key"]
+        if key not in _known_keys and key not in fresh:
+            fresh[key] = row
+    if not fresh:
+        return []
+
+    res = (
+        supabase.table("notification_outbox")
+        .upsert(list(fresh.values()), on_conflict="dedupe_key", ignore_duplicates=True)
+        .execute()
+    )
+    _remember_keys(fresh)
+    return [r["dedupe_key"] for r in (res.data or [])]
+
+
+def enqueue_notification(
+    supabase: Client,
+    *,
+    event_type: str,
+    ticket_id: int,
+    to_email: str,
+    payload: Dict[str, Any],
+    dedupe_key: str,
+) -> bool:
+    """
+    Inserts a row into notification_outbox unless dedupe_key already exists
+    (unique index, migration 015). Returns True if a row was inserted.
+    """
+    row = outbox_row(
+        event_type=event_type,
+        ticket_id=ticket_id,
+        to_email=to_email,
+        payload=payload,
+        dedupe_key=dedupe_key,
+    )
+    return bool(enqueue_many(supabase, [row]))
 
 
 def enqueue_ticket_event(
@@ -53,12 +102,13 @@ def enqueue_ticket_event(
     ticket: Dict[str, Any],
     to_email: Optional[str] = None,
     dedupe_suffix: Optional[str] = None,
-) -> None:
+) -> bool:
     """
     Convenience wrapper for ticket-related events. Keeps payload shape consistent.
+    Returns True if a new outbox row was written.
     """
     if not (to_email or NOTIFICATION_EMAIL):
-        return
+        return False
 
     to_email_final = to_email or NOTIFICATION_EMAIL
     ticket_id = int(ticket["id"])
@@ -86,7 +136,7 @@ def enqueue_ticket_event(
         }
     }
 
-    enqueue_notification(
+    return enqueue_notification(
         supabase,
         event_type=event_type,
         ticket_id=ticket_id,
@@ -94,3 +144,10 @@ def enqueue_ticket_event(
         payload=payload,
         dedupe_key=dedupe_key,
     )
+
+
+async def aenqueue_ticket_event(supabase: Client, **kwargs: Any) -> bool:
+    """
+    Async variant of enqueue_ticket_event (runs in the bounded I/O pool).
+    """
+    return await run_db(enqueue_ticket_event, supabase, **kwargs)
@@ -1,16 +1,21 @@
 # app/orchestrator.py
 from __future__ import annotations
 
-from typing import Dict, List
-from datetime import datetime, timezone
+import asyncio
+import functools
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from openai import AsyncOpenAI
 from supabase import Client
 
 from .schemas import Message, TriageState, TriageTurn
-from .tools import create_ticket_record, update_ticket_record
-from .notifications import enqueue_ticket_event
-from .llm import chat_turn_json
+from .tools import acreate_ticket_record, aupdate_ticket_record, aappend_ticket_event
+from .notifications import aenqueue_ticket_event
+from . import writebehind
+from .config import FASTPATH_ENABLED
+from .fastpath import fast_path_turn
+from .llm import chat_turn_json, stream_turn_json
 from .policy import detect_emergency
 
 def _to_openai_messages(msgs: List[Message], keep_last: int = 12) -> List[Dict[str, str]]:
@@ -30,15 +35,49 @@ URGENCY_MAP = {
     "P3": "P3_ROUTINE",
 }
 
-def _append_detail(prev: str | None, line: str) -> str:
-    base = (prev or "").strip()
-    if not base:
-        return line
-    return base + "\n" + line
+def _context_instructions(
+    state: TriageState,
+    ticket_id: int,
+    is_emergency: bool,
+    emergency_type: Optional[str],
+) -> str:
+    extra = (
+        "CONTEXT (not tenant-facing):\n"
+        f"- Tenant name: {state.tenant_name or ''}\n"
+        f"- Tenant email: {state.tenant_email or ''}\n"
+        f"- Tenant phone: {state.tenant_phone or ''}\n"
+        f"- Property address: {state.property_address or ''}\n"
+        f"- Unit: {state.unit or ''}\n"
+        f"- Ticket id: {ticket_id}\n"
+    )
 
-async def run_triage_turn(llm_client: AsyncOpenAI, supabase: Client, state: TriageState) -> TriageState:
+    if is_emergency:
+        extra += (
+            "\nBACKEND:\n"
+            f"- emergency=true\n"
+            f"- emergency_type={emergency_type}\n"
+            "RULES:\n"
+            "- Enter EMERGENCY MODE: give brief BC safety guidance, stop troubleshooting, ask exactly ONE safety confirmation question.\n"
+            "- If gas-related, mention FortisBC Emergency Line 1-800-663-9911 (call from outside, once safe).\n"
+            "- Set status=action_required and should_notify_manager=true.\n"
+        )
+    return extra
+
+@dataclass
+class _TurnContext:
+    latest_text: str
+    openai_msgs: List[Dict[str, str]]
+    ticket_id: int
+    is_emergency: bool
+    emergency_type: Optional[str]
+    emergency_reason: str
+
+    @property
+    def temperature(self) -> float:
+        return 0.2 if self.is_emergency else 0.3
+
+async def _prepare_turn(supabase: Client, state: TriageState) -> _TurnContext:
     msgs = state.messages
-    openai_msgs = _to_openai_messages(msgs)
     latest_text = _latest_user_text(msgs)
 
     # 0) Deterministic P0 detection (latest user message only)
@@ -48,7 +87,7 @@ async def run_triage_turn(llm_client: AsyncOpenAI, supabase: Client, state: Tria
     if not state.ticket_id:
         # Create an "intake" ticket immediately (supports "always log")
         init_summary = f"Tenant report: {latest_text}".strip()[:5000]
-        ticket = create_ticket_record(
+        ticket = await acreate_ticket_record(
             supabase,
             summary=init_summary,
             urgency=URGENCY_MAP["P2"],   # default; may be overridden after LLM output
@@ -65,38 +104,52 @@ async def run_triage_turn(llm_client: AsyncOpenAI, supabase: Client, state: Tria
 
         # Optional: only if you actually want an email on ticket creation.
         # Most teams do NOT email on creation; they email when action_required.
-        # enqueue_ticket_event(supabase, event_type="ticket.created", ticket=ticket)
+        # await aenqueue_ticket_event(supabase, event_type="ticket.created", ticket=ticket)
 
-    ticket_id = int(state.ticket_id)
+    return _TurnContext(
+        latest_text=latest_text,
+        openai_msgs=_to_openai_messages(msgs),
+        ticket_id=int(state.ticket_id),
+        is_emergency=is_emergency,
+        emergency_type=emergency_type,
+        emergency_reason=emergency_reason,
+    )
 
-    # 2) Call LLM ALWAYS (even emergency) to produce tenant-facing text + structured fields
-    extra = (
-        "CONTEXT (not tenant-facing):\n"
-        f"- Tenant name: {state.tenant_name or ''}\n"
-        f"- Tenant email: {state.tenant_email or ''}\n"
-        f"- Tenant phone: {state.tenant_phone or ''}\n"
-        f"- Property address: {state.property_address or ''}\n"
-        f"- Unit: {state.unit or ''}\n"
-        f"- Ticket id: {ticket_id}\n"
+async def _llm_turn(llm_client: AsyncOpenAI, state: TriageState, ctx: _TurnContext) -> TriageTurn:
+    return await chat_turn_json(
+        llm_client,
+        ctx.openai_msgs,
+        temperature=ctx.temperature,
+        extra_instructions=_context_instructions(state, ctx.ticket_id, ctx.is_emergency, ctx.emergency_type),
     )
 
-    if is_emergency:
-        extra += (
-            "\nBACKEND:\n"
-            f"- emergency=true\n"
-            f"- emergency_type={emergency_type}\n"
-            "RULES:\n"
-            "- Enter EMERGENCY MODE: give brief BC safety guidance, stop troubleshooting, ask exactly ONE safety confirmation question.\n"
-            "- If gas-related, mention FortisBC Emergency Line 1-800-663-9911 (call from outside, once safe).\n"
-            "- Set status=action_required and should_notify_manager=true.\n"
+async def _update_and_notify(
+    supabase: Client,
+    *,
+    ticket_id: int,
+    patch: Dict[str, Any],
+    notify_event: Optional[str],
+) -> None:
+    ticket = await aupdate_ticket_record(supabase, ticket_id=ticket_id, **patch)
+    if notify_event:
+        await aenqueue_ticket_event(
+            supabase,
+            event_type=notify_event,
+            ticket=ticket,
+            # later: to_email=resolved_by_property_mapping(...)
+            # For now uses NOTIFICATION_EMAIL from config
         )
 
-    turn = await chat_turn_json(
-        llm_client,
-        openai_msgs,
-        temperature=0.2 if is_emergency else 0.3,
-        extra_instructions=extra,
-    )
+async def _finalize_turn(
+    supabase: Client,
+    state: TriageState,
+    ctx: _TurnContext,
+    turn: TriageTurn,
+) -> TriageState:
+    latest_text = ctx.latest_text
+    ticket_id = ctx.ticket_id
+    is_emergency = ctx.is_emergency
+    emergency_type = ctx.emergency_type
 
     print("DEBUG TriageTurn:", turn)
 
@@ -113,43 +166,100 @@ async def run_triage_turn(llm_client: AsyncOpenAI, supabase: Client, state: Tria
         status = "action_required"
         should_notify = True
         if not summary:
-            summary = f"[EMERGENCY:{emergency_type}] {emergency_reason} Tenant said: {latest_text}"
+            summary = f"[EMERGENCY:{emergency_type}] {ctx.emergency_reason} Tenant said: {latest_text}"
 
     db_urgency = URGENCY_MAP.get(urgency, URGENCY_MAP["P2"])
 
-    # 4) Persist: update ticket every turn (summary/category/urgency/status + running issue_details)
-    now = datetime.now(timezone.utc).isoformat()
-    detail_line = f"{now}Z | user: {latest_text}"
-    # Pull current issue_details so we can append (simple approach)
-    # If you don’t want the extra read, skip and just overwrite issue_details with summary.
-    existing = supabase.table("tickets").select("issue_details").eq("id", ticket_id).limit(1).execute()
-    prev_details = existing.data[0].get("issue_details") if existing.data else None
-    new_details = _append_detail(prev_details, detail_line)
-
-    ticket = update_ticket_record(
+    # 4) Persist: update ticket fields + append this turn to ticket_events,
+    # 5) then notify only when needed (emergency or action_required).
+    # issue_details is materialized from ticket_events on read (migration 006).
+    notify_event = (
+        ("ticket.emergency" if is_emergency else "ticket.action_required")
+        if should_notify and status == "action_required"
+        else None
+    )
+    update = functools.partial(
+        _update_and_notify,
         supabase,
         ticket_id=ticket_id,
-        summary=summary or f"Tenant report: {latest_text}",
-        urgency=db_urgency,
-        status=status,
-        category=category,
-        issue_details=new_details,
-        resolved=(status == "resolved"),
+        patch={
+            "summary": summary or f"Tenant report: {latest_text}",
+            "urgency": db_urgency,
+            "status": status,
+            "category": category,
+            "resolved": status == "resolved",
+        },
+        notify_event=notify_event,
     )
+    append = functools.partial(aappend_ticket_event, supabase, ticket_id=ticket_id, body=latest_text)
 
-    # 5) Notify only when needed (emergency or action_required)
-    if should_notify and status == "action_required":
-        enqueue_ticket_event(
-            supabase,
-            event_type="ticket.action_required" if not is_emergency else "ticket.emergency",
-            ticket=ticket,
-            # later: to_email=resolved_by_property_mapping(...)
-            # For now uses NOTIFICATION_EMAIL from config
-        )
+    queue = writebehind.default_queue
+    if queue is None or notify_event:
+        # Independent writes, so they run concurrently. Turns that notify a
+        # manager always persist inline: the outbox row is the durable handoff
+        # and must exist before the tenant is told a manager was alerted.
+        await asyncio.gather(append(), update())
+    else:
+        # Write-behind: reply returns now; the per-ticket shard applies these
+        # in order (separate jobs so a retry never re-appends the event).
+        await queue.submit(ticket_id, append, name=f"ticket_event:{ticket_id}")
+        await queue.submit(ticket_id, update, name=f"ticket_update:{ticket_id}")
 
     # 6) Append assistant reply to conversation state
     state.messages.append(Message(role="assistant", content=tenant_reply))
     state.ticket_created = True
     state.ticket_id = ticket_id
+    state.last_turn = TriageTurn(
+        tenant_reply=tenant_reply,
+        category=category,
+        urgency=urgency,
+        status=status,
+        should_notify_manager=should_notify,
+        summary_for_ticket=summary,
+    )
+    if is_emergency:
+        state.emergency_type = emergency_type
+    elif status == "resolved":
+        state.emergency_type = None
 
     return state
+
+async def run_triage_turn(llm_client: AsyncOpenAI, supabase: Client, state: TriageState) -> TriageState:
+    ctx = await _prepare_turn(supabase, state)
+
+    # 2) Call LLM (even emergency) to produce tenant-facing text + structured fields,
+    # unless the opt-in fast path recognizes a templated turn.
+    turn = fast_path_turn(state, ctx.latest_text, ctx.is_emergency) if FASTPATH_ENABLED else None
+    if turn is None:
+        turn = await _llm_turn(llm_client, state, ctx)
+
+    return await _finalize_turn(supabase, state, ctx, turn)
+
+async def stream_triage_turn(
+    llm_client: AsyncOpenAI,
+    supabase: Client,
+    state: TriageState,
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Same turn as run_triage_turn, but yields ("delta", str) pieces of the
+    tenant reply while the model is still generating, then ("state", TriageState)
+    after the structured fields have been applied and persisted.
+    """
+    ctx = await _prepare_turn(supabase, state)
+
+    turn = fast_path_turn(state, ctx.latest_text, ctx.is_emergency) if FASTPATH_ENABLED else None
+    if turn is not None:
+        yield "delta", turn.tenant_reply
+    else:
+        async for kind, value in stream_turn_json(
+            llm_client,
+            ctx.openai_msgs,
+            temperature=ctx.temperature,
+            extra_instructions=_context_instructions(state, ctx.ticket_id, ctx.is_emergency, ctx.emergency_type),
+        ):
+            if kind == "delta":
+                yield "delta", value
+            else:
+                turn = value
+
+    yield "state", await _finalize_turn(supabase, state, ctx, turn)
@@ -0,0 +1,69 @@
+# app/outbox_retention.py
+"""
+Moves delivered notifications out of notification_outbox.
+
+    python -m app.outbox_retention
+
+Calls archive_sent_notifications (migration 017) until no sent row older
+than OUTBOX_RETENTION_DAYS is left, OUTBOX_ARCHIVE_BATCH_SIZE rows per
+call. Run it from cron; it is safe next to running workers (SKIP LOCKED)
+and safe to run twice.
+"""
+import os
+import time
+from typing import Optional
+
+from supabase import create_client, Client
+
+from .config import SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY
+
+RETENTION_DAYS = int(os.getenv("OUTBOX_RETENTION_DAYS", "30"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("OUTBOX_ARCHIVE_BATCH_SIZE", "1000"))
+# Pause between batches so archival doesn't compete with the claim query
+ARCHIVE_PAUSE_SECONDS = float(os.getenv("OUTBOX_ARCHIVE_PAUSE_SECONDS", "0.1"))
+
+
+def archive_batch(supabase: Client, days: int = RETENTION_DAYS, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    res = supabase.rpc(
+        "archive_sent_notifications",
+        {"p_older_than": f"{days} days", "p_batch_size": batch_size},
+    ).execute()
+    return int(res.data or 0)
+
+
+def archive_sent(
+    supabase: Client,
+    days: int = RETENTION_DAYS,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    max_batches: Optional[int] = None,
+    pause_seconds: float = ARCHIVE_PAUSE_SECONDS,
+) -> int:
+    """
+    Archives batches until one comes back short (or max_batches is hit).
+    Returns the total number of rows moved.
+    """
+    total = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        moved = archive_batch(supabase, days, batch_size)
+        total += moved
+        batches += 1
+        if moved < batch_size:
+            break
+        if pause_seconds:
+            time.sleep(pause_seconds)
+    return total
+
+
+def main():
+    supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+    started = time.perf_counter()
+    moved = archive_sent(supabase)
+    print(
+        f"[retention] archived {moved} sent notifications older than {RETENTION_DAYS} days "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
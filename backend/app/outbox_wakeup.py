@@ -0,0 +1,125 @@
+# app/outbox_wakeup.py
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+from typing import Optional
+
+OUTBOX_CHANNEL = "notification_outbox"
+
+
+class OutboxWakeup:
+    """
+    Something the notification worker can sleep on until new outbox rows
+    arrive. wait() returns True when woken by a notification and False
+    when the timeout elapsed.
+    """
+
+    async def wait(self, timeout: float) -> bool:
+        await asyncio.sleep(max(0.0, timeout))
+        return False
+
+    async def close(self) -> None:
+        pass
+
+
+class LocalWakeup(OutboxWakeup):
+    """
+    In-process stand-in for LISTEN/NOTIFY (tests / single-process dev).
+    """
+
+    def __init__(self):
+        self._event = asyncio.Event()
+
+    def notify(self) -> None:
+        self._event.set()
+
+    async def wait(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout=max(0.0, timeout))
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._event.clear()
+
+
+class PgListenWakeup(OutboxWakeup):
+    """
+    LISTEN on the channel fed by the notification_outbox insert trigger
+    (migration 008). Needs a direct Postgres connection (DATABASE_URL) and
+    psycopg >= 3.2. If the connection drops, wait() falls back to a plain
+    sleep and reconnects on the next call.
+    """
+
+    def __init__(self, dsn: str, channel: str = OUTBOX_CHANNEL):
+        self.dsn = dsn
+        self.channel = channel
+        self._conn = None
+
+    async def _connect(self) -> None:
+        import psycopg  # optional dependency
+
+        self._conn = await psycopg.AsyncConnection.connect(self.dsn, autocommit=True)
+        await self._conn.execute(f"LISTEN {self.channel}")
+
+    async def wait(self, timeout: float) -> bool:
+        try:
+            if self._conn is None or self._conn.closed:
+                await self._connect()
+            async for _ in self._conn.notifies(timeout=max(0.0, timeout), stop_after=1):
+                return True
+            return False
+        except Exception as e:
+            print(f"[worker] LISTEN {self.channel} unavailable, polling instead: {e}")
+            await self.close()
+            return await super().wait(timeout)
+
+    async def close(self) -> None:
+        if self._conn is not None:
+            try:
+                await self._conn.close()
+            except Exception:
+                pass
+        self._conn = None
+
+
+def open_wakeup(dsn: Optional[str], channel: str = OUTBOX_CHANNEL) -> OutboxWakeup:
+    if dsn:
+        try:
+            import psycopg  # noqa: F401
+            return PgListenWakeup(dsn, channel)
+        except ImportError:
+            print("[worker] DATABASE_URL set but psycopg is not installed; polling instead.")
+    return OutboxWakeup()
+
+
+class IdleBackoff:
+    """
+    Exponential idle delay: initial, 2x, 4x, ... capped at maximum.
+    reset() after any batch that found work.
+    """
+
+    def __init__(self, initial: float = 1.0, maximum: float = 30.0):
+        self.initial = initial
+        self.maximum = maximum
+        self._next = initial
+
+    def reset(self) -> None:
+        self._next = self.initial
+
+    def next(self) -> float:
+        delay = self._next
+        self._next = min(self.maximum, self._next * 2)
+        return delay
+
+
+def next_wake_delay(idle_delay: float, next_due_at: Optional[str], now: Optional[datetime] = None) -> float:
+    """
+    Sleep no longer than until the earliest pending next_attempt_at.
+    """
+    if not next_due_at:
+        return idle_delay
+    now = now or datetime.now(timezone.utc)
+    due = datetime.fromisoformat(next_due_at.replace("Z", "+00:00"))
+    return max(0.0, min(idle_delay, (due - now).total_seconds()))
@@ -1,35 +1,176 @@
 # app/policy.py
-from typing import Optional, List, Tuple
+import re
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
 from .schemas import Message
 
-def should_escalate(msgs: List[Message]) -> Tuple[bool, str, str]:
+
+# Below this many distinct keywords, plain `k in text` scans beat the regex
+# (per-position lookahead + closure lookup); see benchmarks/bench_policy.py.
+REGEX_MIN_KEYWORDS = 100
+
+
+class KeywordMatcher:
     """
-    Returns: (needs_ticket, urgency, reason)
+    Multi-keyword matcher with plain substring semantics (same as
+    `k in text`), built once at import.
+
+    The rule functions below test `keywords[group]` directly so they
+    short-circuit like the original `any(k in t ...) and ...` chains.
+    scan() returns every matched group: for small lists it runs those same
+    substring scans; for large ones (>= REGEX_MIN_KEYWORDS) all keywords are folded
+    into a single trie-shaped regex so the engine branches on the next
+    character instead of trying every keyword, and a lookahead reports the
+    longest keyword starting at each position in one pass. Every keyword
+    maps to the groups of all keywords it contains, so shorter/overlapping
+    keywords are still credited.
     """
-    text = " ".join(m.content.lower() for m in msgs)
 
-    emergency = [
+    def __init__(self, groups: Dict[str, Sequence[str]]):
+        owners: Dict[str, set] = {}
+        for group, words in groups.items():
+            for w in words:
+                owners.setdefault(w.lower(), set()).add(group)
+
+        self.keywords: Dict[str, Tuple[str, ...]] = {g: tuple(w.lower() for w in ws) for g, ws in groups.items()}
+        self.max_len = max(len(w) for w in owners)
+        self._regex = None
+        if len(owners) >= REGEX_MIN_KEYWORDS:
+            self._closure: Dict[str, FrozenSet[str]] = {
+                w: frozenset().union(*(g for other, g in owners.items() if other in w))
+                for w in owners
+            }
+            self._regex = re.compile("(?=(" + _trie_pattern(owners) + "))")
+
+    def scan(self, text: str) -> FrozenSet[str]:
+        """
+        Returns every group with at least one keyword in `text`.
+        """
+        t = (text or "").lower()
+        if self._regex is None:
+            return frozenset(g for g, words in self.keywords.items() if any(k in t for k in words))
+        found: set = set()
+        closure = self._closure
+        for m in self._regex.finditer(t):
+            found |= closure[m.group(1)]
+        return frozenset(found)
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    trie: dict = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node: dict) -> str:
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            # a keyword ends here; greedy "?" still prefers the longer one
+            return ("(?:" + body + ")?") if len(branches) == 1 else body + "?"
+        return body
+
+    return emit(trie)
+
+
+class IncrementalScanner:
+    """
+    Keeps matched groups for a growing message history and only scans
+    messages appended since the last call. Equivalent to scanning
+    " ".join(contents): the tail of the previous text is re-scanned so
+    keywords spanning a message boundary are still found.
+    """
+
+    def __init__(self, matcher: KeywordMatcher):
+        self.matcher = matcher
+        self.reset()
+
+    def reset(self) -> None:
+        self.matched: FrozenSet[str] = frozenset()
+        self._tail: Optional[str] = None
+        self._last: Optional[Message] = None
+
+    def feed(self, msgs: List[Message]) -> FrozenSet[str]:
+        for m in self._unseen(msgs):
+            text = m.content.lower()
+            chunk = text if self._tail is None else self._tail + " " + text
+            self.matched |= self.matcher.scan(chunk)
+            self._tail = chunk[len(chunk) - (self.matcher.max_len - 1):] if self.matcher.max_len > 1 else ""
+            self._last = m
+        return self.matched
+
+    def _unseen(self, msgs: List[Message]) -> List[Message]:
+        if self._last is None:
+            return msgs
+        for i in range(len(msgs) - 1, -1, -1):
+            if msgs[i] is self._last:
+                return msgs[i + 1:]
+        # history was replaced or trimmed past our position: start over
+        self.reset()
+        return msgs
+
+
+ESCALATION_MATCHER = KeywordMatcher({
+    "emergency": [
         "fire", "smoke", "burning smell", "sparking",
         "gas smell", "smell gas", "gas leak",
         "major flooding", "flooding", "uncontrolled water",
         "water dripping through light", "dripping through light", "light fixture",
         "electrocution", "outlet", "electrical panel", "breaker box",
         "ceiling bulging", "ceiling sagging", "structural",
-    ]
-    if any(k in text for k in emergency):
+    ],
+    # rain intrusion (window/roof/wall)
+    "weather": ["rain", "storm"],
+    "exterior": ["window", "roof", "wall"],
+    "intrusion": ["leak", "leaking", "water inside", "water coming in"],
+    # persistent leak
+    "leak": ["leak", "leaking", "drip", "dripping"],
+    "persistent": ["comes back", "when the water is on", "still leaking", "won't stop", "cannot stop", "can't stop"],
+    # habitability
+    "habitability": ["no heat", "no hot water", "no power", "power out", "electricity out"],
+    "checked": ["still", "not working", "checked", "breaker", "switch", "thermostat"],
+})
+
+EMERGENCY_MATCHER = KeywordMatcher({
+    "gas": ["gas smell", "smell gas", "gas leak", "rotten eggs"],
+    "fire": ["fire", "smoke"],
+    "spark": ["sparking", "sparks", "arcing", "electric shock", "shocked me", "burning smell"],
+    "electrical_site": ["outlet", "switch", "panel", "breaker", "light", "fixture", "wire"],
+    "light_water": ["water dripping through light", "dripping through light", "water in light", "light fixture"],
+    "water": ["water", "drip", "leak", "leaking"],
+    "flooding": ["major flooding", "flooding", "uncontrolled water", "water pouring", "pouring water", "won't stop", "can't stop"],
+    "structural": ["ceiling bulging", "ceiling sagging", "structural collapse", "about to fall"],
+})
+
+
+def should_escalate(
+    msgs: List[Message],
+    scanner: Optional[IncrementalScanner] = None,
+) -> Tuple[bool, str, str]:
+    """
+    Returns: (needs_ticket, urgency, reason)
+    Pass a per-conversation IncrementalScanner to scan only new messages.
+    """
+    if scanner is not None:
+        has = scanner.feed(msgs).__contains__
+    else:
+        text = " ".join(m.content for m in msgs).lower()
+        words = ESCALATION_MATCHER.keywords
+        has = lambda group: any(k in text for k in words[group])  # noqa: E731
+
+    if has("emergency"):
         return True, "P0_EMERGENCY", "Immediate danger (fire/gas/electrical/flood/structural)."
 
-    # rain intrusion (window/roof/wall)
-    if any(k in text for k in ["rain", "storm"]) and any(k in text for k in ["window", "roof", "wall"]) and any(k in text for k in ["leak", "leaking", "water inside", "water coming in"]):
+    if has("weather") and has("exterior") and has("intrusion"):
         return True, "P2_SOON", "Rain/water intrusion from outside."
 
-    # persistent leak
-    if any(k in text for k in ["leak", "leaking", "drip", "dripping"]) and any(k in text for k in ["comes back", "when the water is on", "still leaking", "won't stop", "cannot stop", "can't stop"]):
+    if has("leak") and has("persistent"):
         return True, "P1_URGENT", "Leak persists or returns."
 
-    # habitability
-    habitability = ["no heat", "no hot water", "no power", "power out", "electricity out"]
-    if any(k in text for k in habitability) and any(k in text for k in ["still", "not working", "checked", "breaker", "switch", "thermostat"]):
+    if has("habitability") and has("checked"):
         return True, "P1_URGENT", "Habitability impacted and unresolved after basic checks."
 
     return False, "P2_SOON", ""
@@ -40,33 +181,30 @@ def detect_emergency(latest_text: str) -> Tuple[bool, Optional[str], str]:
     emergency_type: "gas"|"fire"|"electrical"|"flooding"|"structural"|None
     """
     t = (latest_text or "").lower()
+    kw = EMERGENCY_MATCHER.keywords
 
     # GAS
-    if any(k in t for k in ["gas smell", "smell gas", "gas leak", "rotten eggs"]):
+    if any(k in t for k in kw["gas"]):
         return True, "gas", "Possible gas leak."
 
     # FIRE / SMOKE
-    if any(k in t for k in ["fire", "smoke"]):
+    if any(k in t for k in kw["fire"]):
         return True, "fire", "Fire/smoke reported."
 
     # ELECTRICAL HAZARD (high-signal only)
-    if any(k in t for k in ["sparking", "sparks", "arcing", "electric shock", "shocked me", "burning smell"]) and any(
-        k in t for k in ["outlet", "switch", "panel", "breaker", "light", "fixture", "wire"]
-    ):
+    if any(k in t for k in kw["spark"]) and any(k in t for k in kw["electrical_site"]):
         return True, "electrical", "Electrical hazard reported."
 
     # WATER + ELECTRICAL (very dangerous)
-    if any(k in t for k in ["water dripping through light", "dripping through light", "water in light", "light fixture"]) and any(
-        k in t for k in ["water", "drip", "leak", "leaking"]
-    ):
+    if any(k in t for k in kw["light_water"]) and any(k in t for k in kw["water"]):
         return True, "electrical", "Water near electrical fixture."
 
     # MAJOR FLOODING / UNCONTROLLED WATER
-    if any(k in t for k in ["major flooding", "flooding", "uncontrolled water", "water pouring", "pouring water", "won't stop", "can't stop"]):
+    if any(k in t for k in kw["flooding"]):
         return True, "flooding", "Uncontrolled flooding."
 
     # STRUCTURAL IMMEDIATE DANGER
-    if any(k in t for k in ["ceiling bulging", "ceiling sagging", "structural collapse", "about to fall"]):
+    if any(k in t for k in kw["structural"]):
         return True, "structural", "Possible structural hazard."
 
-    return False, None, ""
\ No newline at end of file
+    return False, None, ""
@@ -12,6 +12,8 @@ class Message(BaseModel):
     content: str = Field(min_length=1)
 
 class ChatRequest(BaseModel):
+    # With session_id, send only the new `message`; the server holds the history.
+    session_id: Optional[str] = None
     messages: Optional[List[Message]] = None
     message: Optional[str] = None
     history: Optional[List[Message]] = None
@@ -25,6 +27,15 @@ class ChatResponse(BaseModel):
     reply: str
     ticket_created: bool = False
     ticket_id: Optional[int] = None
+    session_id: Optional[str] = None
+
+class TriageTurn(BaseModel):
+    tenant_reply: str
+    category: Category
+    urgency: Urgency
+    status: TicketStatus
+    should_notify_manager: bool
+    summary_for_ticket: str
 
 class TriageState(BaseModel):
     messages: List[Message]
@@ -37,11 +48,7 @@ class TriageState(BaseModel):
     tenant_phone: Optional[str] = None
     property_address: Optional[str] = None
     unit: Optional[str] = None
-
-class TriageTurn(BaseModel):
-    tenant_reply: str
-    category: Category
-    urgency: Urgency
-    status: TicketStatus
-    should_notify_manager: bool
-    summary_for_ticket: str
\ No newline at end of file
+    # Effective result of the previous turn (after safety overrides); lets
+    # later turns be answered without the LLM (see app/fastpath.py).
+    last_turn: Optional[TriageTurn] = None
+    emergency_type: Optional[str] = None
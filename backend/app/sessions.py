@@ -0,0 +1,187 @@
+# app/sessions.py
+from __future__ import annotations
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from supabase import Client
+
+from .db import run_db
+from .schemas import TriageState
+
+
+def new_session_id() -> str:
+    return uuid.uuid4().hex
+
+
+class SessionBackend:
+    """
+    Durable tier behind the in-process cache. Implementations are sync
+    (they are called through the bounded I/O pool) and store the
+    JSON-dumped TriageState.
+    """
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def save(self, session_id: str, data: Dict[str, Any], ttl_seconds: int) -> None:
+        raise NotImplementedError
+
+    def delete(self, session_id: str) -> None:
+        raise NotImplementedError
+
+
+class MemorySessionBackend(SessionBackend):
+    """
+    Dict-backed stand-in for the durable tier (tests / local dev).
+    """
+
+    def __init__(self):
+        self.rows: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        hit = self.rows.get(session_id)
+        if not hit:
+            return None
+        expires_at, data = hit
+        if expires_at <= time.time():
+            self.rows.pop(session_id, None)
+            return None
+        return data
+
+    def save(self, session_id: str, data: Dict[str, Any], ttl_seconds: int) -> None:
+        self.rows[session_id] = (time.time() + ttl_seconds, data)
+
+    def delete(self, session_id: str) -> None:
+        self.rows.pop(session_id, None)
+
+
+class SupabaseSessionBackend(SessionBackend):
+    """
+    Stores sessions in public.chat_sessions (see migrations/005_create_chat_sessions.sql)
+    so any API worker can pick up a conversation.
+    """
+
+    def __init__(self, supabase: Client, table: str = "chat_sessions"):
+        self.supabase = supabase
+        self.table = table
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        now = datetime.now(timezone.utc).isoformat()
+        res = (
+            self.supabase.table(self.table)
+            .select("state")
+            .eq("id", session_id)
+            .gt("expires_at", now)
+            .limit(1)
+            .execute()
+        )
+        return res.data[0]["state"] if res.data else None
+
+    def save(self, session_id: str, data: Dict[str, Any], ttl_seconds: int) -> None:
+        now = datetime.now(timezone.utc)
+        self.supabase.table(self.table).upsert({
+            "id": session_id,
+            "ticket_id": data.get("ticket_id"),
+            "state": data,
+            "updated_at": now.isoformat(),
+            "expires_at": (now + timedelta(seconds=ttl_seconds)).isoformat(),
+        }).execute()
+
+    def delete(self, session_id: str) -> None:
+        self.supabase.table(self.table).delete().eq("id", session_id).execute()
+
+
+class SessionStore:
+    """
+    Server-side conversation state keyed by session id.
+
+    An in-process LRU (with TTL) holds live TriageState objects so a hot
+    session is never re-parsed; the optional backend makes sessions survive
+    restarts and work across workers. Messages are capped at max_messages
+    so stored state stays bounded for long threads.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[SessionBackend] = None,
+        *,
+        max_entries: int = 10_000,
+        ttl_seconds: int = 24 * 3600,
+        max_messages: int = 24,
+    ):
+        self.backend = backend
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_messages = max_messages
+        self._cache: "OrderedDict[str, Tuple[float, TriageState]]" = OrderedDict()
+        # session_id -> [lock, holders + waiters]; an entry only exists while
+        # a turn holds or waits for it, so failed turns can't leak locks
+        self._locks: Dict[str, List[Any]] = {}
+
+    @asynccontextmanager
+    async def lock(self, session_id: str) -> AsyncIterator[None]:
+        """
+        Per-session lock so two concurrent turns on one thread are serialized.
+        """
+        entry = self._locks.get(session_id)
+        if entry is None:
+            entry = self._locks[session_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[session_id]
+
+    async def get(self, session_id: str) -> Optional[TriageState]:
+        hit = self._cache.get(session_id)
+        if hit is not None:
+            expires_at, state = hit
+            if expires_at > time.monotonic():
+                self._cache.move_to_end(session_id)
+                return state
+            self._evict(session_id)
+
+        if self.backend is None:
+            return None
+
+        data = await run_db(self.backend.load, session_id)
+        if data is None:
+            return None
+        state = TriageState.model_validate(data)
+        self._remember(session_id, state)
+        return state
+
+    async def put(self, session_id: str, state: TriageState) -> None:
+        if len(state.messages) > self.max_messages:
+            state.messages = state.messages[-self.max_messages:]
+        self._remember(session_id, state)
+        if self.backend is not None:
+            await run_db(
+                self.backend.save,
+                session_id,
+                state.model_dump(mode="json"),
+                self.ttl_seconds,
+            )
+
+    async def delete(self, session_id: str) -> None:
+        self._evict(session_id)
+        if self.backend is not None:
+            await run_db(self.backend.delete, session_id)
+
+    def _remember(self, session_id: str, state: TriageState) -> None:
+        self._cache[session_id] = (time.monotonic() + self.ttl_seconds, state)
+        self._cache.move_to_end(session_id)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def _evict(self, session_id: str) -> None:
+        self._cache.pop(session_id, None)
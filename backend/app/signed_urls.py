@@ -0,0 +1,132 @@
+# app/signed_urls.py
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from supabase import Client
+
+from .config import (
+    MEDIA_SIGNED_URL_REFRESH_MARGIN_SECONDS,
+    MEDIA_SIGNED_URL_TTL_SECONDS,
+)
+from .db import run_db
+
+
+def _url_from(r: Any) -> Optional[str]:
+    # supabase-py versions vary
+    if isinstance(r, dict):
+        return r.get("signedURL") or r.get("signed_url") or r.get("signedUrl") or r.get("url")
+    data = getattr(r, "data", None)
+    if isinstance(data, dict):
+        return data.get("signedURL") or data.get("signed_url") or data.get("signedUrl") or data.get("url")
+    return None
+
+
+def sign_one(supabase: Client, bucket: str, path: str, ttl: int) -> Optional[str]:
+    try:
+        return _url_from(supabase.storage.from_(bucket).create_signed_url(path, ttl))
+    except Exception:
+        return None
+
+
+def sign_many(supabase: Client, bucket: str, paths: List[str], ttl: int) -> Dict[str, Optional[str]]:
+    """
+    Signs every path with one Storage request (POST /object/sign/{bucket}).
+    Paths Storage reports an error for (e.g. missing objects) map to None.
+    """
+    try:
+        items = supabase.storage.from_(bucket).create_signed_urls(paths, ttl)
+    except Exception as e:
+        print(f"[storage] batch sign failed for {len(paths)} paths: {e}")
+        return {p: None for p in paths}
+    out: Dict[str, Optional[str]] = {p: None for p in paths}
+    for item in items or []:
+        path = item.get("path") if isinstance(item, dict) else getattr(item, "path", None)
+        error = item.get("error") if isinstance(item, dict) else getattr(item, "error", None)
+        if path in out and not error:
+            out[path] = _url_from(item)
+    return out
+
+
+class SignedUrlCache:
+    """
+    Reuses signed URLs per (bucket, path) until `margin_seconds` before they
+    expire, so a URL handed to the UI is always valid for at least the
+    margin. Misses are signed in one batched Storage call.
+
+    Expiry is measured from just before the sign request, so the cached
+    deadline is never later than the real one. Bounded LRU.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttl_seconds: int = MEDIA_SIGNED_URL_TTL_SECONDS,
+        margin_seconds: int = MEDIA_SIGNED_URL_REFRESH_MARGIN_SECONDS,
+        max_entries: int = 50_000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl_seconds = ttl_seconds
+        # a margin >= ttl would make every URL stale on arrival
+        self.margin_seconds = min(margin_seconds, ttl_seconds // 2)
+        self.max_entries = max_entries
+        self.clock = clock
+        self._urls: "OrderedDict[Tuple[str, str], Tuple[float, str]]" = OrderedDict()
+
+    def peek(self, bucket: str, path: str) -> Optional[str]:
+        key = (bucket, path)
+        hit = self._urls.get(key)
+        if hit is None:
+            return None
+        refresh_at, url = hit
+        if self.clock() >= refresh_at:
+            del self._urls[key]
+            return None
+        self._urls.move_to_end(key)
+        return url
+
+    async def get(self, supabase: Client, bucket: str, path: str) -> Optional[str]:
+        return (await self.get_many(supabase, bucket, [path]))[path]
+
+    async def get_many(self, supabase: Client, bucket: str, paths: Iterable[Optional[str]]) -> Dict[str, Optional[str]]:
+        """
+        {path: url or None} for every non-empty path, signing only the misses.
+        """
+        out: Dict[str, Optional[str]] = {}
+        misses: List[str] = []
+        for p in paths:
+            if not p or p in out:
+                continue
+            out[p] = self.peek(bucket, p)
+            if out[p] is None:
+                misses.append(p)
+        if not misses:
+            return out
+
+        signed_at = self.clock()
+        if len(misses) == 1:
+            fresh = {misses[0]: await run_db(sign_one, supabase, bucket, misses[0], self.ttl_seconds)}
+        else:
+            fresh = await run_db(sign_many, supabase, bucket, misses, self.ttl_seconds)
+        refresh_at = signed_at + self.ttl_seconds - self.margin_seconds
+        for p, url in fresh.items():
+            out[p] = url
+            if url:
+                self._remember((bucket, p), refresh_at, url)
+        return out
+
+    def invalidate(self, bucket: str, paths: Iterable[str]) -> None:
+        for p in paths:
+            self._urls.pop((bucket, p), None)
+
+    def _remember(self, key: Tuple[str, str], refresh_at: float, url: str) -> None:
+        self._urls[key] = (refresh_at, url)
+        self._urls.move_to_end(key)
+        while len(self._urls) > self.max_entries:
+            self._urls.popitem(last=False)
+
+
+# Process-wide cache for media URLs.
+signed_url_cache = SignedUrlCache()
@@ -0,0 +1,126 @@
+# app/tickets_api.py
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import APIRouter, HTTPException, Query, Request
+
+from . import metrics
+from .config import TICKET_COUNT_CACHE_TTL_SECONDS, TICKET_COUNT_MODE
+from .db import execute
+from .pagination import keyset_filter, page
+
+router = APIRouter()
+
+MAX_PAGE_SIZE = 100
+
+_LIST_COLUMNS = (
+    "id,created_at,summary,urgency,status,category,"
+    "property_address,unit,tenant_name,last_activity_at"
+)
+
+
+class CountCache:
+    """
+    Short-TTL cache for dashboard totals keyed by the filter set. An exact
+    count over millions of rows is the expensive part of a list request;
+    totals a few seconds stale are fine for a queue view. Concurrent misses
+    for the same key share one query.
+    """
+
+    def __init__(self, ttl_seconds: float = 30, max_entries: int = 1000, clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.clock = clock
+        self._values: Dict[Tuple, Tuple[float, int]] = {}
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+
+    async def get(self, key: Tuple, compute: Callable[[], Awaitable[int]]) -> int:
+        hit = self._values.get(key)
+        if hit is not None and hit[0] > self.clock():
+            metrics.incr("tickets.count_cache.hit")
+            return hit[1]
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        metrics.incr("tickets.count_cache.miss")
+        fut = asyncio.ensure_future(compute())
+        self._inflight[key] = fut
+        try:
+            value = await asyncio.shield(fut)
+        finally:
+            self._inflight.pop(key, None)
+        if len(self._values) >= self.max_entries:
+            self._values.clear()
+        self._values[key] = (self.clock() + self.ttl_seconds, value)
+        return value
+
+    def clear(self) -> None:
+        self._values.clear()
+
+
+count_cache = CountCache(ttl_seconds=TICKET_COUNT_CACHE_TTL_SECONDS)
+
+
+def _filtered(q, filters: Dict[str, Optional[str]]):
+    for column, value in filters.items():
+        if value is not None:
+            q = q.eq(column, value)
+    return q
+
+
+@router.get("/tickets")
+async def list_tickets(
+    request: Request,
+    status: Optional[str] = None,
+    urgency: Optional[str] = None,
+    category: Optional[str] = None,
+    property_address: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+):
+    """
+    Manager queue: newest first, keyset-paginated on (created_at desc, id desc),
+    optionally filtered by exact status / urgency / category / property_address.
+    Migration 014 has an index ending in (created_at desc, id desc) for no
+    filter, each single filter, and status + urgency; other combinations
+    scan one of those and filter the remaining columns.
+    """
+    supabase = request.state.supabase
+    if supabase is None:
+        raise HTTPException(500, "Server misconfigured")
+
+    filters = {
+        "status": status,
+        "urgency": urgency,
+        "category": category,
+        "property_address": property_address,
+    }
+
+    q = _filtered(supabase.table("tickets").select(_LIST_COLUMNS), filters)
+    if cursor:
+        q = keyset_filter(q, "created_at", cursor)
+    q = q.order("created_at", desc=True).order("id", desc=True).limit(limit + 1)
+
+    async def count() -> int:
+        res = await execute(_filtered(supabase.table("tickets").select("id", count=TICKET_COUNT_MODE), filters).limit(1))
+        return int(res.count or 0)
+
+    try:
+        if include_total:
+            res, total = await asyncio.gather(
+                execute(q),
+                count_cache.get(tuple(sorted((k, v) for k, v in filters.items() if v is not None)), count),
+            )
+        else:
+            res, total = await execute(q), None
+    except Exception as e:
+        raise HTTPException(500, f"Ticket listing failed: {e}")
+
+    items, next_cursor = page(res.data or [], limit, "created_at")
+    return {"items": items, "next_cursor": next_cursor, "total": total}
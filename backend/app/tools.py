@@ -6,6 +6,8 @@ from typing import Optional, Dict, Any
 
 from supabase import Client
 
+from .db import run_db
+
 
 def utc_now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
@@ -104,3 +106,46 @@ def update_ticket_record(
         # If Supabase returns nothing, keep it explicit
         raise RuntimeError(f"Supabase update returned no data for ticket_id={ticket_id}.")
     return res.data[0]
+
+
+def append_ticket_event(
+    supabase: Client,
+    *,
+    ticket_id: int,
+    body: str,
+    kind: str = "user_message",
+) -> None:
+    """
+    Appends one row to ticket_events. Constant cost per turn: no read of the
+    existing details and no rewrite of a growing text blob.
+    """
+    supabase.table("ticket_events").insert({
+        "ticket_id": int(ticket_id),
+        "kind": kind,
+        "body": body,
+    }).execute()
+
+
+def ticket_exists(supabase: Client, ticket_id: int) -> bool:
+    res = supabase.table("tickets").select("id").eq("id", ticket_id).limit(1).execute()
+    return bool(res.data)
+
+
+# --- Async variants (for request handlers) ---
+# Same behavior as the sync functions above, run in the bounded I/O pool so
+# they never block the event loop.
+
+async def acreate_ticket_record(supabase: Client, **kwargs: Any) -> Dict[str, Any]:
+    return await run_db(create_ticket_record, supabase, **kwargs)
+
+
+async def aupdate_ticket_record(supabase: Client, **kwargs: Any) -> Dict[str, Any]:
+    return await run_db(update_ticket_record, supabase, **kwargs)
+
+
+async def aappend_ticket_event(supabase: Client, **kwargs: Any) -> None:
+    await run_db(append_ticket_event, supabase, **kwargs)
+
+
+async def aticket_exists(supabase: Client, ticket_id: int) -> bool:
+    return await run_db(ticket_exists, supabase, ticket_id)
@@ -0,0 +1,149 @@
+# app/worker_media.py
+"""
+Background image verification for uploads made with verify_mode=async.
+
+    python -m app.worker_media
+
+Claims media_verify_jobs (migration 011) with SKIP LOCKED, verifies the
+stored derivative (or the original when there is none) and writes the
+verdict onto ticket_media. Failures retry with the notification worker's
+backoff; after MEDIA_VERIFY_MAX_ATTEMPTS the row is marked 'error'.
+"""
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+from openai import AsyncOpenAI
+from supabase import create_client, Client
+
+from .config import DATABASE_URL, OPENAI_API_KEY, SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY
+from .db import execute, run_db
+from .media import verdict_fields, verification_error_fields
+from .media_cache import verdict_cache
+from .media_derive import DERIVATIVE_MIME
+from .media_verify import verdict_cacheable, verify_image
+from .outbox_wakeup import IdleBackoff, OutboxWakeup, open_wakeup
+from .worker_notify import backoff_seconds
+
+MEDIA_VERIFY_CHANNEL = "media_verify"
+POLL_INTERVAL_SECONDS = 1
+IDLE_MAX_SECONDS = float(os.getenv("MEDIA_WORKER_IDLE_MAX_SECONDS", "30"))
+BATCH_SIZE = int(os.getenv("MEDIA_WORKER_BATCH_SIZE", "10"))
+MAX_IN_FLIGHT = int(os.getenv("MEDIA_WORKER_MAX_IN_FLIGHT", "4"))
+MAX_ATTEMPTS = int(os.getenv("MEDIA_VERIFY_MAX_ATTEMPTS", "5"))
+
+WORKER_ID = os.getenv("WORKER_ID") or f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+
+
+def claim_jobs(supabase: Client, batch_size: int = BATCH_SIZE) -> List[dict]:
+    res = supabase.rpc(
+        "claim_media_verify_jobs",
+        {"p_worker_id": WORKER_ID, "p_batch_size": batch_size},
+    ).execute()
+    return res.data or []
+
+
+def _download(supabase: Client, bucket: str, path: str) -> bytes:
+    return supabase.storage.from_(bucket).download(path)
+
+
+def _job_done() -> Dict[str, Any]:
+    return {"status": "done", "last_error": None, "locked_at": None, "locked_by": None}
+
+
+def _job_retry(attempt_count: int, err: Exception) -> Dict[str, Any]:
+    next_attempt = attempt_count + 1
+    if next_attempt >= MAX_ATTEMPTS:
+        status, next_at = "failed", None
+    else:
+        status = "pending"
+        next_at = (datetime.now(timezone.utc) + timedelta(seconds=backoff_seconds(next_attempt))).isoformat()
+    update = {
+        "status": status,
+        "attempt_count": next_attempt,
+        "last_error": str(err)[:1000],
+        "locked_at": None,
+        "locked_by": None,
+    }
+    if next_at:
+        update["next_attempt_at"] = next_at
+    return update
+
+
+async def process_job(supabase: Client, llm_client: AsyncOpenAI, job: dict) -> bool:
+    """
+    Verifies one claimed job. Returns True when a verdict was recorded.
+    """
+    media_id = job["media_id"]
+    attempt_count = int(job.get("attempt_count") or 0)
+    if job.get("thumbnail_path"):
+        path, mime = job["thumbnail_path"], DERIVATIVE_MIME
+    else:
+        path, mime = job["storage_path"], job.get("mime_type") or "image/jpeg"
+
+    content_sha256 = job.get("content_sha256")
+    issue_context = job.get("issue_context") or ""
+    try:
+        verdict = None
+        if content_sha256:
+            verdict = await verdict_cache.get(supabase, content_sha256, issue_context)
+        if verdict is None:
+            data = await run_db(_download, supabase, job["storage_bucket"], path)
+            verdict = await verify_image(
+                llm_client,
+                issue_context=issue_context,
+                image_bytes=data,
+                mime_type=mime,
+            )
+            if content_sha256 and verdict_cacheable(verdict):
+                await verdict_cache.put(supabase, content_sha256, issue_context, verdict)
+    except Exception as e:
+        update = _job_retry(attempt_count, e)
+        print(f"[media-worker] verify failed media={media_id} attempt={update['attempt_count']} err={e}")
+        if update["status"] == "failed":
+            await execute(supabase.table("ticket_media").update(verification_error_fields(e)).eq("id", media_id))
+        await execute(supabase.table("media_verify_jobs").update(update).eq("id", job["job_id"]))
+        return False
+
+    # verdict first: if we die before the job update, the job is reclaimed and re-verified
+    await execute(supabase.table("ticket_media").update(verdict_fields(verdict)).eq("id", media_id))
+    await execute(supabase.table("media_verify_jobs").update(_job_done()).eq("id", job["job_id"]))
+    print(f"[media-worker] verified media={media_id} is_valid={bool(verdict.get('is_valid'))}")
+    return True
+
+
+async def amain(wakeup: OutboxWakeup | None = None):
+    supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+    llm_client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+    in_flight = asyncio.Semaphore(MAX_IN_FLIGHT)
+    wakeup = wakeup or open_wakeup(DATABASE_URL, MEDIA_VERIFY_CHANNEL)
+    backoff = IdleBackoff(POLL_INTERVAL_SECONDS, IDLE_MAX_SECONDS)
+
+    async def bounded(job: dict):
+        async with in_flight:
+            try:
+                await process_job(supabase, llm_client, job)
+            except Exception as e:
+                # job stays 'processing' and is reclaimed by claim_media_verify_jobs
+                print(f"[media-worker] could not record result for job={job.get('job_id')}: {e}")
+
+    print(f"[media-worker] started (in_flight={MAX_IN_FLIGHT}, wakeup={type(wakeup).__name__}).")
+
+    try:
+        while True:
+            jobs = await run_db(claim_jobs, supabase, BATCH_SIZE)
+            if jobs:
+                backoff.reset()
+                await asyncio.gather(*(bounded(j) for j in jobs))
+            if len(jobs) < BATCH_SIZE:
+                if await wakeup.wait(backoff.next()):
+                    backoff.reset()
+    finally:
+        await wakeup.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(amain())
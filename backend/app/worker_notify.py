@@ -1,21 +1,69 @@
+import asyncio
+import sys
 import time
 import os, socket, uuid
 from datetime import datetime, timezone, timedelta
+from typing import Any, Dict, List, Tuple
+
 from supabase import create_client, Client
 
 from .config import (
     SUPABASE_URL,
     SUPABASE_SERVICE_ROLE_KEY,
+    DATABASE_URL,
     RESEND_API_KEY,
     EMAIL_FROM,
 )
-from .email_resend import ResendEmailClient, OutboundEmail
+from .circuit_breaker import CircuitBreaker
+from .db import run_db
+from .email_templates import UnknownEventType, render, render_digest_email
+from .email_resend import AsyncResendEmailClient, ResendEmailClient, ResendRateLimited, OutboundEmail
+from .outbox_wakeup import IdleBackoff, OutboxWakeup, next_wake_delay, open_wakeup
 
 POLL_INTERVAL_SECONDS = 1
 BATCH_SIZE = 10
 
 WORKER_ID = os.getenv("WORKER_ID") or f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
 
+# Async mode (WORKER_MODE=async or `python -m app.worker_notify --async`):
+# sends a claimed batch concurrently and records results with one RPC.
+WORKER_MODE = os.getenv("WORKER_MODE", "sync")
+WORKER_MAX_IN_FLIGHT = int(os.getenv("WORKER_MAX_IN_FLIGHT", "20"))
+MIN_BATCH_SIZE = int(os.getenv("WORKER_MIN_BATCH_SIZE", str(BATCH_SIZE)))
+MAX_BATCH_SIZE = int(os.getenv("WORKER_MAX_BATCH_SIZE", "200"))
+# Idle sleep grows from POLL_INTERVAL_SECONDS up to this cap; a LISTEN
+# notification (DATABASE_URL set) or the next due retry wakes it earlier.
+IDLE_MAX_SECONDS = float(os.getenv("WORKER_IDLE_MAX_SECONDS", "30"))
+
+# Priority lanes (migration 009). A dedicated emergency-lane worker only
+# claims priority 0 rows, so P0 mail never waits behind routine backlog.
+#   WORKER_LANE=all (default) | urgent (P0+P1) | emergency (P0 only)
+LANE_MAX_PRIORITY = {"all": None, "urgent": 1, "emergency": 0}
+WORKER_LANE = os.getenv("WORKER_LANE", "all")
+if WORKER_LANE not in LANE_MAX_PRIORITY:
+    raise RuntimeError(f"WORKER_LANE must be one of {sorted(LANE_MAX_PRIORITY)}")
+MAX_PRIORITY = LANE_MAX_PRIORITY[WORKER_LANE]
+
+# Digest mode (WORKER_DIGEST=1): non-emergency rows are held until the end of
+# their WORKER_DIGEST_WINDOW_SECONDS window, then sent as one email per
+# (to_email, property_address). Emergencies (priority 0) always go out at once.
+DIGEST_ENABLED = os.getenv("WORKER_DIGEST", "0") == "1"
+DIGEST_WINDOW_SECONDS = int(os.getenv("WORKER_DIGEST_WINDOW_SECONDS", "300"))
+
+# Dead letter: after WORKER_MAX_ATTEMPTS transient failures (or on the first
+# permanent one) a row is parked as status='dead' (migration 016).
+WORKER_MAX_ATTEMPTS = int(os.getenv("WORKER_MAX_ATTEMPTS", "8"))
+# Provider circuit breaker: this many consecutive provider failures stops
+# claiming for the cooldown (doubling per failed probe, capped).
+BREAKER_THRESHOLD = int(os.getenv("WORKER_BREAKER_THRESHOLD", "5"))
+BREAKER_COOLDOWN_SECONDS = float(os.getenv("WORKER_BREAKER_COOLDOWN_SECONDS", "30"))
+BREAKER_MAX_COOLDOWN_SECONDS = float(os.getenv("WORKER_BREAKER_MAX_COOLDOWN_SECONDS", "600"))
+# 4xx answers that are about timing, not the message itself
+TRANSIENT_HTTP_STATUSES = {408, 409, 425, 429}
+# 4xx answers about our account (revoked/misconfigured API key, suspended
+# sending): every row would fail the same way, so trip the breaker instead
+PROVIDER_HTTP_STATUSES = {401, 403}
+
 def utc_now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
@@ -26,39 +74,91 @@ def backoff_seconds(attempt: int) -> int:
     return schedule[min(attempt, len(schedule) - 1)]
 
 
-def render_ticket_created(payload: dict) -> tuple[str, str]:
-    ticket = (payload or {}).get("ticket") or {}
-    tid = ticket.get("id", "(unknown)")
-    urgency = ticket.get("urgency", "(n/a)")
-    summary = ticket.get("summary", "(n/a)")
-    address = ticket.get("property_address", "(n/a)")
-    unit = ticket.get("unit", "(n/a)")
-    tenant_name = ticket.get("tenant_name", "(n/a)")
-    tenant_email = ticket.get("tenant_email", "(n/a)")
-    tenant_phone = ticket.get("tenant_phone", "(n/a)")
-
-    subject = f"[PropCare] Ticket #{tid} ({urgency}) created"
-    text = (
-        "A new maintenance ticket was created.\n\n"
-        "Tenant / Contact\n"
-        f"Name:  {tenant_name}\n"
-        f"Email: {tenant_email}\n"
-        f"Phone: {tenant_phone}\n\n"
-        "Property\n"
-        f"Address: {address}\n"
-        f"Unit:    {unit}\n\n"
-        "Ticket\n"
-        f"Summary: {summary}\n"
-        f"Urgency: {urgency}\n\n"
-        "This is an automated message.\n"
-    )
-    return subject, text
+def build_email(row: dict) -> OutboundEmail:
+    # Raises UnknownEventType (permanent, row goes 'dead') for unregistered types
+    rendered = render(row.get("event_type"), row.get("payload") or {})
+    return OutboundEmail(to=row.get("to_email"), subject=rendered.subject, text=rendered.text, html=rendered.html)
+
+
+def _ticket(row: dict) -> dict:
+    return (row.get("payload") or {}).get("ticket") or {}
+
+
+def is_immediate(row: dict) -> bool:
+    """
+    Same rule as the generated priority column (migration 009): priority 0.
+    """
+    if row.get("priority") is not None:
+        return int(row["priority"]) == 0
+    return row.get("event_type") == "ticket.emergency" or _ticket(row).get("urgency") == "P0_EMERGENCY"
+
 
-def claim_due_pending(supabase: Client):
-    # Calls Postgres function: public.claim_due_notifications(worker_id, batch_size)
+def _parse_ts(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def digest_window_end(created_at: str, window_seconds: int) -> datetime:
+    """
+    End of the fixed window containing created_at. Aligned to the epoch so
+    every row in a window becomes due at the same instant and is claimed
+    together.
+    """
+    ts = _parse_ts(created_at).timestamp()
+    end = (int(ts) // window_seconds + 1) * window_seconds
+    return datetime.fromtimestamp(end, tz=timezone.utc)
+
+
+def plan_digest(
+    rows: List[dict],
+    window_seconds: int,
+    now: datetime | None = None,
+) -> Tuple[List[dict], List[List[dict]], List[Dict[str, Any]]]:
+    """
+    Splits a claimed batch into (immediate rows, digest groups, deferred
+    updates). Deferred rows go back to pending until their window ends,
+    keeping attempt_count; they use the failed-row shape of complete_batch().
+    """
+    now = now or datetime.now(timezone.utc)
+    immediate: List[dict] = []
+    groups: Dict[Tuple[str, str], List[dict]] = {}
+    deferred: List[Dict[str, Any]] = []
+    for row in rows:
+        if window_seconds <= 0 or is_immediate(row) or not row.get("created_at"):
+            immediate.append(row)
+            continue
+        window_end = digest_window_end(row["created_at"], window_seconds)
+        if window_end > now:
+            deferred.append({
+                "id": row["id"],
+                "status": "pending",
+                "attempt_count": int(row.get("attempt_count") or 0),
+                "last_error": None,
+                "next_attempt_at": window_end.isoformat(),
+            })
+            continue
+        key = (row.get("to_email") or "", _ticket(row).get("property_address") or "")
+        groups.setdefault(key, []).append(row)
+
+    # a group of one is just a normal email
+    digests = []
+    for group in groups.values():
+        if len(group) == 1:
+            immediate.append(group[0])
+        else:
+            digests.append(group)
+    return immediate, digests, deferred
+
+
+def build_digest_email(rows: List[dict]) -> OutboundEmail:
+    rendered = render_digest_email([_ticket(r) for r in rows])
+    return OutboundEmail(to=rows[0].get("to_email"), subject=rendered.subject, text=rendered.text, html=rendered.html)
+
+
+def claim_due_pending(supabase: Client, batch_size: int = BATCH_SIZE):
+    # Calls Postgres function: public.claim_due_notifications(worker_id, batch_size, max_priority)
     res = supabase.rpc(
         "claim_due_notifications",
-        {"p_worker_id": WORKER_ID, "p_batch_size": BATCH_SIZE},
+        {"p_worker_id": WORKER_ID, "p_batch_size": batch_size, "p_max_priority": MAX_PRIORITY},
     ).execute()
     return res.data or []
 
@@ -72,52 +172,354 @@ def mark_sent(supabase: Client, row_id: int):
     }).eq("id", row_id).execute()
 
 
-def reschedule_failure(supabase: Client, row_id: int, attempt_count: int, err: Exception):
-    next_attempt = attempt_count + 1
-    delay = backoff_seconds(next_attempt)
-    next_at = (datetime.now(timezone.utc) + timedelta(seconds=delay)).isoformat()
+def _http_status(err: Exception) -> int | None:
+    # requests.HTTPError and httpx.HTTPStatusError both carry .response
+    return getattr(getattr(err, "response", None), "status_code", None)
 
-    supabase.table("notification_outbox").update({
+
+def is_permanent(err: Exception) -> bool:
+    """
+    Errors retrying can't fix: no template for the event, or the provider
+    rejected the message itself (4xx other than timing, rate limits or
+    account errors, e.g. 422 invalid recipient).
+    """
+    if isinstance(err, UnknownEventType):
+        return True
+    status = _http_status(err)
+    return (
+        status is not None
+        and 400 <= status < 500
+        and status not in TRANSIENT_HTTP_STATUSES
+        and status not in PROVIDER_HTTP_STATUSES
+    )
+
+
+def is_provider_outage(err: Exception) -> bool:
+    """
+    Failures that say the provider is unhealthy or refusing our account
+    (5xx, 401/403, timeouts, connection errors) and should count towards
+    the circuit breaker.
+    """
+    return not is_permanent(err) and not isinstance(err, ResendRateLimited)
+
+
+def _dead(attempt_count: int, reason: str) -> Dict[str, Any]:
+    return {
+        "status": "dead",
+        "attempt_count": attempt_count,
+        "last_error": reason,
+        "next_attempt_at": utc_now_iso(),
+    }
+
+
+def failure_update(attempt_count: int, err: Exception) -> Dict[str, Any]:
+    if isinstance(err, UnknownEventType):
+        # No template will ever exist for this row: park it instead of retrying
+        return _dead(attempt_count + 1, f"Unknown event_type: {err.args[0] if err.args else None}")
+    if is_permanent(err):
+        return _dead(attempt_count + 1, f"permanent: {err}")
+    if isinstance(err, ResendRateLimited):
+        # Provider asked us to back off: not the message's fault, keep the attempt count
+        next_attempt = attempt_count
+        delay = max(1.0, err.retry_after)
+    else:
+        next_attempt = attempt_count + 1
+        if next_attempt >= WORKER_MAX_ATTEMPTS:
+            return _dead(next_attempt, f"gave up after {next_attempt} attempts: {err}")
+        delay = backoff_seconds(next_attempt)
+    next_at = (datetime.now(timezone.utc) + timedelta(seconds=delay)).isoformat()
+    return {
         "status": "pending",
         "attempt_count": next_attempt,
         "last_error": str(err),
         "next_attempt_at": next_at,
+    }
+
+
+def paused_update(attempt_count: int, breaker: CircuitBreaker) -> Dict[str, Any]:
+    """
+    Row claimed while the breaker opened: hand it back untouched until the
+    breaker's next probe.
+    """
+    delay = max(1.0, breaker.seconds_until_retry())
+    return {
+        "status": "pending",
+        "attempt_count": attempt_count,
+        "last_error": "email provider circuit open",
+        "next_attempt_at": (datetime.now(timezone.utc) + timedelta(seconds=delay)).isoformat(),
+    }
+
+
+def new_breaker() -> CircuitBreaker:
+    return CircuitBreaker(
+        failure_threshold=BREAKER_THRESHOLD,
+        cooldown_seconds=BREAKER_COOLDOWN_SECONDS,
+        max_cooldown_seconds=BREAKER_MAX_COOLDOWN_SECONDS,
+    )
+
+
+def reschedule_failure(supabase: Client, row_id: int, attempt_count: int, err: Exception):
+    supabase.table("notification_outbox").update({
+        **failure_update(attempt_count, err),
         "locked_at": None,
         "locked_by": None,
     }).eq("id", row_id).execute()
 
 
+def next_pending_due_at(supabase: Client):
+    """
+    Earliest next_attempt_at among pending rows in this worker's lane
+    (None if the lane is idle).
+    """
+    q = (
+        supabase.table("notification_outbox")
+        .select("next_attempt_at")
+        .eq("status", "pending")
+    )
+    if MAX_PRIORITY is not None:
+        q = q.lte("priority", MAX_PRIORITY)
+    res = q.order("next_attempt_at").limit(1).execute()
+    return res.data[0]["next_attempt_at"] if res.data else None
+
+
+def complete_batch(supabase: Client, sent_ids: List[Any], failed: List[Dict[str, Any]]) -> None:
+    """
+    Records a whole batch's results in one RPC (migration 007).
+    failed rows: {"id", "status", "attempt_count", "last_error", "next_attempt_at"}
+    """
+    if not sent_ids and not failed:
+        return
+    supabase.rpc(
+        "complete_notifications",
+        {"p_sent": sent_ids, "p_failed": failed},
+    ).execute()
+
+
+class AdaptiveBatchSize:
+    """
+    Grows the claim size while batches come back full (backlog) and shrinks
+    it when they come back mostly empty, within [min_size, max_size].
+    """
+
+    def __init__(self, min_size: int = MIN_BATCH_SIZE, max_size: int = MAX_BATCH_SIZE):
+        self.min_size = max(1, min_size)
+        self.max_size = max(self.min_size, max_size)
+        self.size = self.min_size
+
+    def observe(self, claimed: int) -> None:
+        if claimed >= self.size:
+            self.size = min(self.max_size, self.size * 2)
+        elif claimed < self.size // 2:
+            self.size = max(self.min_size, self.size // 2)
+
+
+async def send_batch_async(
+    email_client: AsyncResendEmailClient,
+    rows: List[dict],
+    in_flight: asyncio.Semaphore,
+    digest_window_seconds: int = 0,
+    breaker: CircuitBreaker | None = None,
+) -> Tuple[List[Any], List[Dict[str, Any]]]:
+    """
+    Sends every row concurrently (bounded by `in_flight`) over the client's
+    keep-alive pool. Returns (sent_ids, failed_updates) for complete_batch().
+    With digest_window_seconds > 0, non-emergency rows are grouped per
+    plan_digest() (deferred rows are returned among the failed updates).
+    Once `breaker` opens, rows not yet sent are handed back unchanged.
+    """
+    def observe(err: Exception | None) -> None:
+        if breaker is None:
+            return
+        if err is None:
+            breaker.record_success()
+        elif is_provider_outage(err):
+            breaker.record_failure()
+
+    async def send(email: OutboundEmail) -> bool:
+        async with in_flight:
+            if breaker is not None and not breaker.allow():
+                return False
+            try:
+                await email_client.send(email)
+            except Exception as e:
+                observe(e)
+                raise
+            observe(None)
+            return True
+
+    async def one(row: dict):
+        attempt_count = int(row.get("attempt_count") or 0)
+        try:
+            if not await send(build_email(row)):
+                return row["id"], {"id": row["id"], **paused_update(attempt_count, breaker)}
+            print(f"[worker] sent {row.get('event_type')} row={row['id']} to={row.get('to_email')}")
+            return row["id"], None
+        except Exception as e:
+            print(f"[worker] failed row={row['id']} attempt={attempt_count + 1} err={e}")
+            return row["id"], {"id": row["id"], **failure_update(attempt_count, e)}
+
+    async def digest(group: List[dict]):
+        try:
+            email = build_digest_email(group)
+            if not await send(email):
+                return [
+                    (row["id"], {"id": row["id"], **paused_update(int(row.get("attempt_count") or 0), breaker)})
+                    for row in group
+                ]
+            print(f"[worker] sent digest of {len(group)} rows to={email.to}")
+            return [(row["id"], None) for row in group]
+        except Exception as e:
+            print(f"[worker] failed digest of {len(group)} rows err={e}")
+            return [
+                (row["id"], {"id": row["id"], **failure_update(int(row.get("attempt_count") or 0), e)})
+                for row in group
+            ]
+
+    immediate, groups, deferred = plan_digest(rows, digest_window_seconds)
+    singles, digests = await asyncio.gather(
+        asyncio.gather(*(one(r) for r in immediate)),
+        asyncio.gather(*(digest(g) for g in groups)),
+    )
+    results = list(singles) + [r for group in digests for r in group]
+    sent = [row_id for row_id, fail in results if fail is None]
+    failed = [fail for _, fail in results if fail is not None] + deferred
+    return sent, failed
+
+
+async def idle_wait(supabase: Client, wakeup: OutboxWakeup, backoff: IdleBackoff) -> bool:
+    """
+    Sleeps until a new-row notification, the earliest scheduled retry, or
+    the idle backoff elapses, whichever comes first. True if notified.
+    """
+    due_at = await run_db(next_pending_due_at, supabase)
+    return await wakeup.wait(next_wake_delay(backoff.next(), due_at))
+
+
+async def amain(wakeup: OutboxWakeup | None = None):
+    supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+    email_client = AsyncResendEmailClient(
+        api_key=RESEND_API_KEY,
+        from_email=EMAIL_FROM,
+        pool_size=WORKER_MAX_IN_FLIGHT,
+    )
+    in_flight = asyncio.Semaphore(WORKER_MAX_IN_FLIGHT)
+    batch = AdaptiveBatchSize()
+    wakeup = wakeup or open_wakeup(DATABASE_URL)
+    backoff = IdleBackoff(POLL_INTERVAL_SECONDS, IDLE_MAX_SECONDS)
+    breaker = new_breaker()
+
+    print(
+        f"[worker] started (async, lane={WORKER_LANE}, in_flight={WORKER_MAX_IN_FLIGHT}, "
+        f"wakeup={type(wakeup).__name__}, digest={DIGEST_WINDOW_SECONDS if DIGEST_ENABLED else 'off'})."
+    )
+
+    try:
+        while True:
+            # Provider down: don't claim (and re-fail) rows until the cooldown ends
+            if not breaker.allow():
+                print(f"[worker] email provider circuit open; pausing {breaker.seconds_until_retry():.0f}s")
+                await asyncio.sleep(breaker.seconds_until_retry())
+                continue
+
+            # half-open: a single row probes the provider
+            size = 1 if breaker.state == "half_open" else batch.size
+            rows = await run_db(claim_due_pending, supabase, size)
+            if rows:
+                backoff.reset()
+                sent, failed = await send_batch_async(
+                    email_client, rows, in_flight,
+                    DIGEST_WINDOW_SECONDS if DIGEST_ENABLED else 0,
+                    breaker,
+                )
+                await run_db(complete_batch, supabase, sent, failed)
+            batch.observe(len(rows))
+
+            # Full batch means backlog: claim again right away
+            if len(rows) < size:
+                if await idle_wait(supabase, wakeup, backoff):
+                    backoff.reset()
+    finally:
+        await wakeup.close()
+        await email_client.aclose()
+
+
+def send_sync(email_client: ResendEmailClient, email: OutboundEmail, breaker: CircuitBreaker) -> None:
+    """
+    Sends one email; only the provider call's outcome feeds the breaker.
+    """
+    try:
+        email_client.send(email)
+    except Exception as e:
+        if is_provider_outage(e):
+            breaker.record_failure()
+        raise
+    breaker.record_success()
+
+
+def process_row_sync(supabase: Client, email_client: ResendEmailClient, row: dict, breaker: CircuitBreaker) -> None:
+    row_id = row["id"]
+    attempt_count = int(row.get("attempt_count") or 0)
+
+    if not breaker.allow():
+        complete_batch(supabase, [], [{"id": row_id, **paused_update(attempt_count, breaker)}])
+        return
+
+    try:
+        # a bad template/payload is this row's problem, not the provider's
+        email = build_email(row)
+        send_sync(email_client, email, breaker)
+    except Exception as e:
+        reschedule_failure(supabase, row_id, attempt_count, e)
+        print(f"[worker] failed row={row_id} attempt={attempt_count + 1} err={e}")
+        return
+
+    mark_sent(supabase, row_id)
+    print(f"[worker] sent {row.get('event_type')} row={row_id} to={row.get('to_email')}")
+
+
 def main():
     supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
     email_client = ResendEmailClient(api_key=RESEND_API_KEY, from_email=EMAIL_FROM)
 
-    print("[worker] started. polling outbox...")
+    breaker = new_breaker()
 
-    while True:
-        rows = claim_due_pending(supabase)
-        for row in rows:
-            row_id = row["id"]
-            event_type = row.get("event_type")
-            to_email = row.get("to_email")
-            payload = row.get("payload") or {}
-            attempt_count = int(row.get("attempt_count") or 0)
+    print(f"[worker] started (lane={WORKER_LANE}). polling outbox...")
 
-            try:
-                if event_type == "ticket.created":
-                    subject, text = render_ticket_created(payload)
-                else:
-                    raise RuntimeError(f"Unknown event_type: {event_type}")
+    while True:
+        if not breaker.allow():
+            print(f"[worker] email provider circuit open; pausing {breaker.seconds_until_retry():.0f}s")
+            time.sleep(breaker.seconds_until_retry())
+            continue
 
-                email_client.send(OutboundEmail(to=to_email, subject=subject, text=text))
-                mark_sent(supabase, row_id)
-                print(f"[worker] sent {event_type} row={row_id} to={to_email}")
+        rows = claim_due_pending(supabase, 1 if breaker.state == "half_open" else BATCH_SIZE)
+        groups: List[List[dict]] = []
+        if DIGEST_ENABLED:
+            rows, groups, deferred = plan_digest(rows, DIGEST_WINDOW_SECONDS)
+            complete_batch(supabase, [], deferred)
 
+        for group in groups:
+            if not breaker.allow():
+                complete_batch(supabase, [], [
+                    {"id": row["id"], **paused_update(int(row.get("attempt_count") or 0), breaker)} for row in group
+                ])
+                continue
+            try:
+                send_sync(email_client, build_digest_email(group), breaker)
+                complete_batch(supabase, [row["id"] for row in group], [])
+                print(f"[worker] sent digest of {len(group)} rows to={group[0].get('to_email')}")
             except Exception as e:
-                reschedule_failure(supabase, row_id, attempt_count, e)
-                print(f"[worker] failed row={row_id} attempt={attempt_count + 1} err={e}")
+                for row in group:
+                    reschedule_failure(supabase, row["id"], int(row.get("attempt_count") or 0), e)
+                print(f"[worker] failed digest of {len(group)} rows err={e}")
+
+        for row in rows:
+            process_row_sync(supabase, email_client, row, breaker)
 
         time.sleep(POLL_INTERVAL_SECONDS)
 
 
 if __name__ == "__main__":
-    main()
+    if WORKER_MODE == "async" or "--async" in sys.argv[1:]:
+        asyncio.run(amain())
+    else:
+        main()
@@ -0,0 +1,124 @@
+# app/writebehind.py
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from . import metrics
+from .config import (
+    WRITE_BEHIND_ENABLED,
+    WRITE_BEHIND_MAX_QUEUE,
+    WRITE_BEHIND_MAX_RETRIES,
+    WRITE_BEHIND_WORKERS,
+)
+
+Job = Callable[[], Awaitable[None]]
+
+
+class WriteBehindQueue:
+    """
+    In-process write-behind stage for post-reply persistence.
+
+    Jobs are sharded by key (the ticket id) onto a fixed number of FIFO
+    queues with one worker each, so writes for one ticket apply in order
+    while different tickets proceed in parallel. Queues are bounded:
+    submit() waits when a shard is full (backpressure instead of unbounded
+    memory). Failed jobs are retried with exponential backoff; stop()
+    drains everything before returning (call it on shutdown).
+
+    Jobs only live in memory: a crash loses whatever is queued, so only
+    writes that can be lost (no outbox enqueue) belong here. Jobs that
+    exhaust their retries are kept in `failed` rather than dropped;
+    retry_failed() resubmits them.
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int = 4,
+        max_queue: int = 1000,
+        max_retries: int = 5,
+        retry_base_seconds: float = 0.5,
+    ):
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self.retry_base_seconds = retry_base_seconds
+        self._queues: List[asyncio.Queue] = []
+        self._tasks: List[asyncio.Task] = []
+        self.failed: List[Tuple[int, str, Job]] = []
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._queues = [asyncio.Queue(maxsize=self.max_queue) for _ in range(self.workers)]
+        self._tasks = [asyncio.create_task(self._worker(q)) for q in self._queues]
+
+    async def submit(self, key: int, job: Job, *, name: str = "job") -> None:
+        self.start()
+        await self._queues[key % self.workers].put((key, name, job))
+        metrics.incr("writebehind.submitted")
+
+    async def retry_failed(self) -> int:
+        """
+        Resubmits jobs that gave up (e.g. once the database is back).
+        Returns how many were resubmitted.
+        """
+        failed, self.failed = self.failed, []
+        for key, name, job in failed:
+            await self.submit(key, job, name=name)
+        return len(failed)
+
+    async def flush(self) -> None:
+        await asyncio.gather(*(q.join() for q in self._queues))
+
+    async def stop(self) -> None:
+        if not self._tasks:
+            return
+        await self.flush()
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks, self._queues = [], []
+        for _, name, _ in self.failed:
+            print(f"[write-behind] UNAPPLIED at shutdown: {name}")
+
+    def pending(self) -> int:
+        return sum(q.qsize() for q in self._queues)
+
+    async def _worker(self, q: asyncio.Queue) -> None:
+        while True:
+            item: Tuple[int, str, Job] = await q.get()
+            try:
+                await self._run(*item)
+            finally:
+                q.task_done()
+
+    async def _run(self, key: int, name: str, job: Job) -> None:
+        for attempt in range(self.max_retries + 1):
+            try:
+                await job()
+                metrics.incr("writebehind.ok")
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    # keep it for retry_failed(); never drop a write silently
+                    self.failed.append((key, name, job))
+                    metrics.incr("writebehind.failed")
+                    print(f"[write-behind] giving up {name} after {attempt + 1} attempts, kept for retry: {e}")
+                    return
+                metrics.incr("writebehind.retried")
+                print(f"[write-behind] {name} failed (attempt {attempt + 1}), retrying: {e}")
+                await asyncio.sleep(self.retry_base_seconds * (2 ** attempt))
+
+
+# Process-wide queue used by the orchestrator when WRITE_BEHIND_ENABLED=1.
+default_queue: Optional[WriteBehindQueue] = (
+    WriteBehindQueue(
+        workers=WRITE_BEHIND_WORKERS,
+        max_queue=WRITE_BEHIND_MAX_QUEUE,
+        max_retries=WRITE_BEHIND_MAX_RETRIES,
+    )
+    if WRITE_BEHIND_ENABLED
+    else None
+)
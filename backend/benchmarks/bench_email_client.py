@@ -0,0 +1,84 @@
+# benchmarks/bench_email_client.py
+"""
+Throughput of ResendEmailClient against a local fake Resend endpoint.
+
+Run from backend/:
+    python -m benchmarks.bench_email_client
+
+Compares a fresh requests.post per email (the old client) with the pooled
+keep-alive session, and with /emails/batch. Plain HTTP on loopback, so
+the gap understates production, where every new connection also pays
+a TLS handshake.
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from app.email_resend import OutboundEmail, ResendEmailClient
+
+N = 500
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        data = b'{"id":"x"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def _per_second(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return N / (time.perf_counter() - start)
+
+
+def main() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    emails = [OutboundEmail(to=f"m{i}@example.com", subject="Ticket", text="Body") for i in range(N)]
+    client = ResendEmailClient("key", "from@example.com", base_url=url)
+
+    def fresh_connection_each():
+        for m in emails:
+            requests.post(
+                url + "/emails",
+                headers={"Authorization": "Bearer key", "Content-Type": "application/json"},
+                data=json.dumps(client._payload(m)),
+                timeout=10,
+            ).raise_for_status()
+
+    def pooled():
+        for m in emails:
+            client.send(m)
+
+    def batched():
+        client.send_batch(emails)
+
+    print(f"{N} emails, emails/sec")
+    print(f"requests.post per email : {_per_second(fresh_connection_each):9.0f}")
+    print(f"pooled session          : {_per_second(pooled):9.0f}")
+    print(f"batch endpoint          : {_per_second(batched):9.0f}")
+
+    client.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
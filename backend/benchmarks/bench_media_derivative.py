@@ -0,0 +1,73 @@
+# benchmarks/bench_media_derivative.py
+"""
+What verify_image is sent per photo: the original vs the downscaled
+derivative from app.media_derive (needs Pillow).
+
+Run from backend/:
+    python -m benchmarks.bench_media_derivative
+
+Synthetic JPEGs at common phone sizes (gradient + noise so they compress
+like real photos, not flat colour). For each: original and derivative
+bytes, base64 data-URL bytes (the actual request body), time to build the
+derivative, and time to base64 each. The model-side saving (vision tokens,
+upload time) scales with the data-URL size and isn't measured here.
+"""
+from __future__ import annotations
+
+import base64
+import io
+import time
+from statistics import median
+
+from PIL import Image
+
+from app.media_derive import make_derivative
+
+PHOTOS = [
+    ("12MP landscape", 4032, 3024, 1),
+    ("12MP portrait (EXIF 6)", 4032, 3024, 6),
+    ("48MP binned 12MP", 4000, 3000, 1),
+    ("8MP", 3264, 2448, 1),
+    ("1080p screenshot", 1920, 1080, 1),
+]
+ROUNDS = 5
+
+
+def _photo(width: int, height: int, orientation: int) -> bytes:
+    base = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    noise = Image.effect_noise((width, height), 40).convert("RGB")
+    img = Image.blend(base, noise, 0.35)
+    exif = Image.Exif()
+    exif[0x0112] = orientation
+    out = io.BytesIO()
+    img.save(out, "JPEG", quality=90, exif=exif)
+    return out.getvalue()
+
+
+def _timed(fn, rounds: int = ROUNDS) -> tuple:
+    times, result = [], None
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+    return result, median(times)
+
+
+def main() -> None:
+    print(f"{'photo':<24} {'orig KB':>8} {'url KB':>8} {'deriv KB':>9} {'url KB':>8} "
+          f"{'saved':>6} {'derive ms':>10} {'b64 orig':>9} {'b64 deriv':>10}")
+    for name, w, h, orientation in PHOTOS:
+        original = _photo(w, h, orientation)
+        derivative, derive_s = _timed(lambda: make_derivative(io.BytesIO(original)))
+        orig_url, b64_orig_s = _timed(lambda: base64.b64encode(original))
+        deriv_url, b64_deriv_s = _timed(lambda: base64.b64encode(derivative.data))
+        saved = 1 - len(deriv_url) / len(orig_url)
+        print(
+            f"{name:<24} {len(original) / 1024:>8.0f} {len(orig_url) / 1024:>8.0f} "
+            f"{len(derivative.data) / 1024:>9.0f} {len(deriv_url) / 1024:>8.0f} {saved:>6.0%} "
+            f"{derive_s * 1000:>10.1f} {b64_orig_s * 1000:>8.2f}ms {b64_deriv_s * 1000:>8.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
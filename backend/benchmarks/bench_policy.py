@@ -0,0 +1,101 @@
+# benchmarks/bench_policy.py
+"""
+Microbenchmark for the policy keyword engine.
+
+Run from backend/:
+    python -m benchmarks.bench_policy
+
+Times detect_emergency / should_escalate on the real keyword lists,
+compares the per-keyword `any(k in t ...)` scan with the trie regex as the
+keyword list grows (KeywordMatcher switches at REGEX_MIN_KEYWORDS), and
+full vs incremental history scanning as the conversation grows.
+"""
+from __future__ import annotations
+
+import random
+import string
+import time
+import timeit
+
+from app import policy
+from app.policy import ESCALATION_MATCHER, IncrementalScanner, KeywordMatcher, detect_emergency, should_escalate
+from app.schemas import Message
+
+TENANT_TEXT = (
+    "Hi, the kitchen sink has been dripping since yesterday evening and now "
+    "there's some water under the cabinet. I put a bucket there already."
+)
+
+
+def _synthetic_keywords(n: int, rng: random.Random) -> list[str]:
+    words = []
+    for _ in range(n):
+        words.append(" ".join(
+            "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 8)))
+            for _ in range(rng.randint(1, 3))
+        ))
+    return words
+
+
+def _naive_scan(groups: dict[str, list[str]], text: str) -> set[str]:
+    t = text.lower()
+    return {g for g, words in groups.items() if any(k in t for k in words)}
+
+
+def _per_call_us(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def bench_real_lists() -> None:
+    msgs = [
+        Message(role="user" if i % 2 == 0 else "assistant", content=TENANT_TEXT)
+        for i in range(6)
+    ]
+    print("real keyword lists | us/call")
+    print(f"detect_emergency   | {_per_call_us(lambda: detect_emergency(TENANT_TEXT), 20000):7.2f}")
+    print(f"should_escalate x6 | {_per_call_us(lambda: should_escalate(msgs), 5000):7.2f}")
+
+
+def bench_keyword_growth() -> None:
+    rng = random.Random(42)
+    print("\nkeywords | naive any() us/call | trie regex us/call")
+    threshold = policy.REGEX_MIN_KEYWORDS
+    for n in (25, 50, 100, 400, 1600):
+        words = _synthetic_keywords(n, rng)
+        groups = {f"g{i}": words[i::8] for i in range(8)}
+        policy.REGEX_MIN_KEYWORDS = 1  # force the regex path for comparison
+        matcher = KeywordMatcher(groups)
+        policy.REGEX_MIN_KEYWORDS = threshold
+        naive = _per_call_us(lambda: _naive_scan(groups, TENANT_TEXT), 2000)
+        compiled = _per_call_us(lambda: matcher.scan(TENANT_TEXT), 2000)
+        print(f"{n:8d} | {naive:19.2f} | {compiled:18.2f}")
+
+
+def bench_history_growth() -> None:
+    print("\nmessages | full rescan us/turn | incremental us/turn")
+    for n in (4, 16, 64, 256):
+        msgs = [
+            Message(role="user" if i % 2 == 0 else "assistant", content=TENANT_TEXT)
+            for i in range(n)
+        ]
+        full = _per_call_us(
+            lambda: ESCALATION_MATCHER.scan(" ".join(m.content for m in msgs)), 500
+        )
+
+        # feed the existing history once, then time one new message per turn
+        scanner = IncrementalScanner(ESCALATION_MATCHER)
+        scanner.feed(msgs)
+        turns = 500
+        start = time.perf_counter()
+        for _ in range(turns):
+            msgs.append(Message(role="user", content=TENANT_TEXT))
+            scanner.feed(msgs)
+        incremental = (time.perf_counter() - start) / turns * 1e6
+
+        print(f"{n:8d} | {full:19.2f} | {incremental:19.2f}")
+
+
+if __name__ == "__main__":
+    bench_real_lists()
+    bench_keyword_growth()
+    bench_history_growth()
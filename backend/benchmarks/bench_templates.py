@@ -0,0 +1,68 @@
+# benchmarks/bench_templates.py
+"""
+Cost of rendering outbox rows with the template registry.
+
+Run from backend/:
+    python -m benchmarks.bench_templates
+
+Renders N rows per event type (subject + text + escaped HTML) with the
+templates compiled once at import, against re-building the Template
+objects for every row, and times build_email over a max-size claim
+batch as the worker does it.
+"""
+from __future__ import annotations
+
+import time
+from string import Template
+
+from app.email_templates import TEMPLATES, EmailTemplate, _fields, render
+from app.worker_notify import MAX_BATCH_SIZE, build_email
+
+N = 20_000
+
+
+def _payload(i: int) -> dict:
+    return {"ticket": {
+        "id": i, "urgency": "P1_URGENT", "status": "action_required", "category": "hvac",
+        "summary": f"No heat in unit {i % 40} since Monday <b>", "property_address": "1 Main St",
+        "unit": str(i % 40), "tenant_name": "Sam Tenant", "tenant_phone": "555-0100",
+        "tenant_email": "sam@example.com",
+    }}
+
+
+def _recompiled(event_type: str, payload: dict):
+    tpl = TEMPLATES[event_type]
+    fresh = EmailTemplate(
+        subject=Template(tpl.subject.template),
+        text=Template(tpl.text.template),
+        html=Template(tpl.html.template),
+    )
+    return fresh.render(_fields(payload["ticket"]))
+
+
+def _rate(fn, n: int) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return n / (time.perf_counter() - t0)
+
+
+def main() -> None:
+    payloads = [_payload(i) for i in range(N)]
+    print(f"{'event_type':<24} {'registry/s':>12} {'recompile/s':>12}")
+    for event_type in TEMPLATES:
+        reg = _rate(lambda: [render(event_type, p) for p in payloads], N)
+        rec = _rate(lambda: [_recompiled(event_type, p) for p in payloads], N)
+        print(f"{event_type:<24} {reg:>12,.0f} {rec:>12,.0f}")
+
+    rows = [{"id": i, "event_type": "ticket.action_required", "to_email": "mgr@example.com",
+             "payload": _payload(i)} for i in range(MAX_BATCH_SIZE)]
+    t0 = time.perf_counter()
+    for _ in range(100):
+        for row in rows:
+            build_email(row)
+    per_batch = (time.perf_counter() - t0) / 100
+    print(f"\nbuild_email over a {MAX_BATCH_SIZE}-row batch: {per_batch * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
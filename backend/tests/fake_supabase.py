@@ -1,26 +1,195 @@
+import operator
+import re
+
+_OPS = {"eq": operator.eq, "neq": operator.ne, "lt": operator.lt, "lte": operator.le, "gt": operator.gt, "gte": operator.ge}
+
+def _split_top(expr):
+    parts, depth, cur = [], 0, ""
+    for ch in expr:
+        if ch == "," and depth == 0:
+            parts.append(cur)
+            cur = ""
+            continue
+        depth += ch == "("
+        depth -= ch == ")"
+        cur += ch
+    return parts + [cur]
+
+def _logic_tree(expr, combine=any):
+    """
+    Predicate for a PostgREST or=(...)/and(...) filter string (eq/lt/gt/... only).
+    """
+    preds = []
+    for part in _split_top(expr):
+        m = re.fullmatch(r"(and|or)\((.*)\)", part)
+        if m:
+            preds.append(_logic_tree(m.group(2), all if m.group(1) == "and" else any))
+            continue
+        col, op, value = part.split(".", 2)
+        if value.startswith('"'):
+            value = value[1:-1].replace('\\"', '"')
+        preds.append(lambda row, c=col, f=_OPS[op], v=value: row.get(c) is not None and f(str(row.get(c)), v))
+    return lambda row: combine(p(row) for p in preds)
+
 class FakeInsertResult:
-    def __init__(self, data):
+    def __init__(self, data, count=None):
         self.data = data
+        self.count = count
 
 class FakeTable:
-    def __init__(self, store):
+    def __init__(self, store, log=None, name="tickets"):
         self.store = store
+        self.log = log if log is not None else []
+        self.name = name
+        self._op = None
+        self._payload = None
+        self._filters = []
+        self._preds = []
+        self._order = []
+        self._limit = None
+        self._count = None
 
     def insert(self, payload):
-        # emulate Supabase insert; generate ID
-        new_id = len(self.store) + 1
-        row = {"id": new_id, **payload}
-        self.store.append(row)
+        self._op = "insert"
+        self._payload = payload
+        return self
+
+    def upsert(self, payload, on_conflict="id", ignore_duplicates=False):
+        self._op = "upsert"
+        self._payload = payload
+        self._conflict = [c.strip() for c in on_conflict.split(",")]
+        self._ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, patch):
+        self._op = "update"
+        self._payload = patch
+        return self
+
+    def select(self, *columns, count=None, **kwargs):
+        self._op = "select"
+        self._count = count
+        return self
+
+    def eq(self, column, value):
+        self._filters.append((column, value))
+        return self
+
+    def lt(self, column, value):
+        self._preds.append(lambda row: row.get(column) is not None and row.get(column) < value)
+        return self
+
+    def lte(self, column, value):
+        self._preds.append(lambda row: row.get(column) is not None and row.get(column) <= value)
+        return self
+
+    def gt(self, column, value):
+        self._preds.append(lambda row: row.get(column) is not None and row.get(column) > value)
         return self
 
+    def or_(self, filters):
+        self._preds.append(_logic_tree(filters))
+        return self
+
+    def order(self, column, desc=False):
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def _matches(self, row):
+        return all(row.get(c) == v for c, v in self._filters) and all(p(row) for p in self._preds)
+
     def execute(self):
-        # return last inserted row like supabase-py does
-        return FakeInsertResult([self.store[-1]])
+        self.log.append((self.name, self._op))
+        if self._op == "insert":
+            # emulate Supabase insert; generate ID
+            rows = self._payload if isinstance(self._payload, list) else [self._payload]
+            out = []
+            for payload in rows:
+                row = {"id": len(self.store) + 1, **payload}
+                self.store.append(row)
+                out.append(row)
+            # return inserted rows like supabase-py does
+            return FakeInsertResult(out)
+        if self._op == "upsert":
+            # like PostgREST: only inserted/updated rows come back
+            rows = self._payload if isinstance(self._payload, list) else [self._payload]
+            out = []
+            for payload in rows:
+                key = [payload.get(c) for c in self._conflict]
+                existing = next((r for r in self.store if [r.get(c) for c in self._conflict] == key), None)
+                if existing is None:
+                    row = {"id": len(self.store) + 1, **payload}
+                    self.store.append(row)
+                    out.append(row)
+                elif not self._ignore_duplicates:
+                    existing.update(payload)
+                    out.append(existing)
+            return FakeInsertResult(out)
+        if self._op == "update":
+            out = []
+            for row in self.store:
+                if self._matches(row):
+                    row.update(self._payload)
+                    out.append(row)
+            return FakeInsertResult(out)
+        out = [row for row in self.store if self._matches(row)]
+        for column, desc in reversed(self._order):
+            out.sort(key=lambda r: r.get(column), reverse=desc)
+        out = [dict(r) for r in out]  # PostgREST returns copies
+        count = len(out) if self._count else None
+        return FakeInsertResult(out[: self._limit] if self._limit else out, count)
 
 class FakeSupabase:
     def __init__(self):
-        self.rows = []
+        self.tables = {"tickets": []}
+        self.log = []  # (table, op) per executed query
+        self.storage = FakeStorage()
+
+    @property
+    def rows(self):
+        return self.tables["tickets"]
 
     def table(self, name: str):
-        assert name == "tickets"
-        return FakeTable(self.rows)
+        return FakeTable(self.tables.setdefault(name, []), self.log, name)
+
+class FakeBucket:
+    def __init__(self, objects, name, sign_calls=None):
+        self.objects = objects
+        self.name = name
+        self.sign_calls = sign_calls if sign_calls is not None else []
+
+    def upload(self, path, file, file_options=None):
+        data = file if isinstance(file, bytes) else file.read()
+        self.objects[(self.name, path)] = data
+        return {"Key": f"{self.name}/{path}"}
+
+    def download(self, path):
+        return self.objects[(self.name, path)]
+
+    def remove(self, paths):
+        for p in paths:
+            self.objects.pop((self.name, p), None)
+        return []
+
+    def create_signed_url(self, path, ttl):
+        self.sign_calls.append([path])
+        return {"signedURL": f"https://storage.test/{self.name}/{path}?ttl={ttl}"}
+
+    def create_signed_urls(self, paths, ttl):
+        self.sign_calls.append(list(paths))
+        return [
+            {"path": p, "error": None, "signedURL": f"https://storage.test/{self.name}/{p}?ttl={ttl}"}
+            for p in paths
+        ]
+
+class FakeStorage:
+    def __init__(self):
+        self.objects = {}  # (bucket, path) -> bytes
+        self.sign_calls = []  # paths per create_signed_url(s) request
+
+    def from_(self, bucket):
+        return FakeBucket(self.objects, bucket, self.sign_calls)
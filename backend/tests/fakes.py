@@ -2,3 +2,29 @@ class FakeLLMResponse:
     def __init__(self, output_text: str = "", output=None):
         self.output_text = output_text
         self.output = output or []
+
+class FakeStreamEvent:
+    def __init__(self, type: str, **fields):
+        self.type = type
+        for k, v in fields.items():
+            setattr(self, k, v)
+
+class FakeResponses:
+    """client.responses stand-in; create(stream=True) replays `events`."""
+    def __init__(self, events=None, output_text: str = ""):
+        self.events = events or []
+        self.output_text = output_text
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        if kwargs.get("stream"):
+            async def gen():
+                for e in self.events:
+                    yield e
+            return gen()
+        return FakeLLMResponse(output_text=self.output_text)
+
+class FakeLLMClient:
+    def __init__(self, **kwargs):
+        self.responses = FakeResponses(**kwargs)
@@ -4,6 +4,7 @@ from unittest.mock import AsyncMock, patch
 from app.main import app
 from app.schemas import Message
 from app.schemas import TriageState
+from app.sessions import SessionStore
 
 client = TestClient(app)
 
@@ -19,3 +20,73 @@ def test_chat_endpoint_returns_ticket_created():
     assert data["ticket_created"] is True
     assert data["ticket_id"] == 123
     assert "Ticket" in data["reply"]
+
+def test_chat_session_sends_only_new_message_and_keeps_ticket():
+    seen = []
+
+    async def fake_turn(llm_client, supabase, state):
+        seen.append((state.ticket_id, [m.content for m in state.messages]))
+        state.ticket_id = 42
+        state.ticket_created = True
+        state.messages.append(Message(role="assistant", content="Got it."))
+        return state
+
+    with patch("app.main.run_triage_turn", new=fake_turn):
+        r1 = client.post("/chat", json={"message": "Sink is leaking"})
+        session_id = r1.json()["session_id"]
+        r2 = client.post("/chat", json={"session_id": session_id, "message": "Kitchen sink"})
+
+    assert r2.status_code == 200
+    assert r2.json()["ticket_id"] == 42
+    assert seen[1] == (42, ["Sink is leaking", "Got it.", "Kitchen sink"])
+
+def test_new_session_cannot_bind_an_existing_ticket():
+    seen = []
+
+    async def fake_turn(llm_client, supabase, state):
+        seen.append((state.ticket_id, state.ticket_created))
+        state.messages.append(Message(role="assistant", content="Got it."))
+        return state
+
+    with patch("app.main.run_triage_turn", new=fake_turn):
+        r = client.post("/chat", json={"message": "Sink is leaking", "ticket_id": 7})
+
+    assert r.status_code == 200
+    assert seen == [(None, False)]
+
+def test_expired_session_is_rejected_instead_of_starting_over():
+    calls = []
+
+    async def fake_turn(llm_client, supabase, state):
+        calls.append(state)
+        state.messages.append(Message(role="assistant", content="Got it."))
+        return state
+
+    # ttl 0: the session is expired by the time the next turn arrives
+    with patch("app.main.session_store", SessionStore(ttl_seconds=0)), \
+         patch("app.main.run_triage_turn", new=fake_turn):
+        session_id = client.post("/chat", json={"message": "Sink is leaking"}).json()["session_id"]
+        r = client.post("/chat", json={"session_id": session_id, "message": "Kitchen sink"})
+        unknown = client.post("/chat", json={"session_id": "nope", "message": "hello"})
+
+    assert r.status_code == 404 and "expired" in r.json()["detail"]
+    assert unknown.status_code == 404
+    assert len(calls) == 1  # no new thread/ticket was started
+
+def test_chat_stream_emits_deltas_then_done():
+    async def fake_stream(llm_client, supabase, state):
+        yield "delta", "Got "
+        yield "delta", "it."
+        state.ticket_id = 9
+        state.ticket_created = True
+        state.messages.append(Message(role="assistant", content="Got it."))
+        yield "state", state
+
+    with patch("app.main.stream_triage_turn", new=fake_stream):
+        r = client.post("/chat/stream", json={"message": "Sink is leaking"})
+
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/event-stream")
+    events = [block.split("\n") for block in r.text.strip().split("\n\n")]
+    assert [e[0] for e in events] == ["event: delta", "event: delta", "event: done"]
+    assert '"ticket_id": 9' in events[-1][1]
@@ -0,0 +1,45 @@
+from app.circuit_breaker import CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_after_threshold_and_probes_after_cooldown():
+    clock = FakeClock()
+    b = CircuitBreaker(failure_threshold=3, cooldown_seconds=10, clock=clock)
+
+    b.record_failure()
+    b.record_failure()
+    assert b.state == "closed" and b.allow()
+    b.record_failure()
+    assert b.state == "open" and not b.allow()
+    assert b.seconds_until_retry() == 10
+
+    clock.now = 10
+    assert b.state == "half_open" and b.allow()
+    b.record_success()
+    assert b.state == "closed" and b.failures == 0
+
+
+def test_failed_probe_doubles_cooldown_up_to_cap():
+    clock = FakeClock()
+    b = CircuitBreaker(failure_threshold=1, cooldown_seconds=10, max_cooldown_seconds=30, clock=clock)
+
+    b.record_failure()
+    waits = []
+    for _ in range(3):
+        clock.now += b.seconds_until_retry()
+        assert b.state == "half_open"
+        b.record_failure()
+        waits.append(b.seconds_until_retry())
+    assert waits == [20, 30, 30]
+
+    clock.now += 30
+    b.record_success()
+    b.record_failure()
+    assert b.seconds_until_retry() == 10
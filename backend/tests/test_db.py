@@ -0,0 +1,32 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app import db
+
+
+@pytest.mark.asyncio
+async def test_run_db_does_not_block_event_loop():
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    t = asyncio.create_task(ticker())
+    await db.run_db(time.sleep, 0.2)
+    t.cancel()
+
+    # a blocking call on the loop would have starved the ticker
+    assert ticks >= 5
+
+
+@pytest.mark.asyncio
+async def test_run_db_runs_off_loop_thread():
+    loop_thread = threading.get_ident()
+    worker_thread = await db.run_db(threading.get_ident)
+    assert worker_thread != loop_thread
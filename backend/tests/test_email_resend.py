@@ -0,0 +1,118 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.email_resend import (
+    AsyncResendEmailClient,
+    OutboundEmail,
+    ResendEmailClient,
+    ResendRateLimited,
+)
+
+
+class FakeResend:
+    """Local HTTP/1.1 keep-alive server that records requests and connections."""
+
+    def __init__(self, rate_limit_first=0, retry_after="0"):
+        self.requests = []
+        self.connections = set()
+        self.rate_limit_left = rate_limit_first
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                fake.connections.add(self.client_address)
+                fake.requests.append((self.path, body))
+                if fake.rate_limit_left > 0:
+                    fake.rate_limit_left -= 1
+                    self._reply(429, {"message": "slow down"}, {"Retry-After": retry_after})
+                else:
+                    self._reply(200, {"id": str(len(fake.requests))})
+
+            def _reply(self, code, obj, headers=None):
+                data = json.dumps(obj).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def fake_resend():
+    servers = []
+
+    def make(**kwargs):
+        servers.append(FakeResend(**kwargs))
+        return servers[-1]
+
+    yield make
+    for s in servers:
+        s.close()
+
+
+def _emails(n):
+    return [OutboundEmail(to=f"m{i}@example.com", subject="s", text="t") for i in range(n)]
+
+
+def test_sync_client_reuses_one_connection(fake_resend):
+    srv = fake_resend()
+    client = ResendEmailClient("key", "from@example.com", base_url=srv.url)
+    for msg in _emails(20):
+        client.send(msg)
+    client.close()
+
+    assert len(srv.requests) == 20
+    assert len(srv.connections) == 1
+
+
+def test_send_batch_chunks_at_provider_limit(fake_resend):
+    srv = fake_resend()
+    client = ResendEmailClient("key", "from@example.com", base_url=srv.url)
+    client.send_batch(_emails(150))
+
+    assert [(p, len(b)) for p, b in srv.requests] == [("/emails/batch", 100), ("/emails/batch", 50)]
+
+
+def test_retry_after_is_honored_then_raised(fake_resend):
+    srv = fake_resend(rate_limit_first=1, retry_after="0")
+    ResendEmailClient("key", "from@example.com", base_url=srv.url).send(_emails(1)[0])
+    assert len(srv.requests) == 2
+
+    slow = fake_resend(rate_limit_first=5, retry_after="120")
+    with pytest.raises(ResendRateLimited) as exc:
+        ResendEmailClient("key", "from@example.com", base_url=slow.url).send(_emails(1)[0])
+    assert exc.value.retry_after == 120
+
+
+@pytest.mark.asyncio
+async def test_async_client_pools_connections(fake_resend):
+    import asyncio
+
+    srv = fake_resend()
+    client = AsyncResendEmailClient("key", "from@example.com", base_url=srv.url, pool_size=4)
+    for _ in range(3):
+        await asyncio.gather(*(client.send(m) for m in _emails(4)))
+    await client.aclose()
+
+    assert len(srv.requests) == 12
+    assert len(srv.connections) <= 4
@@ -0,0 +1,27 @@
+import pytest
+
+from app.email_templates import TEMPLATES, UnknownEventType, render
+from app.worker_notify import build_email
+
+TICKET = {"id": 7, "urgency": "P1_URGENT", "summary": "No heat <since> Monday", "property_address": "1 Main St",
+          "unit": "4B", "tenant_name": "Sam", "tenant_phone": None, "tenant_email": "sam@example.com"}
+
+
+@pytest.mark.parametrize("event_type", ["ticket.created", "ticket.action_required", "ticket.emergency"])
+def test_every_enqueued_event_type_renders_text_and_html(event_type):
+    r = render(event_type, {"ticket": TICKET})
+    assert "7" in r.subject
+    assert "No heat <since> Monday" in r.text and "Phone: (n/a)" in r.text
+    assert "No heat &lt;since&gt; Monday" in r.html
+
+
+def test_unknown_event_type_is_a_permanent_error():
+    with pytest.raises(UnknownEventType):
+        build_email({"event_type": "ticket.nope", "to_email": "m@x", "payload": {}})
+    assert set(TEMPLATES) >= {"ticket.created", "ticket.action_required", "ticket.emergency"}
+
+
+def test_build_email_carries_html_variant():
+    email = build_email({"event_type": "ticket.emergency", "to_email": "m@x", "payload": {"ticket": TICKET}})
+    assert email.subject == "[PropCare] EMERGENCY: ticket #7 at 1 Main St"
+    assert email.html.startswith("<p>EMERGENCY")
@@ -0,0 +1,58 @@
+from app import metrics
+from app.fastpath import fast_path_turn, hit_ratio
+from app.schemas import Message, TriageState, TriageTurn
+
+
+def _state(urgency="P3", emergency_type=None) -> TriageState:
+    return TriageState(
+        messages=[Message(role="user", content="x")],
+        ticket_id=1,
+        emergency_type=emergency_type,
+        last_turn=TriageTurn(
+            tenant_reply="Got it.",
+            category="plumbing",
+            urgency=urgency,
+            status="action_required" if urgency == "P0" else "intake",
+            should_notify_manager=urgency == "P0",
+            summary_for_ticket="Kitchen faucet drip",
+        ),
+    )
+
+
+def test_resolved_acknowledgement_skips_llm():
+    turn = fast_path_turn(_state(), "Thanks, that fixed it!", is_emergency=False)
+    assert turn is not None
+    assert turn.status == "resolved"
+    assert turn.category == "plumbing"
+    assert turn.should_notify_manager is False
+
+
+def test_doubt_or_first_turn_falls_through():
+    assert fast_path_turn(_state(), "It's fixed but it still drips sometimes", False) is None
+    assert fast_path_turn(_state(), "fixed it?", False) is None
+    first = TriageState(messages=[Message(role="user", content="thanks, that fixed it")])
+    assert fast_path_turn(first, "thanks, that fixed it", False) is None
+
+
+def test_emergency_confirmation_uses_template():
+    turn = fast_path_turn(_state("P0", "gas"), "Yes, we're outside now", is_emergency=False)
+    assert turn is not None
+    assert turn.urgency == "P0"
+    assert turn.status == "action_required"
+    assert "1-800-663-9911" in turn.tenant_reply
+
+    assert fast_path_turn(_state("P0", "gas"), "ok, will do. called them already", False) is not None
+
+    # a detail after the confirmation is new information: the model must see it
+    assert fast_path_turn(_state("P0", "gas"), "yes the smell is getting stronger", False) is None
+    assert fast_path_turn(_state("P0", "gas"), "yesterday it was fine", False) is None
+
+    # a new hazard in the reply goes back to the model
+    assert fast_path_turn(_state("P0", "gas"), "Yes and now there's smoke", is_emergency=True) is None
+
+
+def test_hit_ratio_counts_hits_and_misses():
+    metrics.reset()
+    fast_path_turn(_state(), "that fixed it", False)
+    fast_path_turn(_state(), "the tap is loose", False)
+    assert hit_ratio() == 0.5
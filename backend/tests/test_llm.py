@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from app.llm import JsonStringFieldStreamer, stream_turn_json
+from tests.fakes import FakeLLMClient, FakeStreamEvent
+
+TURN = {
+    "tenant_reply": "Got it — please put a \"bucket\" under it.\nIs it dripping now?",
+    "category": "plumbing",
+    "urgency": "P3",
+    "status": "intake",
+    "should_notify_manager": False,
+    "summary_for_ticket": "Sink drip",
+}
+
+
+@pytest.mark.parametrize("step", [1, 3, 16])
+def test_streamer_decodes_field_across_chunk_boundaries(step):
+    raw = json.dumps(TURN)
+    streamer = JsonStringFieldStreamer("tenant_reply")
+    out = "".join(streamer.feed(raw[i:i + step]) for i in range(0, len(raw), step))
+    assert out == TURN["tenant_reply"]
+    assert streamer.done
+
+
+@pytest.mark.asyncio
+async def test_stream_turn_json_yields_deltas_then_turn():
+    raw = json.dumps(TURN)
+    events = [FakeStreamEvent("response.output_text.delta", delta=raw[i:i + 10]) for i in range(0, len(raw), 10)]
+    client = FakeLLMClient(events=events)
+
+    out = [item async for item in stream_turn_json(client, [{"role": "user", "content": "leak"}])]
+
+    deltas = [v for k, v in out if k == "delta"]
+    assert len(deltas) > 1
+    assert "".join(deltas) == TURN["tenant_reply"]
+    assert out[-1][0] == "turn"
+    assert out[-1][1].category == "plumbing"
+
+
+@pytest.mark.asyncio
+async def test_static_prefix_is_identical_and_context_goes_last():
+    from app.llm import SYSTEM_PROMPT, TRIAGE_TEXT_FORMAT, chat_turn_json
+
+    client = FakeLLMClient(output_text=json.dumps(TURN))
+    msgs = [{"role": "user", "content": "leak"}]
+    await chat_turn_json(client, msgs, extra_instructions="- Ticket id: 1")
+    await chat_turn_json(client, msgs, extra_instructions="- Ticket id: 2")
+
+    first, second = client.responses.calls
+    assert first["instructions"] == second["instructions"] == SYSTEM_PROMPT
+    assert first["text"] is second["text"] is TRIAGE_TEXT_FORMAT
+    assert first["input"][0] == msgs[0]
+    assert first["input"][-1] == {"role": "developer", "content": "- Ticket id: 1"}
+    assert msgs == [{"role": "user", "content": "leak"}]
@@ -0,0 +1,301 @@
+import asyncio
+import io
+import os
+import threading
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import media
+from app.main import app
+from app.media_cache import verdict_cache
+from tests.fake_supabase import FakeSupabase
+from tests.fakes import FakeLLMClient
+
+client = TestClient(app)
+
+@pytest.fixture(autouse=True)
+def _empty_verdict_cache():
+    verdict_cache.clear()
+
+def _supabase_with_ticket():
+    sb = FakeSupabase()
+    sb.tables["tickets"].append({"id": 1})
+    return sb
+
+def _upload(content: bytes, mime="image/jpeg"):
+    return client.post(
+        "/upload_media",
+        data={"ticket_id": "1", "issue_context": "leak under sink"},
+        files={"file": ("photo.jpg", content, mime)},
+    )
+
+def test_upload_streams_to_storage_and_cleans_up_spool():
+    sb = _supabase_with_ticket()
+    spooled = []
+    real_spool = media._spool_upload
+
+    async def spy(file):
+        path, size, sha = await real_spool(file)
+        spooled.append(path)
+        return path, size, sha
+
+    verify = AsyncMock(return_value={"is_valid": True, "reason": "shows a leak"})
+    content = os.urandom(3 * media.CHUNK_BYTES + 17)
+    with patch("app.main.supabase", sb), patch("app.media._spool_upload", spy), \
+         patch("app.media.verify_image", verify):
+        r = _upload(content)
+
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["is_valid"] is True
+    assert sb.storage.objects[(media.MEDIA_BUCKET, body["storage_path"])] == content
+    assert sb.tables["ticket_media"][0]["byte_size"] == len(content)
+    assert verify.await_args.kwargs["image_bytes"] == content
+    assert not os.path.exists(spooled[0])
+
+def test_upload_rejects_oversize_while_reading():
+    sb = _supabase_with_ticket()
+    with patch("app.main.supabase", sb), patch("app.media.MAX_BYTES", 2 * media.CHUNK_BYTES):
+        r = _upload(b"x" * (2 * media.CHUNK_BYTES + 1))
+
+    assert r.status_code == 400
+    assert "too large" in r.json()["detail"]
+    assert sb.storage.objects == {}
+
+def test_large_image_without_derivative_is_queued_for_the_worker():
+    sb = _supabase_with_ticket()
+    verify = AsyncMock()
+    with patch("app.main.supabase", sb), patch("app.media.VERIFY_MAX_BYTES", 1024), \
+         patch("app.media.verify_image", verify):
+        r = _upload(b"x" * 4096)
+
+    assert r.status_code == 200
+    assert r.json()["is_valid"] is None and r.json()["reason"] is None
+    # verified later by app/worker_media.py instead of silently skipped
+    assert r.json()["verification_status"] == "pending"
+    assert sb.tables["ticket_media"][0]["verification_status"] == "pending"
+    verify.assert_not_awaited()
+
+def _phone_photo(width=4032, height=3024, orientation=6) -> bytes:
+    Image = pytest.importorskip("PIL.Image")
+    img = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    exif = Image.Exif()
+    exif[0x0112] = orientation  # rotate 90 CW on display
+    out = io.BytesIO()
+    img.save(out, "JPEG", quality=90, exif=exif)
+    return out.getvalue()
+
+def test_image_verified_from_oriented_downscaled_derivative():
+    Image = pytest.importorskip("PIL.Image")
+
+    sb = _supabase_with_ticket()
+    verify = AsyncMock(return_value={"is_valid": True, "reason": "ok"})
+    original = _phone_photo()
+    with patch("app.main.supabase", sb), patch("app.media.verify_image", verify):
+        r = _upload(original)
+
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["thumbnail_url"]
+    row = sb.tables["ticket_media"][0]
+    assert row["thumbnail_path"].startswith("tickets/1/thumbs/")
+    thumb = sb.storage.objects[(media.MEDIA_BUCKET, row["thumbnail_path"])]
+    sent = verify.await_args.kwargs
+    assert sent["image_bytes"] == thumb and sent["mime_type"] == "image/jpeg"
+    assert len(thumb) < len(original)
+    with Image.open(io.BytesIO(thumb)) as t:
+        assert t.size == (768, 1024)  # portrait after EXIF rotation, max edge 1024
+
+def test_async_verify_inserts_pending_row_and_status_is_pollable():
+    sb = _supabase_with_ticket()
+    verify = AsyncMock()
+    with patch("app.main.supabase", sb), patch("app.media.verify_image", verify):
+        r = client.post(
+            "/upload_media",
+            data={"ticket_id": "1", "issue_context": "leak", "verify_mode": "async"},
+            files={"file": ("photo.jpg", b"x" * 2048, "image/jpeg")},
+        )
+        assert r.status_code == 200, r.text
+        assert r.json()["verification_status"] == "pending"
+        sb.tables["ticket_media"][0]["id"] = "m1"  # uuid in Postgres; the fake counts
+        status = client.get("/media/m1")
+
+    verify.assert_not_awaited()
+    row = sb.tables["ticket_media"][0]
+    assert row["is_valid"] is None and row["issue_context"] == "leak"
+    assert status.json()["verification_status"] == "pending"
+
+def test_unknown_media_id_is_404():
+    with patch("app.main.supabase", FakeSupabase()):
+        assert client.get("/media/nope").status_code == 404
+
+def test_reupload_of_same_bytes_returns_existing_row():
+    sb = _supabase_with_ticket()
+    verify = AsyncMock(return_value={"is_valid": True, "reason": "ok"})
+    with patch("app.main.supabase", sb), patch("app.media.verify_image", verify):
+        first = _upload(b"same photo bytes")
+        second = _upload(b"same photo bytes")
+
+    assert first.json()["duplicate"] is False
+    assert second.json()["duplicate"] is True
+    assert second.json()["media_id"] == first.json()["media_id"]
+    assert len(sb.tables["ticket_media"]) == 1
+    assert len(sb.storage.objects) == 1
+    assert verify.await_count == 1
+
+def test_verdict_cache_skips_model_for_same_image_on_another_ticket():
+    sb = _supabase_with_ticket()
+    sb.tables["tickets"].append({"id": 2})
+    verify = AsyncMock(return_value={"is_valid": True, "reason": "ok"})
+    with patch("app.main.supabase", sb), patch("app.media.verify_image", verify):
+        _upload(b"shared photo")
+        r = client.post(
+            "/upload_media",
+            data={"ticket_id": "2", "issue_context": "  Leak under SINK "},
+            files={"file": ("photo.jpg", b"shared photo", "image/jpeg")},
+        )
+
+    assert r.json()["is_valid"] is True and r.json()["duplicate"] is False
+    assert verify.await_count == 1
+    assert len(sb.tables["media_verdict_cache"]) == 1
+
+def test_unparseable_verdict_is_reported_but_not_cached():
+    sb = _supabase_with_ticket()
+    sb.tables["tickets"].append({"id": 2})
+    llm = FakeLLMClient(output_text="Sorry, I can't help with that.")
+    with patch("app.main.supabase", sb), patch("app.main.llm_client", llm):
+        first = _upload(b"shared photo")
+        second = client.post(
+            "/upload_media",
+            data={"ticket_id": "2", "issue_context": "leak under sink"},
+            files={"file": ("photo.jpg", b"shared photo", "image/jpeg")},
+        )
+
+    assert first.json()["reason"] == "Verifier did not return valid JSON."
+    assert second.json()["duplicate"] is False
+    # the bad reply was not reused: the model was asked again
+    assert len(llm.responses.calls) == 2
+    assert sb.tables.get("media_verdict_cache", []) == []
+
+def test_storage_upload_and_verification_run_concurrently():
+    sb = _supabase_with_ticket()
+    verifying = threading.Event()
+    overlapped = []
+    real_upload = media._upload_file
+
+    def slow_upload(*args):
+        # blocks the storage stage until verification has started
+        overlapped.append(verifying.wait(timeout=2))
+        return real_upload(*args)
+
+    async def fake_verify(client, **kwargs):
+        verifying.set()
+        return {"is_valid": True, "reason": "ok"}
+
+    with patch("app.main.supabase", sb), patch("app.media._upload_file", slow_upload), \
+         patch("app.media.verify_image", fake_verify):
+        r = _upload(b"photo bytes")
+
+    assert r.status_code == 200, r.text
+    assert overlapped == [True]
+
+def test_failed_original_upload_rolls_back_thumbnail():
+    sb = _supabase_with_ticket()
+
+    def broken_upload(*args):
+        raise RuntimeError("storage unavailable")
+
+    verify = AsyncMock(return_value={"is_valid": True, "reason": "ok"})
+    with patch("app.main.supabase", sb), patch("app.media._upload_file", broken_upload), \
+         patch("app.media.verify_image", verify):
+        r = _upload(_phone_photo(1600, 1200, 1))
+
+    assert r.status_code == 500
+    assert "Storage upload failed" in r.json()["detail"]
+    assert sb.storage.objects == {}
+    assert sb.tables.get("ticket_media", []) == []
+
+def test_failed_storage_upload_cancels_pending_verification():
+    sb = _supabase_with_ticket()
+    verifying = threading.Event()
+    verify_cancelled = []
+
+    def broken_upload(*args):
+        verifying.wait(timeout=2)  # fail only once the model call is in flight
+        raise RuntimeError("storage unavailable")
+
+    async def slow_verify(client, **kwargs):
+        verifying.set()
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            verify_cancelled.append(True)
+            raise
+        return {"is_valid": True, "reason": "ok"}
+
+    with patch("app.main.supabase", sb), patch("app.media._upload_file", broken_upload), \
+         patch("app.media.verify_image", slow_verify):
+        start = time.perf_counter()
+        r = _upload(b"photo bytes")
+        elapsed = time.perf_counter() - start
+
+    assert r.status_code == 500
+    assert verify_cancelled == [True]
+    assert elapsed < 2
+    assert sb.storage.objects == {}
+
+def test_ticket_media_listing_walks_keyset_pages_newest_first():
+    sb = _supabase_with_ticket()
+    stamps = ["2026-01-01T00:00:01+00:00", "2026-01-01T00:00:02+00:00", "2026-01-01T00:00:02+00:00",
+              "2026-01-01T00:00:03+00:00", "2026-01-01T00:00:04+00:00"]
+    sb.tables["ticket_media"] = [
+        {"id": f"m{i}", "ticket_id": 1, "created_at": ts, "storage_path": f"tickets/1/p{i}.jpg",
+         "thumbnail_path": f"tickets/1/thumbs/p{i}.jpg" if i % 2 else None}
+        for i, ts in enumerate(stamps)
+    ] + [{"id": "other", "ticket_id": 2, "created_at": stamps[-1], "storage_path": "tickets/2/x.jpg"}]
+
+    seen, cursor, pages = [], None, 0
+    with patch("app.main.supabase", sb):
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            body = client.get("/tickets/1/media", params=params).json()
+            seen += [it["id"] for it in body["items"]]
+            pages += 1
+            assert all(it["signed_url"] for it in body["items"])
+            cursor = body["next_cursor"]
+            if not cursor:
+                break
+
+    assert seen == ["m4", "m3", "m2", "m1", "m0"]
+    assert pages == 3
+    # one batched sign call per page: originals and thumbnails together
+    assert len(sb.storage.sign_calls) == 3
+
+def test_ticket_media_listing_rejects_bad_cursor_and_unknown_ticket():
+    sb = _supabase_with_ticket()
+    with patch("app.main.supabase", sb):
+        assert client.get("/tickets/1/media", params={"cursor": "!!"}).status_code == 400
+        assert client.get("/tickets/99/media").status_code == 404
+
+def test_keyset_filter_adds_a_sargable_bound_at_the_cursor():
+    from app.pagination import encode_cursor, keyset_filter
+
+    class Query:
+        def __init__(self):
+            self.calls = []
+
+        def lte(self, column, value):
+            self.calls.append(("lte", column, value))
+            return self
+
+        def or_(self, expr):
+            self.calls.append(("or", expr))
+            return self
+
+    ts = "2026-01-01T00:00:02+00:00"
+    q = keyset_filter(Query(), "created_at", encode_cursor({"id": "m2", "created_at": ts}, "created_at"))
+    assert q.calls[0] == ("lte", "created_at", ts)
+    assert q.calls[1][0] == "or"
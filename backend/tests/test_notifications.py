@@ -0,0 +1,33 @@
+import pytest
+
+from app import notifications
+from app.notifications import enqueue_many, enqueue_notification, outbox_row
+from tests.fake_supabase import FakeSupabase
+
+@pytest.fixture(autouse=True)
+def _forget_known_keys():
+    notifications._known_keys.clear()
+
+def _row(key):
+    return outbox_row(event_type="ticket.action_required", ticket_id=1, to_email="m@x.test", payload={}, dedupe_key=key)
+
+def test_enqueue_many_writes_one_statement_and_returns_new_keys():
+    sb = FakeSupabase()
+    sb.tables["notification_outbox"] = [{"id": "old", "dedupe_key": "a"}]
+
+    new = enqueue_many(sb, [_row("a"), _row("b"), _row("b"), _row("c")])
+
+    assert new == ["b", "c"]
+    assert sb.log == [("notification_outbox", "upsert")]
+    assert [r["dedupe_key"] for r in sb.tables["notification_outbox"]] == ["a", "b", "c"]
+
+def test_repeat_event_is_skipped_without_a_round_trip():
+    sb = FakeSupabase()
+
+    assert enqueue_notification(sb, event_type="ticket.action_required", ticket_id=1,
+                                to_email="m@x.test", payload={}, dedupe_key="k") is True
+    assert enqueue_notification(sb, event_type="ticket.action_required", ticket_id=1,
+                                to_email="m@x.test", payload={}, dedupe_key="k") is False
+
+    assert sb.log == [("notification_outbox", "upsert")]
+    assert len(sb.tables["notification_outbox"]) == 1
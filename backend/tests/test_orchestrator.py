@@ -38,3 +38,30 @@ async def test_orchestrator_non_escalation_calls_llm_and_returns_reply():
     assert state2.messages[-1].role == "assistant"
     assert "confirm" in state2.messages[-1].content.lower()
     mock_chat.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_orchestrator_appends_ticket_event_without_reading_details():
+    from app.schemas import TriageTurn
+
+    supabase = FakeSupabase()
+    turn = TriageTurn(
+        tenant_reply="Got it. Is it dripping right now?",
+        category="plumbing",
+        urgency="P3",
+        status="intake",
+        should_notify_manager=False,
+        summary_for_ticket="Kitchen faucet drip",
+    )
+
+    state = TriageState(messages=[Message(role="user", content="My faucet drips a little")])
+    with patch("app.orchestrator.chat_turn_json", new=AsyncMock(return_value=turn)):
+        state = await run_triage_turn(object(), supabase, state)
+        state.messages.append(Message(role="user", content="Kitchen, since yesterday"))
+        state = await run_triage_turn(object(), supabase, state)
+
+    events = supabase.tables["ticket_events"]
+    assert [e["body"] for e in events] == ["My faucet drips a little", "Kitchen, since yesterday"]
+    assert all(e["ticket_id"] == state.ticket_id for e in events)
+    assert len(supabase.rows) == 1
+    assert "issue_details" not in supabase.rows[0]
+    assert ("tickets", "select") not in supabase.log
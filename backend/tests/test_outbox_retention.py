@@ -0,0 +1,34 @@
+from types import SimpleNamespace
+
+from app.outbox_retention import archive_sent
+
+
+class FakeRpcSupabase:
+    """Answers archive_sent_notifications with a fixed sequence of counts."""
+
+    def __init__(self, counts):
+        self.counts = list(counts)
+        self.calls = []
+
+    def rpc(self, name, params):
+        self.calls.append((name, params))
+        moved = self.counts.pop(0)
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=moved))
+
+
+def test_archive_sent_loops_until_a_short_batch():
+    sb = FakeRpcSupabase([100, 100, 7, 100])
+
+    assert archive_sent(sb, days=14, batch_size=100, pause_seconds=0) == 207
+    assert len(sb.calls) == 3
+    assert sb.calls[0] == (
+        "archive_sent_notifications",
+        {"p_older_than": "14 days", "p_batch_size": 100},
+    )
+
+
+def test_archive_sent_respects_max_batches():
+    sb = FakeRpcSupabase([50] * 5)
+
+    assert archive_sent(sb, batch_size=50, max_batches=2, pause_seconds=0) == 100
+    assert len(sb.calls) == 2
@@ -1,5 +1,17 @@
+import random
+
+import pytest
+
+from app import policy
 from app.schemas import Message
-from app.policy import should_escalate
+from app.policy import (
+    EMERGENCY_MATCHER,
+    ESCALATION_MATCHER,
+    IncrementalScanner,
+    KeywordMatcher,
+    detect_emergency,
+    should_escalate,
+)
 
 def test_emergency_sprinkler_burst_escalates():
     msgs = [Message(role="user", content="Fire sprinkler burst and water is spraying everywhere")]
@@ -12,3 +24,48 @@ def test_minor_issue_no_escalation():
     msgs = [Message(role="user", content="My cabinet door is loose.")]
     needs, urgency, reason = should_escalate(msgs)
     assert needs is False
+
+
+def _naive_groups(matcher, text):
+    t = text.lower()
+    return {g for g, words in matcher.keywords.items() if any(k in t for k in words)}
+
+
+@pytest.fixture
+def regex_path(monkeypatch):
+    # real lists are below REGEX_MIN_KEYWORDS; force the trie regex
+    monkeypatch.setattr(policy, "REGEX_MIN_KEYWORDS", 1)
+
+
+def test_compiled_matcher_matches_substring_semantics(regex_path):
+    rng = random.Random(0)
+    for base in (EMERGENCY_MATCHER, ESCALATION_MATCHER):
+        matcher = KeywordMatcher(base.keywords)
+        assert matcher._regex is not None
+        words = [w for ws in matcher.keywords.values() for w in ws]
+        for _ in range(300):
+            parts = [rng.choice(words + ["the", "kitchen", "x", "", "ing"]) for _ in range(rng.randint(0, 6))]
+            text = rng.choice(["", " "]).join(parts)
+            assert matcher.scan(text) == base.scan(text) == _naive_groups(matcher, text), text
+
+
+def test_overlapping_keywords_are_all_credited(regex_path):
+    m = KeywordMatcher({"long": ["water in light"], "short": ["light fixture"], "prefix": ["water"]})
+    assert m.scan("Water in light fixture") == {"long", "short", "prefix"}
+
+
+def test_incremental_scan_equals_full_scan_across_message_boundaries():
+    msgs = [Message(role="user", content="I can smell"), Message(role="assistant", content="gas? Where")]
+    scanner = IncrementalScanner(ESCALATION_MATCHER)
+    assert scanner.feed(msgs) == ESCALATION_MATCHER.scan("i can smell gas? where")
+
+    msgs.append(Message(role="user", content="the kitchen faucet, it won't stop dripping"))
+    assert scanner.feed(msgs) == ESCALATION_MATCHER.scan(" ".join(m.content for m in msgs))
+    assert should_escalate(msgs, scanner)[0] is True
+
+
+def test_detect_emergency_types():
+    assert detect_emergency("I smell rotten eggs")[1] == "gas"
+    assert detect_emergency("outlet is sparking")[1] == "electrical"
+    assert detect_emergency("water dripping through light")[1] == "electrical"
+    assert detect_emergency("toilet is running")[0] is False
@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from app.schemas import Message, TriageState
+from app.sessions import MemorySessionBackend, SessionStore
+
+
+def _state(text: str, ticket_id=None) -> TriageState:
+    return TriageState(messages=[Message(role="user", content=text)], ticket_id=ticket_id)
+
+
+@pytest.mark.asyncio
+async def test_lru_evicts_oldest_session():
+    store = SessionStore(max_entries=2)
+    await store.put("a", _state("a"))
+    await store.put("b", _state("b"))
+    assert await store.get("a") is not None  # touch "a" so "b" is oldest
+    await store.put("c", _state("c"))
+
+    assert await store.get("b") is None
+    assert await store.get("a") is not None
+    assert await store.get("c") is not None
+
+
+@pytest.mark.asyncio
+async def test_expired_session_is_dropped():
+    store = SessionStore(ttl_seconds=0)
+    await store.put("a", _state("a"))
+    assert await store.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_backend_reloads_after_cache_miss_and_caps_messages():
+    backend = MemorySessionBackend()
+    store = SessionStore(backend, max_messages=2)
+    state = _state("one", ticket_id=7)
+    state.messages += [Message(role="assistant", content="two"), Message(role="user", content="three")]
+    await store.put("s1", state)
+
+    fresh = SessionStore(backend)  # e.g. another worker process
+    loaded = await fresh.get("s1")
+    assert loaded is not None
+    assert loaded.ticket_id == 7
+    assert [m.content for m in loaded.messages] == ["two", "three"]
+
+
+@pytest.mark.asyncio
+async def test_session_lock_serializes_turns_and_is_released_for_unsaved_turns():
+    store = SessionStore()
+    order = []
+
+    async def turn(name, fail=False):
+        async with store.lock("s1"):
+            order.append(f"{name}:start")
+            await asyncio.sleep(0.01)
+            order.append(f"{name}:end")
+            if fail:
+                raise RuntimeError("llm timeout")
+
+    results = await asyncio.gather(turn("a", fail=True), turn("b"), return_exceptions=True)
+    assert isinstance(results[0], RuntimeError)
+    assert order == ["a:start", "a:end", "b:start", "b:end"]
+
+    for i in range(100):
+        try:
+            async with store.lock(f"unsaved-{i}"):
+                raise RuntimeError("turn failed before put()")
+        except RuntimeError:
+            pass
+    assert store._locks == {}
@@ -0,0 +1,43 @@
+from app.signed_urls import SignedUrlCache
+from tests.fake_supabase import FakeSupabase
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+async def test_gallery_signs_all_misses_in_one_call_and_reuses_them():
+    sb = FakeSupabase()
+    cache = SignedUrlCache(ttl_seconds=3600, margin_seconds=300, clock=Clock())
+    paths = [f"tickets/1/p{i}.jpg" for i in range(30)]
+
+    first = await cache.get_many(sb, "ticket-media", paths)
+    second = await cache.get_many(sb, "ticket-media", paths + [None])
+
+    assert sb.storage.sign_calls == [paths]
+    assert first == second and all(first[p].endswith(f"{p}?ttl=3600") for p in paths)
+
+async def test_url_is_resigned_once_inside_the_safety_margin():
+    sb = FakeSupabase()
+    clock = Clock()
+    cache = SignedUrlCache(ttl_seconds=3600, margin_seconds=300, clock=clock)
+
+    await cache.get(sb, "ticket-media", "a.jpg")
+    clock.now += 3600 - 301
+    await cache.get(sb, "ticket-media", "a.jpg")
+    clock.now += 2
+    await cache.get(sb, "ticket-media", "a.jpg")
+
+    assert sb.storage.sign_calls == [["a.jpg"], ["a.jpg"]]
+
+async def test_only_misses_are_signed_and_invalidate_drops_entries():
+    sb = FakeSupabase()
+    cache = SignedUrlCache(ttl_seconds=60, margin_seconds=10, clock=Clock())
+
+    await cache.get_many(sb, "b", ["x", "y"])
+    cache.invalidate("b", ["x"])
+    await cache.get_many(sb, "b", ["x", "y", "z"])
+
+    assert sb.storage.sign_calls == [["x", "y"], ["x", "z"]]
@@ -0,0 +1,66 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.tickets_api import CountCache, count_cache
+from tests.fake_supabase import FakeSupabase
+
+client = TestClient(app)
+
+@pytest.fixture(autouse=True)
+def _empty_count_cache():
+    count_cache.clear()
+
+def _tickets():
+    sb = FakeSupabase()
+    for i in range(7):
+        sb.rows.append({
+            "id": f"{i:02d}",
+            "created_at": f"2026-02-01T00:00:{i // 2:02d}+00:00",  # pairs share a timestamp
+            "status": "action_required" if i % 2 else "intake",
+            "urgency": "P1_URGENT" if i < 4 else "P2_SOON",
+            "property_address": "1 Main St",
+        })
+    return sb
+
+def test_list_tickets_filters_and_pages_with_total():
+    sb = _tickets()
+    ids, cursor = [], None
+    with patch("app.main.supabase", sb):
+        while True:
+            params = {"status": "action_required", "limit": 2, **({"cursor": cursor} if cursor else {})}
+            body = client.get("/tickets", params=params).json()
+            assert body["total"] == 3
+            ids += [t["id"] for t in body["items"]]
+            cursor = body["next_cursor"]
+            if not cursor:
+                break
+
+    assert ids == ["05", "03", "01"]
+
+def test_total_is_served_from_cache_within_ttl():
+    sb = _tickets()
+    with patch("app.main.supabase", sb):
+        client.get("/tickets", params={"urgency": "P2_SOON"})
+        sb.rows.append({"id": "99", "created_at": "2026-02-02T00:00:00+00:00", "urgency": "P2_SOON"})
+        body = client.get("/tickets", params={"urgency": "P2_SOON"}).json()
+
+    assert len(body["items"]) == 4
+    assert body["total"] == 3  # cached; refreshed after TICKET_COUNT_CACHE_TTL_SECONDS
+
+async def test_count_cache_coalesces_concurrent_misses_and_expires():
+    now = [0.0]
+    cache = CountCache(ttl_seconds=10, clock=lambda: now[0])
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0)
+        return len(calls)
+
+    assert await asyncio.gather(*(cache.get(("k",), compute) for _ in range(5))) == [1] * 5
+    now[0] = 11
+    assert await cache.get(("k",), compute) == 2
@@ -0,0 +1,56 @@
+from unittest.mock import AsyncMock, patch
+
+from app import worker_media
+from tests.fake_supabase import FakeSupabase
+
+def _claimed(sb):
+    sb.tables["ticket_media"] = [{"id": "m1", "verification_status": "pending", "is_valid": None}]
+    sb.tables["media_verify_jobs"] = [{"id": "j1", "media_id": "m1", "status": "processing", "attempt_count": 0}]
+    sb.storage.objects[("ticket-media", "tickets/1/thumbs/a.jpg")] = b"thumb"
+    return {
+        "job_id": "j1",
+        "attempt_count": 0,
+        "media_id": "m1",
+        "storage_bucket": "ticket-media",
+        "storage_path": "tickets/1/a.png",
+        "thumbnail_path": "tickets/1/thumbs/a.jpg",
+        "mime_type": "image/png",
+        "issue_context": "leak",
+    }
+
+async def test_process_job_verifies_thumbnail_and_records_verdict():
+    sb = FakeSupabase()
+    job = _claimed(sb)
+    verify = AsyncMock(return_value={"is_valid": False, "reason": "a cat"})
+    with patch("app.worker_media.verify_image", verify):
+        assert await worker_media.process_job(sb, None, job) is True
+
+    assert verify.await_args.kwargs["image_bytes"] == b"thumb"
+    assert verify.await_args.kwargs["mime_type"] == "image/jpeg"
+    media = sb.tables["ticket_media"][0]
+    assert media["verification_status"] == "verified" and media["is_valid"] is False
+    assert sb.tables["media_verify_jobs"][0]["status"] == "done"
+
+async def test_process_job_retries_then_marks_error_after_max_attempts():
+    sb = FakeSupabase()
+    job = _claimed(sb)
+    verify = AsyncMock(side_effect=RuntimeError("model down"))
+    with patch("app.worker_media.verify_image", verify):
+        assert await worker_media.process_job(sb, None, job) is False
+        retry = dict(sb.tables["media_verify_jobs"][0])
+        job["attempt_count"] = worker_media.MAX_ATTEMPTS - 1
+        await worker_media.process_job(sb, None, job)
+
+    assert retry["status"] == "pending" and retry["attempt_count"] == 1
+    assert sb.tables["media_verify_jobs"][0]["status"] == "failed"
+    assert sb.tables["ticket_media"][0]["verification_status"] == "error"
+
+async def test_unparseable_verdict_is_not_cached():
+    sb = FakeSupabase()
+    job = {**_claimed(sb), "content_sha256": "abc"}
+    verify = AsyncMock(return_value={"is_valid": False, "reason": "Verifier did not return valid JSON.", "parsed": False})
+    with patch("app.worker_media.verify_image", verify):
+        assert await worker_media.process_job(sb, None, job) is True
+
+    assert sb.tables["ticket_media"][0]["is_valid"] is False
+    assert sb.tables.get("media_verdict_cache", []) == []
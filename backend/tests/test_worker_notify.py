@@ -0,0 +1,243 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from app.circuit_breaker import CircuitBreaker
+from app.email_resend import ResendRateLimited
+from app.outbox_wakeup import IdleBackoff, LocalWakeup, next_wake_delay
+from app.worker_notify import (
+    WORKER_MAX_ATTEMPTS,
+    AdaptiveBatchSize,
+    digest_window_end,
+    failure_update,
+    is_permanent,
+    is_provider_outage,
+    plan_digest,
+    process_row_sync,
+    send_batch_async,
+)
+from tests.fake_supabase import FakeSupabase
+
+
+class FakeEmailClient:
+    def __init__(self, fail_for=(), delay=0.0):
+        self.fail_for = set(fail_for)
+        self.delay = delay
+        self.sent = []
+        self.max_concurrent = 0
+        self._active = 0
+
+    async def send(self, msg):
+        self._active += 1
+        self.max_concurrent = max(self.max_concurrent, self._active)
+        try:
+            await asyncio.sleep(self.delay)
+            if msg.to in self.fail_for:
+                raise RuntimeError("provider 500")
+            self.sent.append(msg)
+        finally:
+            self._active -= 1
+
+
+def _row(i, to="ops@example.com", event_type="ticket.created"):
+    return {"id": f"row-{i}", "event_type": event_type, "to_email": to,
+            "payload": {"ticket": {"id": i}}, "attempt_count": 0}
+
+
+def test_adaptive_batch_size_grows_under_backlog_and_shrinks_when_idle():
+    b = AdaptiveBatchSize(min_size=10, max_size=40)
+    b.observe(10)
+    b.observe(20)
+    b.observe(40)
+    assert b.size == 40
+    b.observe(3)
+    assert b.size == 20
+    b.observe(0)
+    b.observe(0)
+    assert b.size == 10
+
+
+@pytest.mark.asyncio
+async def test_send_batch_async_is_concurrent_and_collects_failures():
+    client = FakeEmailClient(fail_for={"bad@example.com"}, delay=0.05)
+    rows = [_row(i) for i in range(8)] + [_row(8, to="bad@example.com"), _row(9, event_type="nope")]
+
+    start = time.perf_counter()
+    sent, failed = await send_batch_async(client, rows, asyncio.Semaphore(4))
+    elapsed = time.perf_counter() - start
+
+    assert len(sent) == 8
+    assert {f["id"] for f in failed} == {"row-8", "row-9"}
+    by_id = {f["id"]: f for f in failed}
+    assert by_id["row-8"]["attempt_count"] == 1 and by_id["row-8"]["status"] == "pending"
+    # no template for "nope": parked as dead instead of retried
+    assert by_id["row-9"]["status"] == "dead"
+    assert client.max_concurrent == 4
+    assert elapsed < 0.05 * 9 / 2  # well under sequential time
+
+
+@pytest.mark.asyncio
+async def test_local_wakeup_returns_immediately_on_notify():
+    wakeup = LocalWakeup()
+    asyncio.get_running_loop().call_later(0.01, wakeup.notify)
+
+    start = time.perf_counter()
+    assert await wakeup.wait(5) is True
+    assert time.perf_counter() - start < 1
+
+    assert await wakeup.wait(0.01) is False
+
+
+def test_idle_backoff_is_exponential_and_capped():
+    b = IdleBackoff(1, 5)
+    assert [b.next() for _ in range(5)] == [1, 2, 4, 5, 5]
+    b.reset()
+    assert b.next() == 1
+
+
+def test_next_wake_delay_honors_earliest_retry():
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    soon = (now + timedelta(seconds=3)).isoformat()
+    past = (now - timedelta(seconds=3)).isoformat()
+    assert next_wake_delay(30, soon, now) == 3
+    assert next_wake_delay(2, soon, now) == 2
+    assert next_wake_delay(30, past, now) == 0
+    assert next_wake_delay(30, None, now) == 30
+
+
+def test_rate_limited_send_is_rescheduled_after_retry_after_without_burning_an_attempt():
+    before = datetime.now(timezone.utc)
+    update = failure_update(2, ResendRateLimited(42))
+    assert update["attempt_count"] == 2
+    delay = (datetime.fromisoformat(update["next_attempt_at"]) - before).total_seconds()
+    assert 41 <= delay <= 44
+
+
+def _event(i, created_at, event_type="ticket.action_required", to="mgr@example.com", address="1 Main St"):
+    return {"id": f"row-{i}", "event_type": event_type, "to_email": to, "created_at": created_at,
+            "attempt_count": 0,
+            "payload": {"ticket": {"id": i, "property_address": address, "summary": f"no heat {i}"}}}
+
+
+def test_plan_digest_groups_by_manager_and_property_and_defers_open_windows():
+    now = datetime(2026, 1, 1, 12, 7, tzinfo=timezone.utc)
+    rows = [
+        _event(1, "2026-01-01T12:01:00+00:00"),
+        _event(2, "2026-01-01T12:02:00+00:00"),
+        _event(3, "2026-01-01T12:03:00+00:00", address="9 Elm St"),
+        _event(4, "2026-01-01T12:06:00+00:00"),                       # window still open
+        _event(5, "2026-01-01T12:06:30+00:00", event_type="ticket.emergency"),
+    ]
+
+    immediate, groups, deferred = plan_digest(rows, 300, now)
+
+    assert sorted(r["id"] for r in immediate) == ["row-3", "row-5"]  # lone 9 Elm row + emergency
+    assert [[r["id"] for r in g] for g in groups] == [["row-1", "row-2"]]
+    assert deferred == [{"id": "row-4", "status": "pending", "attempt_count": 0, "last_error": None,
+                         "next_attempt_at": "2026-01-01T12:10:00+00:00"}]
+    assert digest_window_end("2026-01-01T12:05:00Z", 300).isoformat() == "2026-01-01T12:10:00+00:00"
+
+
+@pytest.mark.asyncio
+async def test_digest_mode_sends_one_email_per_group():
+    client = FakeEmailClient()
+    rows = [_event(i, "2026-01-01T00:00:00+00:00") for i in range(6)]
+
+    sent, failed = await send_batch_async(client, rows, asyncio.Semaphore(4), digest_window_seconds=300)
+
+    assert sorted(sent) == sorted(r["id"] for r in rows) and failed == []
+    assert len(client.sent) == 1
+    assert client.sent[0].subject == "[PropCare] 6 tickets need attention at 1 Main St"
+    assert "no heat 5" in client.sent[0].text
+
+
+def _http_error(status):
+    req = httpx.Request("POST", "https://api.resend.com/emails")
+    return httpx.HTTPStatusError("err", request=req, response=httpx.Response(status, request=req))
+
+
+def test_errors_are_classified_permanent_or_transient():
+    assert is_permanent(_http_error(422))
+    assert not is_permanent(_http_error(429)) and not is_permanent(_http_error(503))
+    assert is_provider_outage(_http_error(503))
+    assert is_provider_outage(httpx.ConnectTimeout("timeout"))
+    assert not is_provider_outage(ResendRateLimited(5))
+    assert not is_provider_outage(_http_error(422))
+
+
+def test_auth_errors_trip_the_breaker_instead_of_dead_lettering():
+    for status in (401, 403):
+        err = _http_error(status)
+        assert not is_permanent(err) and is_provider_outage(err)
+        update = failure_update(0, err)
+        assert update["status"] == "pending" and update["attempt_count"] == 1
+
+
+def test_failures_go_dead_when_permanent_or_out_of_attempts():
+    assert failure_update(0, _http_error(422))["status"] == "dead"
+
+    retry = failure_update(WORKER_MAX_ATTEMPTS - 2, _http_error(503))
+    assert retry["status"] == "pending" and retry["attempt_count"] == WORKER_MAX_ATTEMPTS - 1
+
+    dead = failure_update(WORKER_MAX_ATTEMPTS - 1, _http_error(503))
+    assert dead["status"] == "dead" and dead["attempt_count"] == WORKER_MAX_ATTEMPTS
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_hands_back_remaining_rows_without_burning_attempts():
+    client = FakeEmailClient(fail_for={"ops@example.com"})
+    breaker = CircuitBreaker(failure_threshold=2, cooldown_seconds=60)
+    rows = [_row(i) for i in range(5)]
+
+    sent, failed = await send_batch_async(client, rows, asyncio.Semaphore(1), breaker=breaker)
+
+    assert sent == [] and breaker.state == "open"
+    by_attempts = sorted(f["attempt_count"] for f in failed)
+    assert by_attempts == [0, 0, 0, 1, 1]  # only the two real sends count
+    assert all(f["status"] == "pending" for f in failed)
+
+
+class SpyBreaker(CircuitBreaker):
+    def __init__(self):
+        super().__init__(failure_threshold=1)
+        self.failures_recorded = 0
+
+    def record_failure(self):
+        self.failures_recorded += 1
+        super().record_failure()
+
+
+class SyncEmailClient:
+    def __init__(self, error=None):
+        self.error = error
+        self.sent = []
+
+    def send(self, msg):
+        if self.error:
+            raise self.error
+        self.sent.append(msg)
+
+
+def test_sync_render_failure_is_not_counted_against_the_provider():
+    sb = FakeSupabase()
+    bad = {**_row(1), "payload": None}
+    sb.tables["notification_outbox"] = [dict(bad)]
+    breaker = SpyBreaker()
+    client = SyncEmailClient()
+
+    with patch("app.worker_notify.render", side_effect=KeyError("summary")):
+        process_row_sync(sb, client, bad, breaker)
+
+    assert breaker.failures_recorded == 0 and breaker.state == "closed"
+    assert client.sent == []
+    row = sb.tables["notification_outbox"][0]
+    assert row["status"] == "pending" and row["attempt_count"] == 1
+
+    # the same row failing at the provider does count
+    sb.tables["notification_outbox"] = [dict(_row(2))]
+    process_row_sync(sb, SyncEmailClient(_http_error(503)), _row(2), breaker)
+    assert breaker.failures_recorded == 1
@@ -0,0 +1,108 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.orchestrator import run_triage_turn
+from app.schemas import Message, TriageState, TriageTurn
+from app.writebehind import WriteBehindQueue
+from tests.fake_supabase import FakeSupabase
+
+
+@pytest.mark.asyncio
+async def test_jobs_for_one_key_run_in_order_and_stop_flushes():
+    q = WriteBehindQueue(workers=3)
+    seen = []
+
+    def job(i):
+        async def run():
+            await asyncio.sleep(0.001 * (5 - i))
+            seen.append(i)
+        return run
+
+    for i in range(5):
+        await q.submit(7, job(i))
+    await q.stop()
+
+    assert seen == [0, 1, 2, 3, 4]
+    assert q.pending() == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_job_is_retried():
+    q = WriteBehindQueue(max_retries=3, retry_base_seconds=0)
+    attempts = 0
+
+    async def flaky():
+        nonlocal attempts
+        attempts += 1
+        if attempts < 3:
+            raise RuntimeError("postgrest timeout")
+
+    await q.submit(1, flaky)
+    await q.stop()
+    assert attempts == 3
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_returns_before_write_behind_persists():
+    supabase = FakeSupabase()
+    q = WriteBehindQueue()
+    turn = TriageTurn(
+        tenant_reply="Got it.", category="plumbing", urgency="P3", status="intake",
+        should_notify_manager=False, summary_for_ticket="Drip",
+    )
+    state = TriageState(messages=[Message(role="user", content="faucet drips")])
+
+    with patch("app.orchestrator.chat_turn_json", new=AsyncMock(return_value=turn)), \
+         patch("app.writebehind.default_queue", q):
+        state = await run_triage_turn(object(), supabase, state)
+        assert state.messages[-1].content == "Got it."
+        # reply is back, writes are still queued
+        assert supabase.rows[0].get("summary") != "Drip"
+        assert supabase.tables.get("ticket_events", []) == []
+        await q.stop()
+
+    assert supabase.rows[0]["summary"] == "Drip"
+    assert supabase.tables["ticket_events"][0]["body"] == "faucet drips"
+
+
+@pytest.mark.asyncio
+async def test_job_that_exhausts_retries_is_kept_for_retry():
+    q = WriteBehindQueue(max_retries=1, retry_base_seconds=0)
+    down = True
+    applied = []
+
+    async def write():
+        if down:
+            raise RuntimeError("database unavailable")
+        applied.append(1)
+
+    await q.submit(3, write, name="ticket_update:3")
+    await q.flush()
+    assert [name for _, name, _ in q.failed] == ["ticket_update:3"]
+
+    down = False
+    assert await q.retry_failed() == 1
+    await q.stop()
+    assert applied == [1] and q.failed == []
+
+
+@pytest.mark.asyncio
+async def test_notifying_turn_persists_inline_even_with_write_behind():
+    supabase = FakeSupabase()
+    q = WriteBehindQueue()
+    turn = TriageTurn(
+        tenant_reply="A manager has been alerted.", category="plumbing", urgency="P1",
+        status="action_required", should_notify_manager=True, summary_for_ticket="Leak under sink",
+    )
+    state = TriageState(messages=[Message(role="user", content="water is leaking under the sink")])
+
+    with patch("app.orchestrator.chat_turn_json", new=AsyncMock(return_value=turn)), \
+         patch("app.writebehind.default_queue", q), \
+         patch("app.notifications.NOTIFICATION_EMAIL", "ops@example.com"):
+        await run_triage_turn(object(), supabase, state)
+        # outbox row exists before the reply returns, nothing left in memory
+        assert [r["event_type"] for r in supabase.tables["notification_outbox"]] == ["ticket.action_required"]
+        assert q.pending() == 0
+        await q.stop()
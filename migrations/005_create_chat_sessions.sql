@@ -0,0 +1,23 @@
+-- 005_create_chat_sessions.sql
+-- Purpose: server-side conversation state for /chat (SESSION_BACKEND=supabase)
+
+create table if not exists public.chat_sessions (
+  id text primary key,
+  created_at timestamptz not null default now(),
+  updated_at timestamptz not null default now(),
+  expires_at timestamptz not null,
+
+  ticket_id bigint references public.tickets(id) on delete set null,
+
+  -- JSON-dumped TriageState (messages capped by SESSION_MAX_MESSAGES)
+  state jsonb not null
+);
+
+create index if not exists idx_chat_sessions_ticket_id
+  on public.chat_sessions (ticket_id);
+
+-- For periodic cleanup: delete from public.chat_sessions where expires_at < now();
+create index if not exists idx_chat_sessions_expires_at
+  on public.chat_sessions (expires_at);
+
+alter table public.chat_sessions enable row level security;
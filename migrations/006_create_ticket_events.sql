@@ -0,0 +1,76 @@
+-- 006_create_ticket_events.sql
+-- Purpose: append-only per-turn ticket log (replaces issue_details read-modify-write)
+
+-- 001 never declared issue_details (older databases got it out of band);
+-- declare it so the backfill and sync trigger below work on a fresh database.
+alter table public.tickets
+  add column if not exists issue_details text;
+
+create table if not exists public.ticket_events (
+  id bigint generated always as identity primary key,
+  created_at timestamptz not null default now(),
+
+  ticket_id bigint not null references public.tickets(id) on delete cascade,
+
+  -- 'user_message' for tenant turns; 'legacy_issue_details' for the backfill below
+  kind text not null default 'user_message',
+  body text not null
+);
+
+create index if not exists idx_ticket_events_ticket_id_id
+  on public.ticket_events (ticket_id, id);
+
+-- Backfill: carry pre-existing issue_details over as one event per ticket
+insert into public.ticket_events (ticket_id, created_at, kind, body)
+select t.id, coalesce(t.updated_at, t.created_at), 'legacy_issue_details', t.issue_details
+from public.tickets t
+where coalesce(t.issue_details, '') <> ''
+  and not exists (
+    select 1 from public.ticket_events e
+    where e.ticket_id = t.id and e.kind = 'legacy_issue_details'
+  );
+
+-- Lazy view of the running details text (computed on read, off the chat hot path)
+create or replace view public.ticket_issue_details as
+select
+  e.ticket_id,
+  string_agg(
+    case
+      when e.kind = 'legacy_issue_details' then e.body
+      when e.kind = 'user_message' then
+        to_char(e.created_at at time zone 'utc', 'YYYY-MM-DD"T"HH24:MI:SS"Z"') || ' | user: ' || e.body
+      else
+        to_char(e.created_at at time zone 'utc', 'YYYY-MM-DD"T"HH24:MI:SS"Z"') || ' | ' || e.kind || ': ' || e.body
+    end,
+    E'\n' order by e.id
+  ) as issue_details,
+  count(*) as event_count,
+  max(e.created_at) as last_event_at
+from public.ticket_events e
+group by e.ticket_id;
+
+-- Batched materialization for readers that still use tickets.issue_details
+-- (run periodically, e.g. every few minutes, not per turn).
+create or replace function public.sync_ticket_issue_details(
+  p_since timestamptz default now() - interval '1 hour'
+)
+returns int
+language plpgsql
+security definer
+as $$
+declare
+  v_count int;
+begin
+  update public.tickets t
+  set issue_details = v.issue_details
+  from public.ticket_issue_details v
+  where v.ticket_id = t.id
+    and v.last_event_at >= p_since
+    and t.issue_details is distinct from v.issue_details;
+
+  get diagnostics v_count = row_count;
+  return v_count;
+end;
+$$;
+
+alter table public.ticket_events enable row level security;
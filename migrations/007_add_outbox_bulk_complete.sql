@@ -0,0 +1,49 @@
+-- 007_add_outbox_bulk_complete.sql
+-- Purpose: one RPC per worker batch to record send results (instead of one UPDATE per row)
+
+-- p_sent:   ids delivered successfully
+-- p_failed: [{"id", "status", "attempt_count", "last_error", "next_attempt_at"}, ...]
+--           status defaults to 'pending' (retry at next_attempt_at)
+create or replace function public.complete_notifications(
+  p_sent uuid[] default '{}',
+  p_failed jsonb default '[]'::jsonb
+)
+returns int
+language plpgsql
+security definer
+as $$
+declare
+  v_sent int;
+  v_failed int;
+begin
+  update public.notification_outbox n
+  set
+    status     = 'sent',
+    sent_at    = now(),
+    last_error = null,
+    locked_at  = null,
+    locked_by  = null
+  where n.id = any(p_sent);
+  get diagnostics v_sent = row_count;
+
+  update public.notification_outbox n
+  set
+    status          = coalesce(f.status, 'pending'),
+    attempt_count   = f.attempt_count,
+    last_error      = f.last_error,
+    next_attempt_at = coalesce(f.next_attempt_at, now()),
+    locked_at       = null,
+    locked_by       = null
+  from jsonb_to_recordset(p_failed) as f(
+    id uuid,
+    status text,
+    attempt_count int,
+    last_error text,
+    next_attempt_at timestamptz
+  )
+  where n.id = f.id;
+  get diagnostics v_failed = row_count;
+
+  return v_sent + v_failed;
+end;
+$$;
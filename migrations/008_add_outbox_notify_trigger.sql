@@ -0,0 +1,21 @@
+-- 008_add_outbox_notify_trigger.sql
+-- Purpose: wake notification workers on new outbox rows (LISTEN notification_outbox)
+
+-- Statement-level: one notification per INSERT statement, even for bulk inserts.
+-- Payload is informational only; workers just re-run claim_due_notifications.
+create or replace function public.notify_outbox_insert()
+returns trigger
+language plpgsql
+as $$
+begin
+  perform pg_notify('notification_outbox', tg_op);
+  return null;
+end;
+$$;
+
+drop trigger if exists trg_notification_outbox_notify on public.notification_outbox;
+
+create trigger trg_notification_outbox_notify
+  after insert on public.notification_outbox
+  for each statement
+  execute function public.notify_outbox_insert();
@@ -0,0 +1,68 @@
+-- 009_add_outbox_priority.sql
+-- Purpose: priority lanes so emergency mail is claimed ahead of routine backlog
+--   0 = emergency (ticket.emergency or P0 ticket), 1 = urgent (P1), 2 = routine
+
+alter table public.notification_outbox
+  add column if not exists priority smallint generated always as (
+    case
+      when event_type = 'ticket.emergency' then 0
+      when payload -> 'ticket' ->> 'urgency' = 'P0_EMERGENCY' then 0
+      when payload -> 'ticket' ->> 'urgency' = 'P1_URGENT' then 1
+      else 2
+    end
+  ) stored;
+
+-- Serves the claim query per lane: only due/pending rows, in priority order
+create index if not exists idx_outbox_pending_priority
+  on public.notification_outbox (priority, next_attempt_at)
+  where status = 'pending';
+
+-- Replace the claim function (new optional lane parameter).
+-- Dropping first avoids an ambiguous overload with the 2-arg version from 003.
+drop function if exists public.claim_due_notifications(text, int);
+
+create or replace function public.claim_due_notifications(
+  p_worker_id text,
+  p_batch_size int default 10,
+  p_max_priority int default null  -- null = all lanes; 0 = emergency-only worker
+)
+returns setof public.notification_outbox
+language plpgsql
+security definer
+as $$
+begin
+  return query
+  with picked as (
+    select n.id
+    from public.notification_outbox n
+    where
+      (
+        (
+          n.status = 'pending'
+          and n.next_attempt_at <= now()
+        )
+        or
+        (
+          -- reclaim stuck jobs (worker crashed mid-send)
+          n.status = 'processing'
+          and n.locked_at < now() - interval '2 minutes'
+        )
+      )
+      and (p_max_priority is null or n.priority <= p_max_priority)
+    order by n.priority asc, n.next_attempt_at asc
+    for update skip locked
+    limit p_batch_size
+  ),
+  updated as (
+    update public.notification_outbox n
+    set
+      status   = 'processing',
+      locked_at = now(),
+      locked_by = p_worker_id
+    from picked
+    where n.id = picked.id
+    returning n.*
+  )
+  select * from updated;
+end;
+$$;
@@ -0,0 +1,7 @@
+-- 010_add_ticket_media_thumbnail.sql
+-- Purpose: downscaled JPEG derivative stored next to each image upload
+--   (same bucket, tickets/{ticket_id}/thumbs/...). Null for videos, for
+--   formats the backend can't decode, and for rows uploaded before this.
+
+alter table public.ticket_media
+  add column if not exists thumbnail_path text;
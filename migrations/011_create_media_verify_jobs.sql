@@ -0,0 +1,105 @@
+-- 011_create_media_verify_jobs.sql
+-- Purpose: verify uploaded images in the background (outbox pattern).
+--   upload_media (async mode) inserts ticket_media with
+--   verification_status = 'pending'; a trigger enqueues a job in the same
+--   transaction and wakes workers (LISTEN media_verify). app/worker_media.py
+--   claims jobs with SKIP LOCKED and fills is_valid / invalid_reason / verified_at.
+
+alter table public.ticket_media
+  add column if not exists issue_context text,
+  -- null for rows written before this migration
+  add column if not exists verification_status text
+    check (verification_status in ('pending', 'verified', 'skipped', 'error'));
+
+create table if not exists public.media_verify_jobs (
+  id uuid primary key default gen_random_uuid(),
+  created_at timestamptz not null default now(),
+
+  media_id uuid not null unique references public.ticket_media(id) on delete cascade,
+
+  status text not null default 'pending'
+    check (status in ('pending', 'processing', 'done', 'failed')),
+  attempt_count int not null default 0,
+  next_attempt_at timestamptz not null default now(),
+  last_error text,
+
+  locked_at timestamptz,
+  locked_by text
+);
+
+create index if not exists idx_media_verify_jobs_pending
+  on public.media_verify_jobs (next_attempt_at)
+  where status = 'pending';
+
+alter table public.media_verify_jobs enable row level security;
+
+-- Enqueue on insert of a pending row
+create or replace function public.enqueue_media_verify()
+returns trigger
+language plpgsql
+as $$
+begin
+  insert into public.media_verify_jobs (media_id) values (new.id)
+  on conflict (media_id) do nothing;
+  perform pg_notify('media_verify', new.id::text);
+  return null;
+end;
+$$;
+
+drop trigger if exists trg_ticket_media_enqueue_verify on public.ticket_media;
+
+create trigger trg_ticket_media_enqueue_verify
+  after insert on public.ticket_media
+  for each row
+  when (new.verification_status = 'pending')
+  execute function public.enqueue_media_verify();
+
+-- Claim due jobs, joined with what the worker needs from ticket_media
+create or replace function public.claim_media_verify_jobs(
+  p_worker_id text,
+  p_batch_size int default 10
+)
+returns table (
+  job_id uuid,
+  attempt_count int,
+  media_id uuid,
+  storage_bucket text,
+  storage_path text,
+  thumbnail_path text,
+  mime_type text,
+  issue_context text
+)
+language plpgsql
+security definer
+as $$
+begin
+  return query
+  with picked as (
+    select j.id
+    from public.media_verify_jobs j
+    where
+      (j.status = 'pending' and j.next_attempt_at <= now())
+      or
+      -- reclaim stuck jobs (worker crashed mid-verify)
+      (j.status = 'processing' and j.locked_at < now() - interval '5 minutes')
+    order by j.next_attempt_at asc
+    for update skip locked
+    limit p_batch_size
+  ),
+  updated as (
+    update public.media_verify_jobs j
+    set
+      status    = 'processing',
+      locked_at = now(),
+      locked_by = p_worker_id
+    from picked
+    where j.id = picked.id
+    returning j.id, j.attempt_count, j.media_id
+  )
+  select
+    u.id, u.attempt_count, m.id,
+    m.storage_bucket, m.storage_path, m.thumbnail_path, m.mime_type, m.issue_context
+  from updated u
+  join public.ticket_media m on m.id = u.media_id;
+end;
+$$;
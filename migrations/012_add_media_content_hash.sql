@@ -0,0 +1,81 @@
+-- 012_add_media_content_hash.sql
+-- Purpose: skip re-storing and re-verifying identical uploads.
+--   ticket_media.content_sha256 is computed while the upload is streamed;
+--   the same bytes on the same ticket resolve to the existing row.
+--   media_verdict_cache reuses verify_image verdicts across tickets for the
+--   same (image, normalized issue context, verifier model).
+
+alter table public.ticket_media
+  add column if not exists content_sha256 text;
+
+-- Rows from before this migration have no hash and are never deduplicated
+create unique index if not exists uq_ticket_media_ticket_content
+  on public.ticket_media (ticket_id, content_sha256)
+  where content_sha256 is not null;
+
+create table if not exists public.media_verdict_cache (
+  content_sha256 text not null,
+  context_digest text not null,  -- sha256 of lowercased, whitespace-collapsed issue_context
+  verifier text not null,
+  is_valid boolean not null,
+  reason text,
+  created_at timestamptz not null default now(),
+  primary key (content_sha256, context_digest, verifier)
+);
+
+alter table public.media_verdict_cache enable row level security;
+
+-- The media worker needs the hash to consult / fill the cache.
+-- Return type changes, so drop and recreate.
+drop function if exists public.claim_media_verify_jobs(text, int);
+
+create function public.claim_media_verify_jobs(
+  p_worker_id text,
+  p_batch_size int default 10
+)
+returns table (
+  job_id uuid,
+  attempt_count int,
+  media_id uuid,
+  storage_bucket text,
+  storage_path text,
+  thumbnail_path text,
+  mime_type text,
+  issue_context text,
+  content_sha256 text
+)
+language plpgsql
+security definer
+as $$
+begin
+  return query
+  with picked as (
+    select j.id
+    from public.media_verify_jobs j
+    where
+      (j.status = 'pending' and j.next_attempt_at <= now())
+      or
+      -- reclaim stuck jobs (worker crashed mid-verify)
+      (j.status = 'processing' and j.locked_at < now() - interval '5 minutes')
+    order by j.next_attempt_at asc
+    for update skip locked
+    limit p_batch_size
+  ),
+  updated as (
+    update public.media_verify_jobs j
+    set
+      status    = 'processing',
+      locked_at = now(),
+      locked_by = p_worker_id
+    from picked
+    where j.id = picked.id
+    returning j.id, j.attempt_count, j.media_id
+  )
+  select
+    u.id, u.attempt_count, m.id,
+    m.storage_bucket, m.storage_path, m.thumbnail_path, m.mime_type, m.issue_context,
+    m.content_sha256
+  from updated u
+  join public.ticket_media m on m.id = u.media_id;
+end;
+$$;
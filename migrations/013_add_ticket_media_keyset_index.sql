@@ -0,0 +1,11 @@
+-- 013_add_ticket_media_keyset_index.sql
+-- Purpose: GET /tickets/{id}/media pages on (created_at desc, id desc).
+--   The id tiebreaker keeps the order total (uploads can share a timestamp),
+--   and having it in the index lets every page be a single range scan
+--   regardless of how many files the ticket has.
+
+create index if not exists idx_ticket_media_ticket_created_id
+  on public.ticket_media (ticket_id, created_at desc, id desc);
+
+-- Superseded by the index above (same leading columns)
+drop index if exists public.idx_ticket_media_ticket_id_created_at;
@@ -0,0 +1,37 @@
+-- 014_add_ticket_queue_indexes.sql
+-- Purpose: serve GET /tickets (manager queue) at any table size.
+--   Every query is "filters = ... order by created_at desc, id desc limit N"
+--   with a keyset cursor, so each index ends in (created_at desc, id desc):
+--   a page is one index range scan, no sort, whatever the offset.
+
+-- Columns the backend already writes (app/tools.py) but 001 never declared
+alter table public.tickets
+  add column if not exists category text,
+  add column if not exists property_id text;
+
+-- Unfiltered queue
+create index if not exists idx_tickets_created_id
+  on public.tickets (created_at desc, id desc);
+
+-- By status, optionally narrowed by urgency (the manager's default view)
+create index if not exists idx_tickets_status_created_id
+  on public.tickets (status, created_at desc, id desc);
+
+create index if not exists idx_tickets_status_urgency_created_id
+  on public.tickets (status, urgency, created_at desc, id desc);
+
+-- By urgency alone (no status filter)
+create index if not exists idx_tickets_urgency_created_id
+  on public.tickets (urgency, created_at desc, id desc);
+
+create index if not exists idx_tickets_category_created_id
+  on public.tickets (category, created_at desc, id desc)
+  where category is not null;
+
+create index if not exists idx_tickets_property_created_id
+  on public.tickets (property_address, created_at desc, id desc)
+  where property_address is not null;
+
+-- Superseded by the composites above
+drop index if exists public.idx_tickets_status;
+drop index if exists public.idx_tickets_created_at;
@@ -0,0 +1,51 @@
+-- 015_add_outbox_dedupe_key.sql
+-- Purpose: idempotent enqueue without failed inserts (or spurious wakeups).
+--   app/notifications.py writes with INSERT ... ON CONFLICT (dedupe_key) DO NOTHING
+--   (PostgREST upsert, ignore-duplicates), which needs a plain unique index on
+--   dedupe_key. 002 never declared the column; production may already have a
+--   unique constraint on it, so only create one if none exists.
+
+alter table public.notification_outbox
+  add column if not exists dedupe_key text;
+
+do $$
+begin
+  if not exists (
+    select 1
+    from pg_index i
+    join pg_attribute a
+      on a.attrelid = i.indrelid and a.attnum = i.indkey[0]
+    where i.indrelid = 'public.notification_outbox'::regclass
+      and i.indisunique
+      and i.indnatts = 1
+      and i.indpred is null
+      and a.attname = 'dedupe_key'
+  ) then
+    create unique index uq_notification_outbox_dedupe_key
+      on public.notification_outbox (dedupe_key);
+  end if;
+end;
+$$;
+
+-- Duplicate enqueues are now no-op inserts, but 008's statement trigger still
+-- fired for them and woke every worker for nothing. Only notify when the
+-- statement actually inserted rows (transition table is non-empty).
+create or replace function public.notify_outbox_insert()
+returns trigger
+language plpgsql
+as $$
+begin
+  if exists (select 1 from inserted_rows) then
+    perform pg_notify('notification_outbox', tg_op);
+  end if;
+  return null;
+end;
+$$;
+
+drop trigger if exists trg_notification_outbox_notify on public.notification_outbox;
+
+create trigger trg_notification_outbox_notify
+  after insert on public.notification_outbox
+  referencing new table as inserted_rows
+  for each statement
+  execute function public.notify_outbox_insert();
@@ -0,0 +1,17 @@
+-- 016_add_outbox_dead_letter.sql
+-- Purpose: dead-letter status for the notification outbox.
+--   The worker parks a row as status='dead' on a permanent error (unknown
+--   event_type, provider 4xx such as an invalid recipient) or once
+--   attempt_count reaches WORKER_MAX_ATTEMPTS. Dead rows are never claimed
+--   again (claim_due_notifications only takes 'pending'); they stay for
+--   inspection and can be replayed by resetting status to 'pending'.
+--   The worker stamps next_attempt_at = now() when it dead-letters a row, so
+--   the partial index lists the dead-letter queue newest-first without
+--   growing with the (much larger) pending/sent population.
+
+create index if not exists idx_outbox_dead
+  on public.notification_outbox (next_attempt_at desc)
+  where status = 'dead';
+
+comment on column public.notification_outbox.status is
+  'pending | processing | sent | dead (dead-letter: permanent error or max attempts)';
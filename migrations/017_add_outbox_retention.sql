@@ -0,0 +1,95 @@
+-- 017_add_outbox_retention.sql
+-- Purpose: keep notification_outbox small as volume grows.
+--   Sent rows are only history once delivered, but they stayed in the outbox
+--   forever and in idx_outbox_pending (002), which indexes every row whatever
+--   its status. archive_sent_notifications() moves old sent rows into
+--   notification_outbox_archive in bounded batches (app/outbox_retention.py
+--   runs it on a schedule), and the claim/idle queries get a partial index
+--   that only holds live rows.
+--
+--   Dedupe: archived rows take their dedupe_key with them, so the unique
+--   index (015) only guards keys inside the retention window. Keys are
+--   per ticket event, so re-enqueueing one after N days does not happen in
+--   practice.
+--
+--   Dead rows (016) are the dead-letter queue and are not archived.
+
+-- Same columns as the outbox (priority becomes a plain column: LIKE does not
+-- copy generation expressions) plus when the row was archived.
+create table if not exists public.notification_outbox_archive (
+  like public.notification_outbox including defaults
+);
+
+alter table public.notification_outbox_archive
+  add column if not exists archived_at timestamptz not null default now();
+
+do $$
+begin
+  if not exists (
+    select 1 from pg_constraint
+    where conrelid = 'public.notification_outbox_archive'::regclass
+      and contype = 'p'
+  ) then
+    alter table public.notification_outbox_archive add primary key (id);
+  end if;
+end;
+$$;
+
+create index if not exists idx_outbox_archive_ticket_id
+  on public.notification_outbox_archive (ticket_id);
+
+create index if not exists idx_outbox_archive_sent_at
+  on public.notification_outbox_archive (sent_at);
+
+-- Finds archivable rows without scanning live ones.
+create index if not exists idx_outbox_sent_at
+  on public.notification_outbox (sent_at)
+  where status = 'sent';
+
+-- Live rows only: serves the claim's reclaim branch (status = 'processing')
+-- and the worker's next-due lookup. Pending rows per lane are already
+-- covered by idx_outbox_pending_priority (009).
+create index if not exists idx_outbox_active
+  on public.notification_outbox (status, next_attempt_at)
+  where status in ('pending', 'processing');
+
+drop index if exists public.idx_outbox_pending;
+
+-- Moves up to p_batch_size sent rows older than p_older_than into the archive
+-- and returns how many moved. Callers loop until it returns < p_batch_size;
+-- short batches keep row locks and WAL bursts small.
+create or replace function public.archive_sent_notifications(
+  p_older_than interval default interval '30 days',
+  p_batch_size int default 1000
+)
+returns int
+language plpgsql
+security definer
+as $$
+declare
+  v_moved int;
+begin
+  with picked as (
+    select n.id
+    from public.notification_outbox n
+    where n.status = 'sent'
+      and n.sent_at < now() - p_older_than
+    order by n.sent_at asc
+    for update skip locked
+    limit p_batch_size
+  ),
+  moved as (
+    delete from public.notification_outbox n
+    using picked
+    where n.id = picked.id
+    returning n.*
+  )
+  -- moved.* is in outbox column order, which the archive copied at creation;
+  -- add new outbox columns to the archive in the same migration.
+  insert into public.notification_outbox_archive
+  select moved.*, now() from moved;
+
+  get diagnostics v_moved = row_count;
+  return v_moved;
+end;
+$$;